@@ -0,0 +1,105 @@
+"""
+Benchmark ingredient suggestion lookups: the old per-request load and linear scan
+against the in-memory IngredientIndex.
+
+Run from the repository root:
+
+    python benchmarks/bench_ingredients.py --sizes 235 10000 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from website.ingredients import IngredientIndex # pylint: disable=wrong-import-position
+
+CATALOG_PATH = os.path.join('website', 'static', 'data', 'ingredients.json')
+QUERIES = ("ch", "chi", "chicken", "beef", "oil", "ap", "sauce", "zzq", "milk", "pep")
+MODIFIERS = ["Organic", "Smoked", "Fresh", "Dried", "Frozen", "Roasted", "Pickled",
+             "Spicy", "Sweet", "Wild", "Baby", "Aged", "Raw", "Toasted", "Ground"]
+
+
+def make_catalog(size):
+    """
+    Return a synthetic catalog of the given size derived from the shipped ingredients.
+    """
+    with open(CATALOG_PATH, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    catalog = list(base)
+    serial = 0
+    while len(catalog) < size:
+        for name in base:
+            modifier = MODIFIERS[serial % len(MODIFIERS)]
+            catalog.append(f"{modifier} {name} {serial}")
+            if len(catalog) == size:
+                break
+        serial += 1
+    return catalog[:size]
+
+
+def linear_lookup(path, query):
+    """
+    The pre-index request path: load the JSON file and scan it.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        ingredients = json.load(f)
+    return [name for name in ingredients if query in name.lower()][:10]
+
+
+def build_index(catalog):
+    """
+    Return an IngredientIndex of catalog and the milliseconds it took to build.
+    """
+    start = time.perf_counter()
+    index = IngredientIndex(catalog)
+    return index, (time.perf_counter() - start) * 1e3
+
+
+def time_per_query(func, repeat, queries=QUERIES):
+    """
+    Return mean microseconds per query over all queries.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            func(query)
+    return (time.perf_counter() - start) / (repeat * len(queries)) * 1e6
+
+
+def main():
+    """
+    Run the benchmark and print one line per catalog size.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[235, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'build ms':>10} {'linear us':>12} {'index us':>10} {'speedup':>8}")
+    for size in args.sizes:
+        catalog = make_catalog(size)
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(catalog, f)
+            path = f.name
+        try:
+            index, build_ms = build_index(catalog)
+
+            for query in QUERIES:
+                assert index.search(query) == linear_lookup(path, query), query
+
+            linear_us = time_per_query(lambda q, p=path: linear_lookup(p, q),
+                                       max(1, args.repeat // 10))
+            index_us = time_per_query(index.search, args.repeat * 50)
+        finally:
+            os.unlink(path)
+        print(f"{size:>8} {build_ms:>10.1f} {linear_us:>12.1f} {index_us:>10.2f} "
+              f"{linear_us / index_us:>7.0f}x")
+
+
+if __name__ == '__main__':
+    main()
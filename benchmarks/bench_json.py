@@ -0,0 +1,98 @@
+"""
+Benchmark JSON responses: serialization time with the standard library provider
+against the orjson provider, and bytes on the wire uncompressed, gzipped and (when
+the brotli package is installed) brotli-compressed.
+
+Payloads are recipe-sized: a full recipe with a dozen instruction steps, and a
+bundle of that recipe with three similar recipes.
+
+Run from the repository root:
+
+    python benchmarks/bench_json.py
+"""
+
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from website.compression import brotli
+from website.llm import FakeBackend
+from website.serialization import OrjsonProvider
+
+RECIPE = json.loads(FakeBackend.response_for("recipe"))
+RECIPE["ingredients"] = [
+    "2 boneless, skinless chicken breasts, cut into bite-sized pieces",
+    "1 cup jasmine rice, rinsed", "1 head broccoli, cut into florets",
+    "1 red bell pepper, thinly sliced", "3 cloves garlic, minced",
+    "1 tablespoon fresh ginger, grated", "3 tablespoons low-sodium soy sauce",
+    "1 tablespoon honey", "2 teaspoons toasted sesame oil", "1 tablespoon cornstarch",
+    "2 green onions, sliced", "Salt and freshly ground black pepper to taste",
+]
+RECIPE["instructions"] = [
+    "Cook the rice according to the package directions and keep it warm.",
+    "Whisk the soy sauce, honey, sesame oil, cornstarch and a splash of water in a bowl.",
+    "Season the chicken pieces with salt and pepper on all sides.",
+    "Heat a large skillet or wok over medium-high heat with a drizzle of oil.",
+    "Sear the chicken in a single layer until golden and cooked through, about 6 minutes.",
+    "Transfer the chicken to a plate and add the broccoli and bell pepper to the pan.",
+    "Stir-fry the vegetables for 3 to 4 minutes until bright and just tender.",
+    "Add the garlic and ginger and cook for 30 seconds until fragrant.",
+    "Return the chicken to the pan and pour the sauce over everything.",
+    "Toss until the sauce thickens and coats the chicken and vegetables, about 1 minute.",
+    "Taste and adjust the seasoning with more soy sauce or pepper if needed.",
+    "Serve over the rice and garnish with the sliced green onions.",
+]
+PAYLOADS = {
+    "recipe": RECIPE,
+    "bundle": {"recipe": RECIPE, "similar": {"recipes": [dict(RECIPE, title=f"Variation {n}")
+                                                         for n in range(3)]}},
+}
+
+
+def per_call(function, repeat):
+    """
+    Return the mean duration of function() in microseconds.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    """
+    Run the benchmark and print a table per payload.
+    """
+    app = Flask(__name__)
+    providers = {"stdlib": DefaultJSONProvider(app), "orjson": OrjsonProvider(app)}
+    repeat = 5000
+
+    with app.app_context():
+        for name, payload in PAYLOADS.items():
+            print(f"{name}")
+            for label, provider in providers.items():
+                micros = per_call(lambda provider=provider, payload=payload:
+                                  provider.response(payload), repeat)
+                print(f"  {label:>8} jsonify {micros:>8.1f} us")
+            body = providers["orjson"].response(payload).get_data()
+            gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+            micros = per_call(lambda body=body: gzip.compress(body, compresslevel=6, mtime=0),
+                              repeat // 5)
+            print(f"  {'identity':>8} {len(body):>7} bytes")
+            print(f"  {'gzip -6':>8} {len(gzipped):>7} bytes ({len(gzipped) / len(body):.0%}), "
+                  f"{micros:.1f} us to compress")
+            if brotli is not None:
+                compressed = brotli.compress(body, quality=4)
+                print(f"  {'br q4':>8} {len(compressed):>7} bytes "
+                      f"({len(compressed) / len(body):.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark of JSON extraction from model responses: the old fence-stripping
+routine against website.parsing, with and without orjson.
+
+Run from the repository root:
+
+    python benchmarks/bench_parsing.py
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from website import parsing # pylint: disable=wrong-import-position
+from website.llm import FakeBackend # pylint: disable=wrong-import-position
+
+RECIPE = json.loads(FakeBackend.response_for("recipe"))
+RECIPE["instructions"] = [f"Step {n}: {'stir and season carefully ' * 4}" for n in range(1, 13)]
+BODY = json.dumps(RECIPE, indent=4)
+
+# Response shapes seen from Gemini in practice
+CORPUS = {
+    "bare": BODY,
+    "json fence": f"```json\n{BODY}\n```",
+    "plain fence": f"```\n{BODY}\n```",
+    "leading prose": f"Here is a recipe using your ingredients:\n\n```json\n{BODY}\n```",
+    "trailing note": f"{BODY}\n\nNote: adjust the seasoning to taste.",
+    "prose both sides": f"Sure! Here you go:\n{BODY}\nLet me know if you'd like changes.",
+}
+
+
+def legacy_parse(response_text):
+    """
+    The routine previously duplicated in generate_recipe() and similar_recipes().
+    """
+    if response_text.startswith("```json"):
+        response_text = response_text.replace("```json", "").replace("```", "")
+    elif response_text.startswith("```"):
+        response_text = response_text.replace("```", "")
+    return json.loads(response_text.strip())
+
+
+def measure(func, text, repeat):
+    """
+    Return (ok, microseconds per call) for func over text.
+    """
+    try:
+        func(text)
+    except ValueError:
+        return False, None
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(text)
+    return True, (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    """
+    Print per-shape success and timing for each parser.
+    """
+    repeat = 2000
+    orjson_module = parsing.orjson
+    parsers = [("legacy", legacy_parse)]
+    parsers.append(("extract+json", parsing.extract_json_object))
+    if orjson_module is not None:
+        parsers.append(("extract+orjson", parsing.extract_json_object))
+
+    print(f"{'shape':>18} " + " ".join(f"{name:>15}" for name, _ in parsers))
+    for shape, text in CORPUS.items():
+        cells = []
+        for name, func in parsers:
+            parsing.orjson = orjson_module if name.endswith("orjson") else None
+            ok, micros = measure(func, text, repeat)
+            cells.append(f"{micros:>12.1f} us" if ok else f"{'FAIL':>15}")
+        print(f"{shape:>18} " + " ".join(cells))
+    parsing.orjson = orjson_module
+    print(f"\n{len(BODY)} byte recipe; a failure means the user must regenerate.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark similar-recipe lookups in the pre-generated store: MinHash/LSH candidates
+against an exact Jaccard scan over every stored ingredient set.
+
+Run from the repository root:
+
+    python benchmarks/bench_recipe_store.py --sizes 1000 10000 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from website.cache import normalize_ingredients
+from website.recipe_store import RecipeStore, jaccard
+
+CATALOG_PATH = os.path.join('website', 'static', 'data', 'ingredients.json')
+SIMILAR = {"recipes": [{"title": "Stored idea"}]}
+
+
+def make_sets(size, rng):
+    """
+    Return size random ingredient sets of 2-6 ingredients from the shipped catalog.
+    """
+    with open(CATALOG_PATH, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+    return [rng.sample(catalog, rng.randint(2, 6)) for _ in range(size)]
+
+
+def make_queries(sets, count, rng):
+    """
+    Return queries that are stored sets with one ingredient changed, plus unrelated sets.
+    """
+    queries = []
+    for items in rng.sample(sets, count // 2):
+        queries.append(items[:-1] + ["Saffron"])
+    queries += make_sets(count - len(queries), rng)
+    return queries
+
+
+def compare_lookups(store, sets, queries):
+    """
+    Return (scan us, lsh us, recall) for queries: a full Jaccard scan over sets against
+    the store's LSH lookup, and the fraction of the scan's matches the lookup finds.
+    """
+    stored = [frozenset(normalize_ingredients(items)) for items in sets]
+    start = time.perf_counter()
+    expected = [any(jaccard(frozenset(normalize_ingredients(q)), s) >= 0.6 for s in stored)
+                for q in queries]
+    scan_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+    start = time.perf_counter()
+    found = [store.lookup("similar", q) is not None for q in queries]
+    lsh_us = (time.perf_counter() - start) / len(queries) * 1e6
+
+    matches = sum(expected)
+    recall = sum(e and f for e, f in zip(expected, found)) / matches if matches else 1.0
+    return scan_us, lsh_us, recall
+
+
+def main():
+    """
+    Run the benchmark and print one line per store size.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(7)
+
+    print(f"{'size':>8} {'build ms':>10} {'scan us':>10} {'lsh us':>8} {'speedup':>8} "
+          f"{'recall':>7}")
+    for size in args.sizes:
+        sets = make_sets(size, rng)
+        start = time.perf_counter()
+        store = RecipeStore(({"ingredients": items, "similar": SIMILAR} for items in sets),
+                            min_similarity=0.6)
+        build_ms = (time.perf_counter() - start) * 1e3
+        scan_us, lsh_us, recall = compare_lookups(store, sets,
+                                                  make_queries(sets, args.queries, rng))
+        print(f"{size:>8} {build_ms:>10.1f} {scan_us:>10.1f} {lsh_us:>8.1f} "
+              f"{scan_us / lsh_us:>7.0f}x {recall:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
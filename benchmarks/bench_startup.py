@@ -0,0 +1,75 @@
+"""
+Benchmark worker startup: importing the app, create_app(), the first request, and
+creating the provider client that is now deferred to the first generation.
+
+Each run is a fresh interpreter, as a newly started worker would be. Run from the
+repository root:
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+# Timed in a child interpreter; prints one JSON object of phase durations in milliseconds
+PHASES = r"""
+import json, sys, time
+start = time.perf_counter()
+phases = {}
+
+def mark(name):
+    global start
+    now = time.perf_counter()
+    phases[name] = (now - start) * 1e3
+    start = now
+
+from website import create_app
+mark("import")
+app = create_app({"LLM_BACKEND": "gemini", "GEMINI_API_KEY": "benchmark",
+                  "INGREDIENTS_RELOAD_INTERVAL": 0})
+mark("create_app")
+app.test_client().get("/api/ingredients?query=chicken")
+mark("first_request")
+phases["sdk_loaded_at_boot"] = "google.generativeai" in sys.modules
+llm = app.extensions["llm"]
+if hasattr(llm, "warm_up"):
+    llm.warm_up()
+    mark("client_init")
+print(json.dumps(phases))
+"""
+
+
+def run_once():
+    """
+    Return the phase durations of one cold start.
+    """
+    output = subprocess.run([sys.executable, "-c", PHASES], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    """
+    Run the benchmark and print the median of each phase.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    boot = [run["import"] + run["create_app"] for run in runs]
+    for phase in ("import", "create_app", "first_request", "client_init"):
+        if phase in runs[0]:
+            print(f"{phase:>14} {statistics.median(run[phase] for run in runs):>9.1f} ms")
+    print(f"{'boot total':>14} {statistics.median(boot):>9.1f} ms")
+    print(f"{'SDK at boot':>14} {'yes' if runs[0]['sdk_loaded_at_boot'] else 'no':>9}")
+
+
+if __name__ == '__main__':
+    main()
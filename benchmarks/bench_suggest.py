@@ -0,0 +1,81 @@
+"""
+Benchmark ranked, typo-tolerant suggestions: IngredientIndex.suggest against a linear
+scan that ranks every catalog entry the same way, and the original substring scan.
+
+Run from the repository root:
+
+    python benchmarks/bench_suggest.py --sizes 235 10000 100000
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from bench_ingredients import build_index, make_catalog, time_per_query
+from website.ingredients import WORD, prefix_distance, typo_tolerance
+
+QUERIES = ["ch", "chi", "chicken", "chiken", "brocoli", "parmesean", "milk", "sauce",
+           "tomatoe", "chiken brest", "ciantro", "zzqx"]
+
+
+def linear_suggest(lowered, ingredients, query, limit=10):
+    """
+    Rank every name by match type (and typo distance), as suggest() does, by brute force.
+    """
+    query = " ".join(query.lower().split())
+    words = WORD.findall(query)
+    primary = max(words, key=len) if words else ""
+    others = list(words)
+    if primary:
+        others.remove(primary)
+    max_typos = typo_tolerance(primary)
+    ranked = []
+    for position, name in enumerate(lowered):
+        if name.startswith(query):
+            ranked.append((0, 0, position))
+        elif any(m.start() and name.startswith(query, m.start()) for m in WORD.finditer(name)):
+            ranked.append((1, 0, position))
+        elif query in name:
+            ranked.append((2, 0, position))
+        elif max_typos:
+            name_words = [w for w in WORD.findall(name) if len(w) >= 4]
+            distance = min((prefix_distance(primary, w) for w in name_words), default=99)
+            if distance <= max_typos and all(
+                    any(w.startswith(o) or (typo_tolerance(o) and
+                                            prefix_distance(o, w) <= typo_tolerance(o))
+                        for w in WORD.findall(name)) for o in others):
+                ranked.append((3, distance, position))
+    return [ingredients[position] for _, _, position in sorted(ranked)[:limit]]
+
+
+def main():
+    """
+    Run the benchmark and print one line per catalog size.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[235, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'build ms':>10} {'linear us':>12} {'suggest us':>11} {'worst us':>9} "
+          f"{'speedup':>8} {'agree':>6}")
+    for size in args.sizes:
+        catalog = make_catalog(size)
+        lowered = [name.lower() for name in catalog]
+        index, build_ms = build_index(catalog)
+
+        agree = sum(index.suggest(q) == linear_suggest(lowered, catalog, q) for q in QUERIES)
+        linear_us = time_per_query(
+            lambda q, lowered=lowered, catalog=catalog: linear_suggest(lowered, catalog, q), 1,
+            QUERIES)
+        suggest_us = time_per_query(index.suggest, args.repeat * 10, QUERIES)
+        worst_us = max(time_per_query(index.suggest, args.repeat, [q]) for q in QUERIES)
+        print(f"{size:>8} {build_ms:>10.1f} {linear_us:>12.1f} {suggest_us:>11.1f} "
+              f"{worst_us:>9.1f} {linear_us / suggest_us:>7.0f}x {agree:>3}/{len(QUERIES)}")
+
+
+if __name__ == '__main__':
+    main()
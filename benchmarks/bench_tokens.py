@@ -0,0 +1,87 @@
+"""
+Compare prompt and response token counts for prose-described JSON against the
+model's JSON mode with a response schema.
+
+Run from the repository root:
+
+    python benchmarks/bench_tokens.py            # offline estimate (4 characters/token)
+    python benchmarks/bench_tokens.py --live 3   # real Gemini usage, needs GEMINI_API_KEY
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+# pylint: disable=wrong-import-position
+from website.llm import CHARS_PER_TOKEN, FakeBackend, GeminiBackend
+from website.parsing import parse_model_json
+from website.prompts import PROMPTS, STRUCTURED_PROMPTS
+
+INGREDIENTS = ["Chicken Breast", "Rice", "Broccoli", "Garlic", "Soy Sauce"]
+
+
+def estimate(text):
+    """
+    Approximate token count of text.
+    """
+    return round(len(text) / CHARS_PER_TOKEN)
+
+
+def offline():
+    """
+    Estimate tokens from prompt length and typical response formatting.
+    """
+    print(f"{'kind':>8} {'mode':>10} {'prompt tok':>11} {'response tok':>13}")
+    for kind in ("recipe", "similar"):
+        payload = json.loads(FakeBackend.response_for("recipe ideas" if kind == "similar" else ""))
+        # Prose mode typically answers with an indented object inside a markdown fence
+        prose_response = f"```json\n{json.dumps(payload, indent=4)}\n```"
+        structured_response = json.dumps(payload)
+        for mode, table, response in (("prose", PROMPTS, prose_response),
+                                       ("json mode", STRUCTURED_PROMPTS, structured_response)):
+            build_prompt, _ = table[kind]
+            print(f"{kind:>8} {mode:>10} {estimate(build_prompt(INGREDIENTS)):>11} "
+                  f"{estimate(response):>13}")
+
+
+def live(runs):
+    """
+    Measure real token usage and parse failures against Gemini.
+    """
+    backend = GeminiBackend(api_key=os.environ['GEMINI_API_KEY'])
+    print(f"{'kind':>8} {'mode':>10} {'prompt tok':>11} {'response tok':>13} {'parse fails':>12}")
+    for kind in ("recipe", "similar"):
+        for mode, table in (("prose", PROMPTS), ("json mode", STRUCTURED_PROMPTS)):
+            build_prompt, generation_config = table[kind]
+            prompt_tokens, output_tokens, failures = 0, 0, 0
+            for _ in range(runs):
+                generation = backend.generate(build_prompt(INGREDIENTS), generation_config)
+                prompt_tokens += generation.prompt_tokens or 0
+                output_tokens += generation.output_tokens or 0
+                try:
+                    parse_model_json(generation.text, kind)
+                except ValueError:
+                    failures += 1
+            print(f"{kind:>8} {mode:>10} {prompt_tokens / runs:>11.0f} "
+                  f"{output_tokens / runs:>13.0f} {failures:>12}")
+
+
+def main():
+    """
+    Run the offline estimate or the live measurement.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--live', type=int, metavar='RUNS',
+                        help="Call Gemini RUNS times per kind and mode")
+    args = parser.parse_args()
+    if args.live:
+        live(args.live)
+    else:
+        offline()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,4 @@
+"""
+Empty gunicorn settings: load_test.py passes this file so gunicorn runs with its
+own defaults and the command-line flags only, not the repository's gunicorn.conf.py.
+"""
@@ -0,0 +1,175 @@
+"""
+Load test showing how generation throughput scales with concurrency for each
+gunicorn worker class, served offline with the fake LLM backend.
+
+Run from the repository root:
+
+    python benchmarks/load_test.py --worker-classes sync gevent --concurrency 1 8 32 128
+
+Pass --url to test an already running server instead of launching gunicorn.
+"""
+
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+BARE_CONFIG_PATH = os.path.join(ROOT, 'benchmarks', 'gunicorn_defaults.conf.py')
+
+
+def free_port():
+    """
+    Return a TCP port that is currently free on localhost.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(port, options, env, description, startup_timeout=30):
+    """
+    Launch gunicorn on port with the given command-line options and extra environment,
+    serving offline with the fake LLM backend, and wait until it accepts connections.
+    """
+    env = dict(os.environ, FLASK_LLM_BACKEND='fake', FLASK_INGREDIENTS_RELOAD_INTERVAL='0',
+               **env)
+    process = subprocess.Popen( # pylint: disable=consider-using-with
+        [sys.executable, '-m', 'gunicorn', '--chdir', ROOT, *options,
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app'],
+        env=env, cwd=ROOT,
+    )
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.2):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    stop_server(process)
+    raise RuntimeError(f"gunicorn ({description}) did not start")
+
+
+def start_server(worker_class, workers, port, latency, tokens_per_second):
+    """
+    Launch gunicorn with only the given worker settings and wait until it accepts connections.
+    """
+    # gunicorn would otherwise load ./gunicorn.conf.py, whose preloading and sizing
+    # are measured by load_test_profile.py instead
+    options = ['--config', BARE_CONFIG_PATH, '--worker-class', worker_class,
+               '--workers', str(workers), '--worker-connections', '2000', '--timeout', '120']
+    return start_gunicorn(port, options,
+                          {'FLASK_FAKE_LLM_LATENCY': str(latency),
+                           'FLASK_FAKE_LLM_TOKENS_PER_SECOND': str(tokens_per_second)},
+                          worker_class)
+
+
+def stop_server(process):
+    """
+    Stop a server started by start_gunicorn() and wait for it to exit.
+    """
+    process.terminate()
+    process.wait()
+
+
+def percentile(values, fraction):
+    """
+    Return the given percentile of a list of numbers.
+    """
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_requests(base_url, make_request, concurrency, keep_going, timeout=300):
+    """
+    Keep concurrency requests in flight while keep_going(i) is true for the next request
+    number i; make_request(client, i) sends request i.
+
+    Return (elapsed, latencies, errors); elapsed includes draining the requests still in
+    flight at the end.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    latencies = []
+    errors = 0
+    counter = itertools.count()
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                if not keep_going(i):
+                    return
+                start = time.perf_counter()
+                try:
+                    response = await make_request(client, i)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - start, latencies, errors
+
+
+async def run_level(base_url, path, concurrency, total, run_id):
+    """
+    Send total requests with the given concurrency and return (elapsed, latencies, errors).
+    """
+    def generate(client, i):
+        # Unique ingredients per request so the recipe cache never answers
+        body = {"ingredients": [f"ingredient {run_id}-{concurrency}-{i}", "rice"]}
+        return client.post(path, json=body)
+
+    return await run_requests(base_url, generate, concurrency, lambda i: i < total)
+
+
+def main():
+    """
+    Run the concurrency sweep and print one line per worker class and level.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', help="Base URL of a running server")
+    parser.add_argument('--worker-classes', nargs='+', default=['sync', 'gevent'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128])
+    parser.add_argument('--latency', type=float, default=0.5,
+                        help="Fake model time to first token (s)")
+    parser.add_argument('--tokens-per-second', type=float, default=0,
+                        help="Fake model output rate (0 = instant)")
+    parser.add_argument('--path', default='/api/generate-recipe')
+    args = parser.parse_args()
+
+    targets = [('external', None)] if args.url else [(cls, None) for cls in args.worker_classes]
+    print(f"{'worker':>8} {'conc':>5} {'reqs':>5} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>6}")
+    for run_id, (worker_class, _) in enumerate(targets):
+        process = None
+        base_url = args.url
+        if not base_url:
+            port = free_port()
+            process = start_server(worker_class, args.workers, port, args.latency,
+                                   args.tokens_per_second)
+            base_url = f'http://127.0.0.1:{port}'
+        try:
+            for concurrency in args.concurrency:
+                total = max(concurrency, 8)
+                elapsed, latencies, errors = asyncio.run(
+                    run_level(base_url, args.path, concurrency, total, run_id))
+                print(f"{worker_class:>8} {concurrency:>5} {total:>5} {total / elapsed:>8.1f} "
+                      f"{percentile(latencies, 0.5) * 1e3:>8.0f} "
+                      f"{percentile(latencies, 0.99) * 1e3:>8.0f} {errors:>6}")
+        finally:
+            if process:
+                stop_server(process)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Load test of the shipped gunicorn profile: requests per second, and per core, for the
+suggestion and generation endpoints, served offline with the fake LLM backend.
+
+Run from the repository root:
+
+    python benchmarks/load_test_profile.py --worker-classes gevent gthread sync
+
+The load generator runs on the same machine, so on small hosts it competes with the
+workers for CPU; per-core figures divide by the cores the workers can use.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# pylint: disable=wrong-import-position
+from load_test import ROOT, free_port, percentile, run_requests, start_gunicorn, stop_server
+
+CATALOG_PATH = os.path.join(ROOT, 'website', 'static', 'data', 'ingredients.json')
+PROFILE_PATH = os.path.join(ROOT, 'gunicorn.conf.py')
+
+
+def start_profile(worker_class, workers, port, latency):
+    """
+    Launch gunicorn with gunicorn.conf.py and the fake backend; wait until it accepts.
+
+    workers of None keeps the profile's worker count for the class.
+    """
+    options = ['--config', PROFILE_PATH, '--worker-class', worker_class]
+    if workers:
+        options += ['--workers', str(workers)]
+    return start_gunicorn(port, options, {'FLASK_FAKE_LLM_LATENCY': str(latency)},
+                          worker_class, startup_timeout=60)
+
+
+def run_endpoint(base_url, make_request, concurrency, duration):
+    """
+    Keep concurrency requests in flight for duration seconds.
+
+    Return (count, elapsed, latencies, errors); elapsed includes draining the
+    requests still in flight at the end.
+    """
+    stop_at = time.perf_counter() + duration
+    elapsed, latencies, errors = asyncio.run(run_requests(
+        base_url, make_request, concurrency, lambda _: time.perf_counter() < stop_at,
+        timeout=120))
+    return len(latencies), elapsed, latencies, errors
+
+
+def endpoints(run_id):
+    """
+    Return (name, request factory, concurrency option) for the suggestion and generation
+    endpoints.
+    """
+    with open(CATALOG_PATH, 'r', encoding='utf-8') as f:
+        queries = [name.lower()[:length] for name in json.load(f) for length in (2, 4, 6)]
+
+    def suggest(client, i):
+        return client.get('/api/ingredients', params={'query': queries[i % len(queries)]})
+
+    def generate(client, i):
+        # Unique ingredients per request so the recipe cache never answers
+        return client.post('/api/generate-recipe',
+                           json={"ingredients": [f"ingredient {run_id}-{i}", "rice"]})
+
+    return [('suggest', suggest, 'suggest_concurrency'),
+            ('generate', generate, 'generate_concurrency')]
+
+
+def main():
+    """
+    Run each endpoint against each worker class and print one line per pair.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--worker-classes', nargs='+', default=['gevent', 'gthread', 'sync'])
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Workers per server (default: the profile's choice)")
+    # Suggestions take about a millisecond, so a few connections saturate a core; generations
+    # wait on the model and need many in flight
+    parser.add_argument('--suggest-concurrency', type=int, default=8)
+    parser.add_argument('--generate-concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--latency', type=float, default=0.5,
+                        help="Fake model time to first token (s)")
+    args = parser.parse_args()
+    cores = min(args.workers or multiprocessing.cpu_count(), multiprocessing.cpu_count())
+
+    print(f"{'worker':>8} {'endpoint':>9} {'reqs':>6} {'req/s':>8} {'req/s/core':>10} "
+          f"{'p50 ms':>8} {'p99 ms':>8} {'errors':>6}")
+    for run_id, worker_class in enumerate(args.worker_classes):
+        port = free_port()
+        process = start_profile(worker_class, args.workers, port, args.latency)
+        try:
+            for name, make_request, concurrency in endpoints(run_id):
+                count, elapsed, latencies, errors = run_endpoint(
+                    f'http://127.0.0.1:{port}', make_request, getattr(args, concurrency),
+                    args.duration)
+                rate = count / elapsed
+                print(f"{worker_class:>8} {name:>9} {count:>6} {rate:>8.1f} "
+                      f"{rate / cores:>10.1f} {percentile(latencies, 0.5) * 1e3:>8.1f} "
+                      f"{percentile(latencies, 0.99) * 1e3:>8.1f} {errors:>6}")
+        finally:
+            stop_server(process)
+
+
+if __name__ == '__main__':
+    main()
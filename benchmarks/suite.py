@@ -0,0 +1,244 @@
+"""
+End-to-end benchmark suite: every endpoint through the Flask app with the fake model,
+checked against a stored JSON baseline so a performance regression fails the run.
+
+It measures /api/ingredients latency for catalogs of 100 to 1M entries, the overhead
+each endpoint adds on top of model latency (fake model answering instantly), and the
+throughput of concurrent generations against a fake model with a configurable latency.
+
+Run from the repository root:
+
+    python benchmarks/suite.py                  # compare with benchmarks/baseline.json
+    python benchmarks/suite.py --save-baseline  # record this machine's baseline
+    python benchmarks/suite.py --sizes 100 10000 --tolerance 0.5
+
+Exits with status 1 if any metric is worse than the baseline by more than the tolerance.
+Baselines are machine-specific; record one on the machine that runs the comparison.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# pylint: disable=wrong-import-position
+from bench_ingredients import make_catalog
+from bench_suggest import QUERIES
+from website import create_app
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SIZES = [100, 10000, 100000, 1000000]
+
+
+class Results:
+    """
+    Named measurements, each with a unit and whether lower or higher is better.
+
+    Ungated metrics (tail latencies, too noisy over a few hundred samples) are
+    reported against the baseline but never fail the run.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, name, value, unit, *, better="lower", gated=True): # pylint: disable=too-many-arguments
+        """
+        Record one metric and print it.
+        """
+        self.metrics[name] = {"value": round(value, 3), "unit": unit, "better": better,
+                              "gated": gated}
+        print(f"  {name:<40} {value:>12.1f} {unit}")
+
+    def latency(self, name, samples):
+        """
+        Record the median and 99th percentile of samples given in seconds, in microseconds.
+        """
+        ordered = sorted(samples)
+        self.add(f"{name}.p50", statistics.median(ordered) * 1e6, "us")
+        self.add(f"{name}.p99", ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))] * 1e6,
+                 "us", gated=False)
+
+
+def timed(request, repeat):
+    """
+    Return the durations in seconds of repeat calls of request(i).
+    """
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        request(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_suggestions(results, sizes, repeat):
+    """
+    Time index builds and /api/ingredients requests for each catalog size.
+    """
+    for size in sizes:
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(make_catalog(size), f)
+        try:
+            start = time.perf_counter()
+            app = create_app({'INGREDIENTS_PATH': f.name, 'INGREDIENTS_RELOAD_INTERVAL': 0,
+                              'LLM_BACKEND': 'fake'})
+            results.add(f"ingredients.build@{size}", (time.perf_counter() - start) * 1e3, "ms")
+        finally:
+            os.unlink(f.name)
+        client = app.test_client()
+        urls = [f'/api/ingredients?query={query}' for query in QUERIES]
+        for url in urls:
+            client.get(url)
+        samples = timed(lambda i, client=client, urls=urls: client.get(urls[i % len(urls)]),
+                        repeat * len(urls))
+        results.latency(f"ingredients@{size}", samples)
+
+
+def bench_overhead(results, repeat):
+    """
+    Time every endpoint with a model that answers instantly, so only app overhead remains.
+    """
+    app = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0,
+                      'INGREDIENTS_RELOAD_INTERVAL': 0,
+                      'JOB_DB': os.path.join(tempfile.mkdtemp(), 'jobs.sqlite3')})
+    client = app.test_client()
+    catalog_url = '/api/ingredients/catalog'
+    serial = itertools.count()
+
+    def body():
+        # Unique ingredients so every request misses the cache and reaches the model
+        return {'ingredients': [f"ingredient {next(serial)}", "rice"]}
+
+    endpoints = {
+        "home": lambda i: client.get('/'),
+        "catalog": lambda i: client.get(catalog_url, headers={'Accept-Encoding': 'gzip'}),
+        "generate.miss": lambda i: client.post('/api/generate-recipe', json=body()),
+        "generate.hit": lambda i: client.post('/api/generate-recipe',
+                                              json={'ingredients': ["Rice"]}),
+        "stream": lambda i: client.post('/api/generate-recipe/stream', json=body()).get_data(),
+        "similar": lambda i: client.post('/api/similar-recipes', json=body()),
+        "bundle": lambda i: client.post('/api/recipe-bundle', json=body()),
+        "batch.10": lambda i: client.post(
+            '/api/generate-recipe/batch',
+            data="\n".join(json.dumps(body()) for _ in range(10))).get_data(),
+        "jobs.submit": lambda i: client.post('/api/jobs', json=body()),
+        "metrics": lambda i: client.get('/metrics'),
+    }
+    for name, request in endpoints.items():
+        request(0)
+        results.latency(f"overhead.{name}", timed(request, repeat))
+
+
+def bench_throughput(results, latency, concurrency, duration):
+    """
+    Measure generations per second with concurrency clients and a fake model of latency.
+    """
+    app = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': latency,
+                      'INGREDIENTS_RELOAD_INTERVAL': 0, 'GENERATION_THREADS': concurrency})
+    serial = itertools.count()
+    stop_at = time.perf_counter() + duration
+    lock = threading.Lock()
+    completed = []
+
+    def client_loop():
+        client = app.test_client()
+        count = 0
+        while time.perf_counter() < stop_at:
+            response = client.post('/api/generate-recipe',
+                                   json={'ingredients': [f"ingredient {next(serial)}"]})
+            count += response.status_code == 200
+        with lock:
+            completed.append(count)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client_loop)
+    elapsed = time.perf_counter() - start
+    results.add(f"throughput.generate@{concurrency}x{latency}s", sum(completed) / elapsed,
+                "req/s", better="higher")
+    # With no overhead, each client completes one request per model latency
+    results.add(f"throughput.efficiency@{concurrency}x{latency}s",
+                sum(completed) / elapsed / (concurrency / latency) * 100, "%", better="higher")
+
+
+def compare(metrics, baseline, tolerance):
+    """
+    Print each metric against the baseline and return the names of regressed metrics.
+    """
+    regressions = []
+    print(f"\n{'metric':<42} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, metric in metrics.items():
+        reference = baseline.get(name)
+        if reference is None or not reference["value"]:
+            print(f"{name:<42} {'-':>12} {metric['value']:>12.1f}      new")
+            continue
+        change = metric["value"] / reference["value"] - 1
+        worse = change > tolerance if metric["better"] == "lower" else change < -tolerance
+        if worse and metric["gated"]:
+            regressions.append(name)
+        flag = ('  REGRESSION' if metric["gated"] else '  (not gated)') if worse else ''
+        print(f"{name:<42} {reference['value']:>12.1f} {metric['value']:>12.1f} "
+              f"{change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    """
+    Run the suite, then save it as the baseline or compare against the stored one.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--repeat', type=int, default=50,
+                        help="Requests per measured endpoint (per query for suggestions)")
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help="Fake model latency for the throughput test (s)")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help="Allowed relative slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    results = Results()
+    print("suggestions")
+    bench_suggestions(results, args.sizes, args.repeat)
+    print("endpoint overhead")
+    bench_overhead(results, args.repeat)
+    print("throughput")
+    bench_throughput(results, args.latency, args.concurrency, args.duration)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "metrics": results.metrics}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nSaved baseline to {args.baseline}")
+        return
+
+    try:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)["metrics"]
+    except FileNotFoundError:
+        sys.exit(f"No baseline at {args.baseline}; run with --save-baseline first")
+    regressions = compare(results.metrics, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed by more than {args.tolerance:.0%}: "
+              f"{', '.join(regressions)}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Gunicorn settings for serving the Recipe Generator.
+
+The app is loaded once in the master and workers are forked from it, so the
+ingredient index and the imported provider SDK are shared copy-on-write and
+a worker starts in milliseconds. Settings follow the worker model: gevent
+(the default) keeps thousands of multi-second generations in flight per
+worker, so one worker per core is enough; sync and gthread workers hold a
+process or thread per in-flight generation and need more of them.
+
+GUNICORN_WORKER_CLASS, GUNICORN_WORKERS and GUNICORN_THREADS override the
+choices below, as does any command-line flag. The worker class is resolved
+here the way gunicorn will resolve it, from --worker-class (on the command
+line or in GUNICORN_CMD_ARGS) before the environment, so the patching and
+sizing below always match the workers that actually run.
+"""
+
+# gunicorn reads its settings from these lowercase module globals
+# pylint: disable=invalid-name
+
+import multiprocessing
+import os
+import shlex
+import sys
+
+from gunicorn.config import Config
+
+
+def _command_line_worker_class():
+    """
+    Return the --worker-class gunicorn was started with, or None if not given.
+    """
+    parser = Config().parser()
+    value = None
+    # Later sources win, as in gunicorn: GUNICORN_CMD_ARGS, then the command line
+    for args in (shlex.split(os.environ.get('GUNICORN_CMD_ARGS', '')), sys.argv[1:]):
+        value = parser.parse_known_args(args)[0].worker_class or value
+    return value
+
+
+worker_class = (_command_line_worker_class()
+                or os.environ.get('GUNICORN_WORKER_CLASS', 'gevent'))
+
+if worker_class == 'gevent':
+    # Patch in the master, before the preloaded app creates any lock, thread pool or
+    # socket, so the app sizes itself for greenlets and workers inherit patched objects
+    from gevent import monkey
+    monkey.patch_all()
+
+_cores = multiprocessing.cpu_count()
+_default_workers = _cores if worker_class in ('gevent', 'gthread') else 2 * _cores + 1
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+preload_app = True
+workers = int(os.environ.get('GUNICORN_WORKERS', _default_workers))
+threads = int(os.environ.get('GUNICORN_THREADS', 32 if worker_class == 'gthread' else 1))
+worker_connections = 1000
+
+# A generation may take up to FLASK_LLM_DEADLINE seconds including retries; give it
+# that plus a margin before a silent worker is killed, and let it finish on reload
+_deadline = float(os.environ.get('FLASK_LLM_DEADLINE', 45.0))
+timeout = int(_deadline + 15)
+graceful_timeout = timeout
+
+# Longer than common load balancer idle timeouts (60s) so the proxy closes idle
+# connections first; sync workers do not keep connections alive
+keepalive = 75
+
+
+def when_ready(server):
+    """
+    Import the provider SDK in the master so every worker shares it.
+    """
+    server.app.wsgi().extensions['llm'].warm_up()
+
+
+def post_fork(server, worker): # pylint: disable=unused-argument
+    """
+    Restart per-process state in each new worker.
+    """
+    from website.serving import post_fork as restore_worker # pylint: disable=import-outside-toplevel
+    restore_worker(server.app.wsgi())
@@ -0,0 +1,62 @@
+"""
+Functional tests for the batch generation endpoint and command.
+"""
+
+import json
+from website import create_app # pylint: disable=import-error
+
+def test_batch_endpoint_streams_results_and_summary():
+    """
+    Test that the batch endpoint returns one JSON line per item and a summary line.
+    """
+    client = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0}).test_client()
+    body = '["Rice"]\n\n{"id": "b", "ingredients": ["Tofu", "Egg"]}\n'
+    response = client.post('/api/generate-recipe/batch', data=body,
+                           content_type='application/x-ndjson')
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted(line["id"] for line in lines[:-1]) == ["1", "b"]
+    assert all(line["recipe"]["title"] == "Fake Stir Fry" for line in lines[:-1])
+    assert lines[-1]["event"] == "summary"
+    assert lines[-1]["completed"] == 2
+    assert lines[-1]["output_tokens"] > 0
+
+    response = client.post('/api/generate-recipe/batch', data='{"bad": 1}')
+    assert response.status_code == 400
+
+def test_batch_command_resumes_from_output(tmp_path):
+    """
+    Test that generate-batch appends results and skips ids already completed.
+    """
+    input_path = tmp_path / "lists.jsonl"
+    output_path = tmp_path / "recipes.jsonl"
+    input_path.write_text('["Rice"]\n["Tofu"]\n["Egg"]\n')
+    output_path.write_text(json.dumps({"id": "1", "recipe": {"title": "Done"}}) + "\n"
+                           + '{"id": "2", "rec')  # a line cut short by a crash
+    app = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0})
+    with app.app_context():
+        result = app.test_cli_runner().invoke(args=['generate-batch', str(input_path),
+                                                    str(output_path), '--concurrency', '2'])
+    assert result.exit_code == 0, result.output
+    assert "Generated 2 recipes (0 failed, 1 already done)" in result.output
+    assert "recipes/min" in result.output
+    ids = [json.loads(line)["id"] for line in output_path.read_text().splitlines()
+           if line.endswith("}") and "recipe\"" in line]
+    assert sorted(ids) == ["1", "2", "3"]
+
+def test_batch_items_are_charged_to_the_caller():
+    """
+    Test that batch items missing the cache count against the submitting client's rate limit.
+    """
+    client = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0,
+                         'ADMISSION_CLIENT_RATE': 0.001, 'ADMISSION_CLIENT_BURST': 2,
+                         'BATCH_CONCURRENCY': 1}).test_client()
+    response = client.post('/api/generate-recipe/batch', data='["Rice"]\n["Tofu"]\n["Egg"]\n')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines[-1]["completed"] == 2
+    assert lines[-1]["failed"] == 1
+    assert lines[2]["error"] == "Too many recipe requests, please retry shortly"
+
+    # A repeated item is served from the cache without using up the limit
+    response = client.post('/api/generate-recipe/batch', data='["Rice"]\n')
+    assert "recipe" in json.loads(response.get_data(as_text=True).splitlines()[0])
@@ -0,0 +1,51 @@
+"""
+Functional tests for the background generation job endpoints.
+"""
+
+import json
+from website import create_app # pylint: disable=import-error
+
+def test_job_submit_poll_and_result(tmp_path):
+    """
+    Test that a job is accepted at once, runs in the background and can be long-polled.
+    """
+    client = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0.2,
+                         'JOB_DB': str(tmp_path / "jobs.sqlite3")}).test_client()
+    response = client.post('/api/jobs', json={'ingredients': ["Rice", "Egg"]})
+    assert response.status_code == 202
+    job = json.loads(response.data)
+    assert job["status"] == "queued"
+    assert response.headers['Location'] == job["url"]
+
+    pending = client.get(f'/api/jobs/{job["id"]}/result')
+    assert pending.status_code == 202
+    assert json.loads(pending.data)["status"] in ("queued", "running")
+
+    finished = json.loads(client.get(f'{job["url"]}?wait=10').data)
+    assert finished["status"] == "done"
+    assert finished["result"]["title"] == "Fake Stir Fry"
+    result = client.get(f'/api/jobs/{job["id"]}/result')
+    assert json.loads(result.data)["title"] == "Fake Stir Fry"
+
+    assert client.get('/api/jobs/unknown').status_code == 404
+    assert client.post('/api/jobs', json={'ingredients': []}).status_code == 400
+    assert client.post('/api/jobs', json={'ingredients': ["Rice"], 'kind': 'x'}).status_code == 400
+    text = client.get('/metrics').get_data(as_text=True)
+    assert "job_completed_total 1" in text
+    assert 'request_stage_duration_seconds_count{stage="job_run"} 1' in text
+
+def test_job_submit_is_rate_limited(tmp_path):
+    """
+    Test that rate limits are charged when a job is submitted and not again when it runs.
+    """
+    client = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0,
+                         'ADMISSION_RATE': 0.001, 'ADMISSION_BURST': 1,
+                         'JOB_DB': str(tmp_path / "jobs.sqlite3")}).test_client()
+    accepted = client.post('/api/jobs', json={'ingredients': ["Rice"]})
+    assert accepted.status_code == 202
+    rejected = client.post('/api/jobs', json={'ingredients': ["Tofu"]})
+    assert rejected.status_code == 429
+    assert int(rejected.headers['Retry-After']) >= 1
+
+    finished = json.loads(client.get(f'{json.loads(accepted.data)["url"]}?wait=10').data)
+    assert finished["status"] == "done"
@@ -2,7 +2,17 @@
 Functional tests for the Recipe Generator application views.
 """
 
+import gzip
 import json
+import threading
+import time
+from website import create_app # pylint: disable=import-error
+
+def _recipe(title):
+    """A minimal recipe with every field the frontend renders."""
+    return {"title": title, "description": "A test recipe", "ingredients": ["Ingredient 1"],
+            "instructions": ["Step 1"], "cook_time": "30 minutes", "servings": 2,
+            "difficulty": "Easy"}
 
 def test_home_route(test_client):
     """
@@ -257,8 +267,9 @@ def test_ingredient_suggestions_api_failure(mocker, recipe_api_mock_client):
     """
     Test behavior when the ingredient suggestions API fails.
     """
-    # Mock the open function to raise an exception
-    mocker.patch('builtins.open', side_effect=Exception("File not found"))
+    # Make the in-memory index lookup raise an exception
+    mocker.patch('website.ingredients.IngredientIndex.suggest',
+                 side_effect=Exception("Index error"))
 
     response = recipe_api_mock_client.get('/api/ingredients?query=chicken')
     assert response.status_code == 500  # Your API should return 500 on error
@@ -266,6 +277,69 @@ def test_ingredient_suggestions_api_failure(mocker, recipe_api_mock_client):
     data = json.loads(response.data)
     assert "error" in data
 
+def test_ingredient_suggestions_missing_catalog():
+    """
+    Test that a missing ingredients file returns a 404 instead of suggestions.
+    """
+    flask_app = create_app({'INGREDIENTS_PATH': 'does/not/exist.json'})
+    response = flask_app.test_client().get('/api/ingredients?query=chicken')
+    assert response.status_code == 404
+    data = json.loads(response.data)
+    assert data["error"] == "Ingredients file not found"
+
+def test_ingredient_suggestions_catalog_order(test_client):
+    """
+    Test that substring matches are returned in catalog order and capped at 10.
+    """
+    response = test_client.get('/api/ingredients?query=chicken')
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data[:2] == ["Chicken Breast", "Chicken Thigh"]
+
+    response = test_client.get('/api/ingredients?query=an')
+    assert len(json.loads(response.data)) == 10
+
+def test_ingredient_catalog_is_versioned_and_precompressed(test_client):
+    """
+    Test that the catalog is served gzipped with a strong ETag, long-lived when versioned.
+    """
+    page = test_client.get('/').data.decode()
+    url = page.split('data-catalog-url="')[1].split('"')[0]
+    assert url.startswith('/api/ingredients/catalog/')
+
+    response = test_client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'immutable' in response.headers['Cache-Control']
+    assert not response.headers['ETag'].startswith('W/')
+    assert "Chicken Breast" in json.loads(gzip.decompress(response.data))
+
+    plain = test_client.get('/api/ingredients/catalog')
+    assert plain.headers['Cache-Control'] == 'no-cache'
+    assert 'Content-Encoding' not in plain.headers
+    revalidated = test_client.get('/api/ingredients/catalog',
+                                  headers={'If-None-Match': plain.headers['ETag']})
+    assert revalidated.status_code == 304
+
+    stale = test_client.get('/api/ingredients/catalog/0123456789abcdef')
+    assert stale.status_code == 302
+    assert stale.headers['Location'].endswith(url)
+
+def test_ingredient_suggestions_conditional_get(test_client):
+    """
+    Test that suggestions carry a cacheable ETag per query and revalidate with a 304.
+    """
+    response = test_client.get('/api/ingredients?query=chicken')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'public, max-age=300'
+    assert test_client.get('/api/ingredients?query=Chicken%20').headers['ETag'] == etag
+    assert test_client.get('/api/ingredients?query=beef').headers['ETag'] != etag
+
+    revalidated = test_client.get('/api/ingredients?query=chicken',
+                                  headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b""
+
 def test_ingredient_suggestions_special_characters(recipe_api_mock_client):
     """
     Test getting ingredient suggestions with special characters.
@@ -410,3 +484,463 @@ def test_similar_recipes_generic_markdown(mocker, recipe_api_mock_client):
     assert isinstance(data["recipes"], list)
     assert len(data["recipes"]) > 0
     assert data["recipes"][0]["title"] == "Test Recipe 1"
+
+def test_generate_recipe_uses_cache(mocker, recipe_api_mock_client):
+    """
+    Test that reordered or differently cased ingredients are served from the cache.
+    """
+    mock_response = mocker.MagicMock()
+    mock_response.text = json.dumps(_recipe("Cached Recipe"))
+    mock_generate = mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                                 return_value=mock_response)
+
+    first = recipe_api_mock_client.post('/api/generate-recipe',
+                                        json={'ingredients': ["Chicken Breast", "Rice"]})
+    second = recipe_api_mock_client.post('/api/generate-recipe',
+                                         json={'ingredients': ["rice", "chicken breast"]})
+    assert first.status_code == second.status_code == 200
+    assert json.loads(second.data)["title"] == "Cached Recipe"
+    assert mock_generate.call_count == 1
+
+def test_generate_recipe_errors_are_not_cached(mocker, recipe_api_mock_client):
+    """
+    Test that a failed generation is retried on the next request instead of cached.
+    """
+    mock_generate = mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                                 side_effect=Exception("API Error"))
+    for _ in range(2):
+        response = recipe_api_mock_client.post('/api/generate-recipe',
+                                               json={'ingredients': ["Chicken"]})
+        assert response.status_code == 500
+    assert mock_generate.call_count == 2
+
+def _stream_events(response):
+    return [json.loads(line) for line in response.data.decode().splitlines() if line]
+
+def test_generate_recipe_stream_route(mocker, recipe_api_mock_client):
+    """
+    Test that the streaming endpoint sends partial fields before the final recipe.
+    """
+    text = json.dumps({"title": "Test Recipe", "description": "A test recipe",
+                       "ingredients": ["Ingredient 1"], "instructions": ["Step 1"]})
+    chunks = [mocker.MagicMock(text=text[i:i + 7]) for i in range(0, len(text), 7)]
+    mock_generate = mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                                 return_value=chunks)
+
+    response = recipe_api_mock_client.post('/api/generate-recipe/stream',
+                                           json={'ingredients': ["Chicken Breast"]})
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert mock_generate.call_args.kwargs["stream"] is True
+
+    events = _stream_events(response)
+    assert events[0] == {"event": "field", "field": "title", "value": "Test Recipe"}
+    assert {"event": "item", "field": "instructions", "value": "Step 1"} in events
+    assert events[-1]["event"] == "done"
+    assert events[-1]["recipe"]["title"] == "Test Recipe"
+
+    # The finished recipe is cached for the buffered endpoint as well
+    response = recipe_api_mock_client.post('/api/generate-recipe',
+                                           json={'ingredients': ["chicken breast"]})
+    assert json.loads(response.data)["title"] == "Test Recipe"
+    assert mock_generate.call_count == 1
+
+def test_generate_recipe_stream_sends_title_first(mocker, recipe_api_mock_client):
+    """
+    Test that streamed fields come in display order, not JSON mode's alphabetical order.
+    """
+    def generate(_prompt, generation_config, **_kwargs):
+        # Like Gemini: JSON mode sorts the properties, a prose prompt keeps its example's order
+        json_mode = getattr(generation_config, "response_schema", None) is not None
+        text = json.dumps(_recipe("Test Recipe"), sort_keys=json_mode)
+        return [mocker.MagicMock(text=text[i:i + 7]) for i in range(0, len(text), 7)]
+    mocker.patch('google.generativeai.GenerativeModel.generate_content', side_effect=generate)
+
+    response = recipe_api_mock_client.post('/api/generate-recipe/stream',
+                                           json={'ingredients': ["Chicken Breast"]})
+    fields = [event["field"] for event in _stream_events(response) if event["event"] == "field"]
+    assert fields[:2] == ["title", "description"]
+
+def test_generate_recipe_stream_error_event(mocker, recipe_api_mock_client):
+    """
+    Test that an invalid streamed response ends with an error event.
+    """
+    mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                 return_value=[mocker.MagicMock(text="error data")])
+
+    response = recipe_api_mock_client.post('/api/generate-recipe/stream',
+                                           json={'ingredients': ["InvalidIngredient"]})
+    assert response.status_code == 200
+    events = _stream_events(response)
+    assert events[-1]["event"] == "error"
+
+def test_generate_recipe_stream_empty_ingredients(recipe_api_mock_client):
+    """
+    Test that the streaming endpoint validates input like the buffered one.
+    """
+    response = recipe_api_mock_client.post('/api/generate-recipe/stream',
+                                           json={'ingredients': []})
+    assert response.status_code == 400
+
+def test_generation_rejects_ingredients_that_are_not_a_list_of_strings(recipe_api_mock_client):
+    """
+    Test that every generation endpoint answers a malformed ingredient list with a JSON 400.
+    """
+    for url in ('/api/generate-recipe', '/api/generate-recipe/stream', '/api/similar-recipes',
+                '/api/recipe-bundle', '/api/jobs'):
+        for body in ({'ingredients': 5}, {'ingredients': ["Rice", 5]}, ["Rice"]):
+            response = recipe_api_mock_client.post(url, json=body)
+            assert response.status_code == 400
+            assert json.loads(response.data) == {"error": "ingredients must be a list of strings"}
+
+def _mock_by_prompt(mocker, delay=0.0, fail_similar=False):
+    """Patch generate_content to answer recipe and similar prompts differently."""
+    def generate(prompt, **kwargs): # pylint: disable=unused-argument
+        time.sleep(delay)
+        if "3 different recipe ideas" in prompt:
+            if fail_similar:
+                raise Exception("Similar API Error") # pylint: disable=broad-exception-raised
+            return mocker.MagicMock(text=json.dumps({"recipes": [{"title": "Idea"}]}))
+        return mocker.MagicMock(text=json.dumps(_recipe("Test Recipe")))
+    return mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                        side_effect=generate)
+
+def test_recipe_bundle_runs_prompts_concurrently(mocker, recipe_api_mock_client):
+    """
+    Test that the bundle endpoint returns both results in roughly the time of one call.
+    """
+    mock_generate = _mock_by_prompt(mocker, delay=0.3)
+
+    start = time.perf_counter()
+    response = recipe_api_mock_client.post('/api/recipe-bundle',
+                                           json={'ingredients': ["Chicken", "Rice"]})
+    elapsed = time.perf_counter() - start
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["recipe"]["title"] == "Test Recipe"
+    assert data["similar"]["recipes"][0]["title"] == "Idea"
+    assert mock_generate.call_count == 2
+    assert elapsed < 0.55
+
+def test_recipe_bundle_similar_failure(mocker, recipe_api_mock_client):
+    """
+    Test that a similar-recipes failure does not fail the main recipe.
+    """
+    _mock_by_prompt(mocker, fail_similar=True)
+    response = recipe_api_mock_client.post('/api/recipe-bundle',
+                                           json={'ingredients': ["Chicken"]})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["recipe"]["title"] == "Test Recipe"
+    assert data["similar"] is None
+    assert data["similar_error"] == "Similar API Error"
+
+def test_recipe_bundle_recipe_failure(mocker, recipe_api_mock_client):
+    """
+    Test that a main recipe failure returns a 500 like the single endpoint.
+    """
+    mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                 side_effect=Exception("API Error"))
+    response = recipe_api_mock_client.post('/api/recipe-bundle',
+                                           json={'ingredients': ["Chicken"]})
+    assert response.status_code == 500
+    assert json.loads(response.data)["error"] == "API Error"
+
+def test_generate_recipe_stream_include_similar(mocker, recipe_api_mock_client):
+    """
+    Test that the streaming endpoint can carry the similar recipes as a final event.
+    """
+    def generate(_prompt, **kwargs):
+        if kwargs.get("stream"):
+            return [mocker.MagicMock(text=json.dumps(_recipe("Test Recipe")))]
+        return mocker.MagicMock(text=json.dumps({"recipes": [{"title": "Idea"}]}))
+    mocker.patch('google.generativeai.GenerativeModel.generate_content', side_effect=generate)
+
+    response = recipe_api_mock_client.post('/api/generate-recipe/stream',
+                                           json={'ingredients': ["Chicken"],
+                                                 'include_similar': True})
+    events = _stream_events(response)
+    assert [event["event"] for event in events].count("done") == 1
+    assert {"event": "similar", "value": {"recipes": [{"title": "Idea"}]}} in events
+
+def test_generate_recipe_with_fake_backend():
+    """
+    Test the full request path offline with the fake LLM backend.
+    """
+    flask_app = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0})
+    client = flask_app.test_client()
+    response = client.post('/api/recipe-bundle', json={'ingredients': ["Rice"]})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["recipe"]["title"] == "Fake Stir Fry"
+    assert len(data["similar"]["recipes"]) == 3
+
+def test_concurrent_identical_requests_are_coalesced(mocker):
+    """
+    Test that simultaneous requests for the same ingredients trigger one model call.
+    """
+    flask_app = create_app()
+    mock_generate = _mock_by_prompt(mocker, delay=0.3)
+    statuses = []
+
+    def post(ingredients):
+        with flask_app.test_client() as client:
+            response = client.post('/api/generate-recipe', json={'ingredients': ingredients})
+            statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=post, args=(names,))
+               for names in (["Rice", "Egg"], ["egg", "rice"], ["RICE", "Egg"])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert statuses == [200, 200, 200]
+    assert mock_generate.call_count == 1
+    assert flask_app.extensions['single_flight'].stats()["coalesced"] == 2
+
+def test_generate_recipe_surrounding_prose(mocker, recipe_api_mock_client):
+    """
+    Test that JSON wrapped in explanatory text is still accepted.
+    """
+    mock_response = mocker.MagicMock()
+    mock_response.text = ("Here is a recipe you might like:\n```json\n"
+                          + json.dumps(_recipe("Prose Recipe")) + "\n```\nEnjoy your meal!")
+    mocker.patch('google.generativeai.GenerativeModel.generate_content', return_value=mock_response)
+
+    response = recipe_api_mock_client.post('/api/generate-recipe',
+                                           json={'ingredients': ["Chicken"]})
+    assert response.status_code == 200
+    assert json.loads(response.data)["title"] == "Prose Recipe"
+
+def test_generate_recipe_incomplete_recipe(mocker, recipe_api_mock_client):
+    """
+    Test that a recipe missing required fields is rejected rather than cached.
+    """
+    mock_response = mocker.MagicMock()
+    mock_response.text = json.dumps({"title": "No Steps", "description": "Missing fields"})
+    mocker.patch('google.generativeai.GenerativeModel.generate_content', return_value=mock_response)
+
+    response = recipe_api_mock_client.post('/api/generate-recipe',
+                                           json={'ingredients': ["Chicken"]})
+    assert response.status_code == 500
+    assert "ingredients" in json.loads(response.data)["error"]
+
+def test_generate_recipe_uses_json_mode(mocker, recipe_api_mock_client):
+    """
+    Test that Gemini is asked for JSON output with a schema and a compact prompt.
+    """
+    mock_generate = mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                                 return_value=mocker.MagicMock(text=json.dumps(_recipe("R"))))
+    recipe_api_mock_client.post('/api/generate-recipe', json={'ingredients': ["Chicken"]})
+
+    prompt = mock_generate.call_args.args[0]
+    config = mock_generate.call_args.kwargs["generation_config"]
+    assert config.response_mime_type == "application/json"
+    assert "instructions" in config.response_schema["properties"]
+    assert "valid JSON format" not in prompt
+
+def test_generate_recipe_prose_json_mode(mocker):
+    """
+    Test that STRUCTURED_OUTPUT=False falls back to describing the JSON in the prompt.
+    """
+    mock_generate = mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                                 return_value=mocker.MagicMock(text=json.dumps(_recipe("R"))))
+    client = create_app({'STRUCTURED_OUTPUT': False}).test_client()
+    response = client.post('/api/generate-recipe', json={'ingredients': ["Chicken"]})
+    assert response.status_code == 200
+
+    config = mock_generate.call_args.kwargs["generation_config"]
+    assert config.response_schema is None
+    assert "valid JSON format" in mock_generate.call_args.args[0]
+
+def test_open_circuit_serves_stale_recipe_or_503(mocker):
+    """
+    Test that an open circuit fails fast, serving an expired recipe when one is cached.
+    """
+    mock_generate = mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                                 return_value=mocker.MagicMock(text=json.dumps(_recipe("Kept"))))
+    client = create_app({'CIRCUIT_BREAKER_THRESHOLD': 1, 'LLM_RETRIES': 0,
+                         'RECIPE_CACHE_TTL': 0}).test_client()
+    assert client.post('/api/generate-recipe', json={'ingredients': ["Rice"]}).status_code == 200
+
+    mock_generate.side_effect = TimeoutError("Request timed out")
+    response = client.post('/api/generate-recipe', json={'ingredients': ["Tofu"]})
+    assert response.status_code == 500
+    calls = mock_generate.call_count
+
+    response = client.post('/api/generate-recipe', json={'ingredients': ["Rice"]})
+    assert response.status_code == 200
+    assert json.loads(response.data)["title"] == "Kept"
+
+    response = client.post('/api/generate-recipe', json={'ingredients': ["Tofu"]})
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) > 0
+    assert mock_generate.call_count == calls
+
+def test_generate_recipe_passes_request_timeout(mocker, recipe_api_mock_client):
+    """
+    Test that the configured per-attempt timeout reaches the Gemini SDK.
+    """
+    mock_generate = mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                                 return_value=mocker.MagicMock(text=json.dumps(_recipe("R"))))
+    recipe_api_mock_client.post('/api/generate-recipe', json={'ingredients': ["Chicken"]})
+    assert 0 < mock_generate.call_args.kwargs["request_options"]["timeout"] <= 20
+
+def test_generation_rate_limit_returns_429(mocker):
+    """
+    Test that a client over its rate limit gets a fast 429 while cached answers still flow.
+    """
+    mock_generate = mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                                 return_value=mocker.MagicMock(text=json.dumps(_recipe("R"))))
+    client = create_app({'ADMISSION_CLIENT_RATE': 0.01, 'ADMISSION_CLIENT_BURST': 1}).test_client()
+    assert client.post('/api/generate-recipe', json={'ingredients': ["Rice"]}).status_code == 200
+
+    response = client.post('/api/similar-recipes', json={'ingredients': ["Rice"]})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert mock_generate.call_count == 1
+
+    assert client.post('/api/generate-recipe', json={'ingredients': ["Rice"]}).status_code == 200
+
+def test_client_limit_uses_forwarded_address_behind_trusted_proxy(mocker):
+    """
+    Test that clients behind a trusted proxy are rate limited by their own addresses.
+    """
+    mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                 return_value=mocker.MagicMock(text=json.dumps(_recipe("R"))))
+    client = create_app({'ADMISSION_CLIENT_RATE': 0.01, 'ADMISSION_CLIENT_BURST': 1,
+                         'TRUSTED_PROXY_HOPS': 1}).test_client()
+
+    def generate(address, ingredient):
+        return client.post('/api/generate-recipe', json={'ingredients': [ingredient]},
+                           headers={'X-Forwarded-For': address}).status_code
+
+    assert generate("203.0.113.1", "Rice") == 200
+    assert generate("203.0.113.1", "Tofu") == 429
+    assert generate("203.0.113.2", "Tofu") == 200
+
+def test_stream_releases_upstream_slot(mocker):
+    """
+    Test that the streaming endpoint gives its upstream slot back when the response closes.
+    """
+    mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                 return_value=[mocker.MagicMock(text=json.dumps(_recipe("R")))])
+    app = create_app({'UPSTREAM_CONCURRENCY': 1, 'UPSTREAM_QUEUE_SIZE': 0})
+    client = app.test_client()
+    for ingredient in ("Rice", "Tofu"):
+        response = client.post('/api/generate-recipe/stream', json={'ingredients': [ingredient]})
+        assert response.status_code == 200
+        response.get_data()
+        response.close()
+    assert app.extensions['admission'].stats()["in_flight"] == 0
+
+def test_metrics_endpoint_reports_requests_and_stages(mocker):
+    """
+    Test that /metrics exposes request, stage, token, cache and error metrics.
+    """
+    usage = mocker.MagicMock(prompt_token_count=30, candidates_token_count=120)
+    mock_generate = mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                                 return_value=mocker.MagicMock(text=json.dumps(_recipe("R")),
+                                                               usage_metadata=usage))
+    client = create_app().test_client()
+    client.get('/api/ingredients?query=chi')
+    client.post('/api/generate-recipe', json={'ingredients': ["Rice"]})
+    client.post('/api/generate-recipe', json={'ingredients': ["Rice"]})
+    mock_generate.side_effect = TimeoutError("Request timed out")
+    client.post('/api/similar-recipes', json={'ingredients': ["Rice"]})
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert ('http_requests_total{endpoint="main.generate_recipe",method="POST",status="200"} 2'
+            in text)
+    assert 'http_request_duration_seconds_count{endpoint="main.get_ingredients"} 1' in text
+    assert 'request_stage_duration_seconds_count{stage="upstream"} 2' in text
+    assert 'llm_tokens_total{kind="recipe",direction="output"} 120' in text
+    assert 'generation_errors_total{error="TimeoutError"} 1' in text
+    assert "recipe_cache_hit_ratio 0.333" in text
+    assert "http_requests_in_flight 1" in text
+
+def test_similar_recipes_served_from_precomputed_store(mocker, tmp_path):
+    """
+    Test that precompute-recipes fills the store and close sets are answered without the model.
+    """
+    store_path = tmp_path / "store.jsonl"
+    sets_path = tmp_path / "sets.txt"
+    sets_path.write_text("Tomato,Basil,Garlic,Pasta\n"
+                         "[\"Pasta\", \"Garlic\", \"Basil\", \"Tomato\"]\n")
+    config = {'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0, 'RECIPE_STORE_PATH': str(store_path)}
+
+    app = create_app(config)
+    with app.app_context():
+        result = app.test_cli_runner().invoke(args=['precompute-recipes', str(sets_path)])
+    assert "Stored 1 ingredient sets (0 failed)" in result.output
+    assert len(store_path.read_text().splitlines()) == 1
+
+    app = create_app(config)
+    generate = mocker.patch.object(app.extensions['llm'], 'generate')
+    response = app.test_client().post('/api/similar-recipes', json={
+        'ingredients': ["Tomato", "Basil", "Garlic", "Pasta", "Parmesan"]})
+    assert response.status_code == 200
+    assert json.loads(response.data)["recipes"][0]["title"] == "Fake Recipe Idea 1"
+    generate.assert_not_called()
+
+def test_large_responses_are_compressed():
+    """
+    Test that JSON above the size threshold is gzipped only for clients that accept it.
+    """
+    client = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0,
+                         'COMPRESS_MIN_SIZE': 100}).test_client()
+    body = {'ingredients': ["Rice", "Egg"]}
+    response = client.post('/api/generate-recipe', json=body,
+                           headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data))["title"] == "Fake Stir Fry"
+
+    plain = client.post('/api/generate-recipe', json=body)
+    assert 'Content-Encoding' not in plain.headers
+    assert json.loads(plain.data)["title"] == "Fake Stir Fry"
+
+    small = client.get('/api/ingredients?query=zz', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers
+    stream = client.post('/api/generate-recipe/stream', json=body,
+                         headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in stream.headers
+
+def test_spellings_of_one_ingredient_set_share_a_generation():
+    """
+    Test that differently typed requests for the same ingredients hit one cached recipe.
+    """
+    client = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0}).test_client()
+    client.post('/api/generate-recipe', json={'ingredients': ["Tomatoes", "rice"]})
+    client.post('/api/generate-recipe', json={'ingredients': ["rice", "roma tomato", "Rice"]})
+    assert "recipe_cache_hits_total 1" in client.get('/metrics').get_data(as_text=True)
+    response = client.post('/api/generate-recipe', json={'ingredients': ["", "123"]})
+    assert response.status_code == 400
+
+def test_admin_can_profile_a_request(tmp_path):
+    """
+    Test that an admin-marked request is profiled to a per-endpoint flamegraph file and traced.
+    """
+    client = create_app({'LLM_BACKEND': 'fake', 'FAKE_LLM_LATENCY': 0.05,
+                         'PROFILE_ADMIN_TOKEN': "s3cret", 'PROFILE_INTERVAL': 0.001,
+                         'PROFILE_DIR': str(tmp_path)}).test_client()
+    admin = {'X-Admin-Token': "s3cret"}
+    client.post('/api/generate-recipe', json={'ingredients': ["Rice"]},
+                headers={**admin, 'X-Profile': '1'})
+    client.post('/api/generate-recipe', json={'ingredients': ["Egg"]})
+
+    assert client.get('/admin/slow-requests').status_code == 404
+    (trace,) = json.loads(client.get('/admin/slow-requests', headers=admin).data)
+    assert trace["endpoint"] == "main.generate_recipe" and trace["profiled"]
+    assert trace["upstream_seconds"] >= 0.05
+    assert "serialize" in trace["stages"]
+
+    profiles = json.loads(client.get('/admin/profiles', headers=admin).data)
+    assert [profile["name"] for profile in profiles] == ["main.generate_recipe.folded"]
+    folded = client.get('/admin/profiles/main.generate_recipe.folded', headers=admin)
+    assert "generate_recipe (views.py:" in folded.get_data(as_text=True)
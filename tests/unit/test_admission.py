@@ -0,0 +1,91 @@
+"""
+Unit tests for rate limiting and upstream admission control.
+"""
+
+import threading
+import pytest
+from website.admission import ( # pylint: disable=import-error
+    AdmissionController, AdmissionLimits, AdmissionRejected, TokenBucket,
+)
+
+def test_token_bucket_refills_at_rate():
+    """
+    Test that a bucket allows a burst, then reports the wait until the next token.
+    """
+    clock = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: clock[0])
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    assert bucket.take() == pytest.approx(0.5)
+    clock[0] = 0.5
+    assert bucket.take() == 0
+
+def test_per_client_limit_is_independent():
+    """
+    Test that one client exhausting its bucket does not limit another.
+    """
+    admission = AdmissionController(AdmissionLimits(client_rate=1, client_burst=1),
+                                    clock=lambda: 0.0)
+    admission.check_rate("10.0.0.1")
+    with pytest.raises(AdmissionRejected) as error:
+        admission.check_rate("10.0.0.1")
+    assert error.value.reason == "client_rate"
+    assert error.value.retry_after == pytest.approx(1.0)
+    admission.check_rate("10.0.0.2")
+    assert admission.stats()["rejected"]["client_rate"] == 1
+
+def test_global_limit_applies_to_everyone():
+    """
+    Test that the shared bucket limits all clients together.
+    """
+    admission = AdmissionController(AdmissionLimits(rate=1, burst=2), clock=lambda: 0.0)
+    admission.check_rate("a")
+    admission.check_rate("b")
+    with pytest.raises(AdmissionRejected, match="Too many"):
+        admission.check_rate("c")
+
+def test_client_over_its_limit_leaves_global_tokens():
+    """
+    Test that a client rejected by its own bucket does not use up the shared bucket.
+    """
+    admission = AdmissionController(AdmissionLimits(rate=1, burst=2, client_rate=1,
+                                                    client_burst=1), clock=lambda: 0.0)
+    admission.check_rate("a")
+    for _ in range(3):
+        with pytest.raises(AdmissionRejected):
+            admission.check_rate("a")
+    admission.check_rate("b")
+    assert admission.stats()["rejected"] == {"global_rate": 0, "client_rate": 3,
+                                             "queue_full": 0, "queue_timeout": 0}
+
+def test_full_queue_rejects_immediately():
+    """
+    Test that callers beyond the slots and the queue are turned away without waiting.
+    """
+    admission = AdmissionController(AdmissionLimits(max_concurrent=1, queue_size=0))
+    with admission.slot():
+        with pytest.raises(AdmissionRejected) as error:
+            admission.acquire()
+        assert error.value.reason == "queue_full"
+    admission.acquire()
+    assert admission.stats()["in_flight"] == 1
+
+def test_queued_caller_times_out_or_gets_slot():
+    """
+    Test that a queued caller waits at most max_wait and proceeds when a slot frees up.
+    """
+    admission = AdmissionController(AdmissionLimits(max_concurrent=1, queue_size=1,
+                                                    max_wait=0.05))
+    admission.acquire()
+    with pytest.raises(AdmissionRejected) as error:
+        admission.acquire()
+    assert error.value.reason == "queue_timeout"
+
+    admission.limits = admission.limits._replace(max_wait=5)
+    timer = threading.Timer(0.05, admission.release)
+    timer.start()
+    admission.acquire()
+    timer.join()
+    stats = admission.stats()
+    assert stats["admitted"] == 2
+    assert stats["waiting"] == 0
@@ -0,0 +1,35 @@
+"""
+Unit tests for batch input parsing and throughput accounting.
+"""
+
+import pytest
+from website.batch import BatchStats, parse_batch_line # pylint: disable=import-error
+from website.llm import Generation # pylint: disable=import-error
+
+def test_parse_batch_line_formats():
+    """
+    Test that bare lists get their line number as id and objects keep theirs.
+    """
+    assert parse_batch_line('["Rice", "Egg"]\n', 3) == {"id": "3", "ingredients": ["Rice", "Egg"]}
+    assert parse_batch_line('{"id": 7, "ingredients": ["Tofu"]}', 1) == {
+        "id": "7", "ingredients": ["Tofu"]}
+    assert parse_batch_line('   \n', 2) is None
+    with pytest.raises(ValueError, match="Line 4"):
+        parse_batch_line('{"items": []}', 4)
+
+def test_batch_stats_summary(mocker):
+    """
+    Test that the summary reports recipes per minute and output tokens per second.
+    """
+    clock = mocker.patch('website.batch.time.monotonic', return_value=100.0)
+    stats = BatchStats()
+    stats.record({"recipe": {}}, [Generation("{}", prompt_tokens=50, output_tokens=300)])
+    stats.record({"recipe": {}}, [])
+    stats.record({"error": "boom"}, [Generation("", prompt_tokens=None, output_tokens=None)])
+    clock.return_value = 110.0
+    summary = stats.summary()
+    assert summary["completed"] == 2
+    assert summary["failed"] == 1
+    assert summary["recipes_per_minute"] == 12.0
+    assert summary["tokens_per_second"] == 30.0
+    assert summary["prompt_tokens"] == 50
@@ -0,0 +1,78 @@
+"""
+Unit tests for the generated recipe cache.
+"""
+
+from website.cache import RecipeCache, cache_key # pylint: disable=import-error
+from website.storage import connect # pylint: disable=import-error
+
+CONFIG = {"temperature": 0.7, "top_p": 0.95, "max_output_tokens": 1000}
+
+def test_cache_key_ignores_order_case_and_duplicates():
+    """
+    Test that equivalent ingredient lists produce the same key.
+    """
+    key = cache_key('recipe', ["Chicken Breast", "rice"], CONFIG)
+    assert key == cache_key('recipe', ["Rice", " chicken  breast", "RICE"], CONFIG)
+    assert key != cache_key('similar', ["Chicken Breast", "rice"], CONFIG)
+    assert key != cache_key('recipe', ["Chicken Breast", "rice"], {**CONFIG, "temperature": 0.2})
+
+def test_memory_tier_lru_and_counters():
+    """
+    Test that the in-memory tier evicts the least recently used entry and counts lookups.
+    """
+    cache = RecipeCache(max_entries=2, ttl=60)
+    cache.set("a", {"title": "A"})
+    cache.set("b", {"title": "B"})
+    assert cache.get("a") == {"title": "A"}
+    cache.set("c", {"title": "C"})
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 2
+
+def test_disk_tier_is_shared_and_expires(tmp_path, mocker):
+    """
+    Test that a second cache on the same SQLite file sees entries until they expire.
+    """
+    db_path = str(tmp_path / "cache.sqlite3")
+    RecipeCache(ttl=60, db_path=db_path).set("key", {"title": "Shared"})
+
+    other = RecipeCache(ttl=60, db_path=db_path)
+    assert other.get("key") == {"title": "Shared"}
+    assert other.stats()["disk_hits"] == 1
+
+    mocker.patch('website.cache.time.time', return_value=10 ** 12)
+    assert RecipeCache(ttl=60, db_path=db_path).get("key") is None
+
+def test_get_stale_returns_expired_entries(tmp_path, mocker):
+    """
+    Test that expired entries are misses for get() but still served by get_stale().
+    """
+    db_path = str(tmp_path / "cache.sqlite3")
+    cache = RecipeCache(ttl=60, db_path=db_path, stale_ttl=3600)
+
+    now = mocker.patch('website.cache.time.time', return_value=10 ** 9)
+    cache.set("key", {"title": "Old"})
+    now.return_value = 10 ** 9 + 120
+    assert cache.get("key") is None
+    assert cache.get_stale("key") == {"title": "Old"}
+    assert RecipeCache(ttl=60, db_path=db_path, stale_ttl=3600).get_stale("key") == {"title": "Old"}
+
+    now.return_value = 10 ** 9 + 7200
+    assert cache.get_stale("key") is None
+
+def test_disk_tier_is_purged_every_few_writes(tmp_path, mocker):
+    """
+    Test that rows too old to serve are deleted as writes go on, not only at startup.
+    """
+    db_path = str(tmp_path / "cache.sqlite3")
+    cache = RecipeCache(ttl=60, db_path=db_path, stale_ttl=60)
+    cache.purge_every = 2
+    now = mocker.patch('website.cache.time.time', return_value=10 ** 9)
+    cache.set("old", {"title": "Old"})
+    now.return_value = 10 ** 9 + 7200
+    cache.set("new", {"title": "New"})
+    with connect(db_path) as db:
+        keys = [key for (key,) in db.execute("SELECT key FROM recipe_cache")]
+    assert keys == ["new"]
@@ -0,0 +1,55 @@
+"""
+Unit tests for ingredient canonicalization.
+"""
+
+import json
+from website.canonical import Canonicalizer, load_aliases # pylint: disable=import-error
+from website.ingredients import IngredientIndex, ingredient_key # pylint: disable=import-error
+
+CATALOG = ["Tomato", "Sun-Dried Tomato", "Chicken Breast", "Eggs", "Basil", "Chickpeas",
+           "Blueberry", "Rice", "Spinach", "Sage", "Salt", "Chives", "Oats", "Milk", "Tuna",
+           "Onion", "Butter", "Batter"]
+
+
+class _Catalog: # pylint: disable=too-few-public-methods
+    index = IngredientIndex(CATALOG)
+
+
+def test_ingredient_key_ignores_case_punctuation_and_plurals():
+    """
+    Test that spellings of one ingredient share a key.
+    """
+    assert ingredient_key("Tomatoes") == ingredient_key(" tomato") == "tomato"
+    assert ingredient_key("Sun-Dried Tomatoes") == "sun dried tomato"
+    assert ingredient_key("Blueberries") == ingredient_key("blueberry")
+    assert ingredient_key("Asparagus") == "asparagus"
+
+def test_canonicalize_maps_to_catalog_names(tmp_path):
+    """
+    Test that stems, aliases, descriptors and typos resolve to catalog names in request order.
+    """
+    path = tmp_path / "aliases.json"
+    path.write_text(json.dumps({"Roma Tomatoes": "Tomato", "garbanzo beans": "Chickpeas"}))
+    canonicalizer = Canonicalizer(_Catalog(), aliases=load_aliases(str(path)))
+    assert canonicalizer.canonicalize(
+        ["tomatoes", "Roma tomato", "chiken brest", "fresh basil", "garbanzo bean", "2 eggs",
+         "spinnach", "quinoa flakes"]) == [
+        "Tomato", "Chicken Breast", "Basil", "Chickpeas", "Eggs", "Spinach", "quinoa flakes"]
+
+def test_canonicalize_keeps_other_ingredients_that_look_like_typos():
+    """
+    Test that short words and ambiguous near-misses are kept as typed, not "corrected".
+    """
+    canonicalizer = Canonicalizer(_Catalog())
+    near_misses = ["sake", "malt", "chile", "goats", "silk", "mice", "dice", "tune", "union",
+                   "rize", "bitter"]
+    assert canonicalizer.canonicalize(near_misses) == near_misses
+
+def test_canonicalize_drops_junk_and_caps_the_list():
+    """
+    Test that empty, non-text and overlong entries are dropped and the list is capped.
+    """
+    canonicalizer = Canonicalizer(_Catalog(), max_items=2)
+    assert not canonicalizer.canonicalize(["", "  ", "42", 7, {"x": 1}, "a" * 100])
+    assert canonicalizer.canonicalize(["rice", "Rice", "spinach", "basil"]) == ["Rice", "Spinach"]
+    assert not load_aliases(None)
@@ -0,0 +1,149 @@
+"""
+Unit tests for the in-memory ingredient index.
+"""
+
+import gzip
+import json
+import os
+import time
+from website.ingredients import ( # pylint: disable=import-error
+    IngredientCatalog, IngredientIndex, edit_distance, prefix_distance,
+)
+
+CATALOG = ["Chicken Breast", "Ground Beef", "Beef Steak", "Chickpeas", "Roasted Chicken", "Ham"]
+
+def test_search_matches_linear_scan():
+    """
+    Test that indexed substring search returns what a linear scan would, in catalog order.
+    """
+    index = IngredientIndex(CATALOG)
+    for query in ["chick", "beef", "ef", "am", "ICKEN", "en b", "xyz", "ha"]:
+        expected = [name for name in CATALOG if query.lower() in name.lower()]
+        assert index.search(query) == expected
+
+def test_search_limit_and_short_query():
+    """
+    Test that search honours the limit and ignores queries shorter than two characters.
+    """
+    index = IngredientIndex(CATALOG)
+    assert not index.search("c", limit=10)
+    assert index.search("chick", limit=2) == ["Chicken Breast", "Chickpeas"]
+
+def test_starts_with():
+    """
+    Test prefix lookups are case-insensitive and alphabetically ordered.
+    """
+    index = IngredientIndex(CATALOG)
+    assert index.starts_with("CHICK") == ["Chicken Breast", "Chickpeas"]
+    assert index.starts_with("beef") == ["Beef Steak"]
+    assert not index.starts_with("zucchini")
+
+def _write_catalog(path, names):
+    path.write_text(json.dumps(names), encoding='utf-8')
+    # Bump mtime explicitly so coarse filesystem timestamps still register a change
+    stamp = time.time() + len(names)
+    os.utime(path, (stamp, stamp))
+
+def test_catalog_reload_swaps_index(tmp_path):
+    """
+    Test that the catalog only rebuilds when the file changes and swaps in the new index.
+    """
+    path = tmp_path / "ingredients.json"
+    _write_catalog(path, ["Tomato"])
+    catalog = IngredientCatalog(str(path))
+    old_index = catalog.index
+    assert catalog.index.search("tom") == ["Tomato"]
+    assert catalog.reload() is False
+    assert catalog.index is old_index
+
+    _write_catalog(path, ["Tomato", "Tomatillo"])
+    assert catalog.reload() is True
+    assert catalog.index.search("tom") == ["Tomato", "Tomatillo"]
+    assert old_index.search("tom") == ["Tomato"]
+
+def test_catalog_keeps_last_good_index(tmp_path):
+    """
+    Test that an invalid or missing file leaves the previous index in service.
+    """
+    path = tmp_path / "ingredients.json"
+    _write_catalog(path, ["Tomato"])
+    catalog = IngredientCatalog(str(path))
+
+    path.write_text("[\"Tomato\", ", encoding='utf-8')
+    assert catalog.reload() is False
+    path.unlink()
+    assert catalog.reload() is False
+    assert catalog.index.search("tom") == ["Tomato"]
+
+def test_catalog_watcher_picks_up_changes(tmp_path):
+    """
+    Test that the background watcher reloads the catalog without a request.
+    """
+    path = tmp_path / "ingredients.json"
+    _write_catalog(path, ["Tomato"])
+    catalog = IngredientCatalog(str(path), poll_interval=0.01)
+    catalog.start()
+    try:
+        _write_catalog(path, ["Tomato", "Tomatillo"])
+        deadline = time.time() + 2
+        while len(catalog.index) != 2 and time.time() < deadline:
+            time.sleep(0.01)
+        assert len(catalog.index) == 2
+    finally:
+        catalog.stop()
+
+def test_edit_distance_counts_transpositions():
+    """
+    Test the edit distance and its prefix-aware variant.
+    """
+    assert edit_distance("brocoli", "broccoli") == 1
+    assert edit_distance("parmesean", "parmesan") == 1
+    assert edit_distance("tofu", "tofu") == 0
+    assert edit_distance("ciantro", "cilantro") == 1
+    assert edit_distance("mlik", "milk") == 1
+    assert prefix_distance("brocc", "broccoli") == 0
+    assert prefix_distance("brocol", "broccoli") == 2
+
+def test_suggest_ranks_prefix_word_start_substring():
+    """
+    Test that prefix matches come first, then later-word starts, then substrings.
+    """
+    index = IngredientIndex(["Roasted Chicken", "Chickpeas", "Chicken Breast", "Pistachio",
+                             "Almond Milk", "Milk", "Buttermilk"])
+    assert index.suggest("chick") == ["Chickpeas", "Chicken Breast", "Roasted Chicken"]
+    assert index.suggest("milk") == ["Milk", "Almond Milk", "Buttermilk"]
+    assert index.suggest("chi") == ["Chickpeas", "Chicken Breast", "Roasted Chicken",
+                                    "Pistachio"]
+    assert index.suggest("chi", limit=2) == ["Chickpeas", "Chicken Breast"]
+    assert not index.suggest("c")
+
+def test_suggest_tolerates_typos():
+    """
+    Test that misspelled words match, closest first, including multi-word queries.
+    """
+    index = IngredientIndex(["Broccoli", "Parmesan", "Chicken Breast", "Chicken Thigh",
+                             "Cilantro", "Beef Brisket"])
+    assert index.suggest("brocoli") == ["Broccoli"]
+    assert index.suggest("parmesean") == ["Parmesan"]
+    assert index.suggest("ciantro") == ["Cilantro"]
+    assert index.suggest("chiken brest") == ["Chicken Breast"]
+    assert index.suggest("chiken") == ["Chicken Breast", "Chicken Thigh"]
+    assert not index.suggest("tofu")
+
+def test_payload_version_follows_content():
+    """
+    Test that the precompressed catalog is versioned by content and decompresses to it.
+    """
+    index = IngredientIndex(["Milk", "Eggs"])
+    assert index.payload.version == IngredientIndex(["Milk", "Eggs"]).payload.version
+    assert index.payload.version != IngredientIndex(["Eggs", "Milk"]).payload.version
+    assert json.loads(gzip.decompress(index.payload.encodings["gzip"])) == ["Milk", "Eggs"]
+
+def test_suggestion_body_precomputes_short_queries():
+    """
+    Test that precomputed bodies for short queries match suggest() for any 2-3 characters.
+    """
+    index = IngredientIndex(CATALOG)
+    for query in ["ch", "chi", "Be", "ef ", "f s", "zz", "am", "x"]:
+        assert json.loads(index.suggestion_body(query)) == index.suggest(query)
+    assert json.loads(index.suggestion_body("chickn")) == index.suggest("chickn")
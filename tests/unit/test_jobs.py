@@ -0,0 +1,67 @@
+"""
+Unit tests for the persistent generation job queue.
+"""
+
+import sqlite3
+import threading
+import time
+import pytest
+from website.jobs import JobLimits, JobQueue, JobQueueFull # pylint: disable=import-error
+
+def _queue(tmp_path, run, **limits):
+    return JobQueue(run, db_path=str(tmp_path / "jobs.sqlite3"),
+                    limits=JobLimits(poll_interval=0.05, **limits))
+
+def test_jobs_run_in_background_and_record_results(tmp_path):
+    """
+    Test that submitted jobs run on worker threads and finished jobs hold results or errors.
+    """
+    def run(job):
+        if "Boom" in job["ingredients"]:
+            raise ValueError("bad ingredients")
+        return {"title": job["kind"] + ":" + ",".join(job["ingredients"])}
+
+    queue = _queue(tmp_path, run, workers=2)
+    done = queue.get(queue.submit('recipe', ["Rice"]), wait=5)
+    assert done["status"] == "done"
+    assert done["result"] == {"title": "recipe:Rice"}
+    assert done["wait_seconds"] >= 0 and done["run_seconds"] >= 0
+
+    failed = queue.get(queue.submit('similar', ["Boom"]), wait=5)
+    assert (failed["status"], failed["error"]) == ("failed", "bad ingredients")
+    assert queue.get("missing") is None
+
+    stats = queue.stats()
+    assert (stats["completed"], stats["failed"], stats["queued"]) == (1, 1, 0)
+
+def test_full_queue_rejects_submissions(tmp_path):
+    """
+    Test that submissions beyond max_pending waiting jobs are refused.
+    """
+    release = threading.Event()
+    queue = _queue(tmp_path, lambda job: release.wait(5), workers=1, max_pending=1)
+    running = queue.submit('recipe', ["A"])
+    while queue.get(running)["status"] != "running":
+        time.sleep(0.01)
+    queue.submit('recipe', ["B"])
+    with pytest.raises(JobQueueFull):
+        queue.submit('recipe', ["C"])
+    assert queue.stats()["rejected"] == 1
+    release.set()
+
+def test_jobs_survive_restart_and_stale_jobs_rerun(tmp_path):
+    """
+    Test that queued jobs and jobs abandoned mid-run are picked up by a new queue.
+    """
+    db_path = tmp_path / "jobs.sqlite3"
+    first = _queue(tmp_path, lambda job: None)
+    first.start = lambda: None  # a process that dies before its workers run anything
+    queued = first.submit('recipe', ["Rice"])
+    abandoned = first.submit('recipe', ["Egg"])
+    with sqlite3.connect(db_path) as db:
+        db.execute("UPDATE jobs SET status = 'running', started_at = 0 WHERE id = ?",
+                   (abandoned,))
+
+    second = _queue(tmp_path, lambda job: job["ingredients"], stale_after=60)
+    assert second.get(queued, wait=5)["result"] == ["Rice"]
+    assert second.get(abandoned, wait=5)["result"] == ["Egg"]
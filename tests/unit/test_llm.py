@@ -0,0 +1,115 @@
+"""
+Unit tests for the LLM backends.
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import pytest
+from website.llm import ( # pylint: disable=import-error
+    FakeBackend, GeminiBackend, OpenAIBackend, create_backend, reset_clients,
+)
+from website.prompts import ( # pylint: disable=import-error
+    RECIPE_GENERATION_CONFIG, RECIPE_SCHEMA, recipe_prompt,
+)
+
+def test_fake_backend_variants_agree():
+    """
+    Test that blocking, streaming and async fake generations return the same text.
+    """
+    backend = FakeBackend(latency=0, tokens_per_second=0)
+    prompt = recipe_prompt(["rice"])
+    generation = backend.generate(prompt, RECIPE_GENERATION_CONFIG)
+    assert json.loads(generation.text)["title"] == "Fake Stir Fry"
+    assert generation.output_tokens > 0
+    assert "".join(backend.generate_stream(prompt, RECIPE_GENERATION_CONFIG)) == generation.text
+
+    async def collect():
+        result = await backend.generate_async(prompt, RECIPE_GENERATION_CONFIG)
+        chunks = [chunk async for chunk in backend.generate_stream_async(prompt, {})]
+        return result.text, "".join(chunks)
+
+    assert asyncio.run(collect()) == (generation.text, generation.text)
+
+def test_fake_backend_paces_output(mocker):
+    """
+    Test that the fake backend waits for the first token and then per chunk.
+    """
+    sleep = mocker.patch('website.llm.time.sleep')
+    backend = FakeBackend(latency=0.25, tokens_per_second=80, chunk_tokens=8)
+    chunks = list(backend.generate_stream("3 different recipe ideas", {}))
+    assert sleep.call_args_list[0].args == (0.25,)
+    assert sleep.call_count == len(chunks) + 1
+    assert all(call.args == (0.1,) for call in sleep.call_args_list[1:])
+
+def test_gemini_backend_passes_config_and_usage(mocker):
+    """
+    Test that the Gemini backend forwards generation settings and token usage.
+    """
+    response = mocker.MagicMock(text="{}")
+    response.usage_metadata.prompt_token_count = 120
+    response.usage_metadata.candidates_token_count = 340
+    generate = mocker.patch('google.generativeai.GenerativeModel.generate_content',
+                            return_value=response)
+
+    generation = GeminiBackend().generate("prompt", RECIPE_GENERATION_CONFIG)
+    assert generation == ("{}", 120, 340)
+    config = generate.call_args.kwargs["generation_config"]
+    assert config.max_output_tokens == RECIPE_GENERATION_CONFIG["max_output_tokens"]
+
+def test_openai_backend_maps_request(mocker):
+    """
+    Test that the OpenAI backend maps the generation config onto chat completions.
+    """
+    backend = OpenAIBackend(api_key="test")
+    completion = mocker.MagicMock()
+    completion.choices[0].message.content = "{}"
+    completion.usage.prompt_tokens = 10
+    completion.usage.completion_tokens = 20
+    create = mocker.patch.object(backend.client.chat.completions, 'create',
+                                 return_value=completion)
+
+    assert backend.generate("prompt", RECIPE_GENERATION_CONFIG) == ("{}", 10, 20)
+    kwargs = create.call_args.kwargs
+    assert kwargs["messages"] == [{"role": "user", "content": "prompt"}]
+    assert kwargs["max_tokens"] == RECIPE_GENERATION_CONFIG["max_output_tokens"]
+    assert "response_format" not in kwargs
+
+    backend.generate("prompt", {**RECIPE_GENERATION_CONFIG, "response_schema": RECIPE_SCHEMA})
+    response_format = create.call_args.kwargs["response_format"]
+    assert response_format["json_schema"]["schema"] == RECIPE_SCHEMA
+
+def test_create_backend_rejects_unknown_names():
+    """
+    Test that a misconfigured backend name fails at startup.
+    """
+    with pytest.raises(ValueError):
+        create_backend({'LLM_BACKEND': 'nope'})
+
+def test_create_app_defers_provider_sdks():
+    """
+    Test that building the app imports neither provider SDK.
+    """
+    code = ("import sys; from website import create_app; create_app({'LLM_BACKEND': 'gemini'}); "
+            "print('google.generativeai' in sys.modules or 'openai' in sys.modules)")
+    result = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True,
+                            text=True)
+    assert result.stdout.strip() == "False"
+
+def test_provider_clients_are_created_per_process():
+    """
+    Test that clients are created on first use, reused, and dropped in a forked child.
+    """
+    backend = OpenAIBackend(api_key="test")
+    client = backend.client
+    assert backend.client is client
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if backend.client is not client else 1)
+    assert os.waitpid(pid, 0)[1] == 0
+
+    reset_clients()
+    assert backend.client is not client
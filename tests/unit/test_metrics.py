@@ -0,0 +1,40 @@
+"""
+Unit tests for the metrics registry and its text exposition.
+"""
+
+from website.llm import Generation # pylint: disable=import-error
+from website.metrics import MetricsRegistry # pylint: disable=import-error
+
+def test_histogram_renders_cumulative_buckets():
+    """
+    Test that histogram buckets are cumulative and end with +Inf, sum and count.
+    """
+    registry = MetricsRegistry()
+    latency = registry.histogram("demo_seconds", "Demo.", ("stage",), buckets=(0.1, 1.0))
+    latency.observe(0.05, ("parse",))
+    latency.observe(0.5, ("parse",))
+    latency.observe(5.0, ("parse",))
+    text = registry.render()
+    assert "# TYPE demo_seconds histogram" in text
+    assert 'demo_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 'demo_seconds_bucket{stage="parse",le="1.0"} 2' in text
+    assert 'demo_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'demo_seconds_sum{stage="parse"} 5.55' in text
+    assert 'demo_seconds_count{stage="parse"} 3' in text
+
+def test_counters_gauges_and_collectors():
+    """
+    Test that counters accumulate, label values are escaped and collectors are rendered.
+    """
+    registry = MetricsRegistry()
+    registry.errors.inc(('Time"out',))
+    registry.errors.inc(('Time"out',))
+    registry.in_flight.inc()
+    registry.record_generation("recipe", Generation("{}", prompt_tokens=40, output_tokens=None))
+    registry.add_collector(lambda: [("demo_ratio", "gauge", "Demo ratio.", 0.5)])
+    text = registry.render()
+    assert 'generation_errors_total{error="Time\\"out"} 2' in text
+    assert "http_requests_in_flight 1" in text
+    assert 'llm_tokens_total{kind="recipe",direction="prompt"} 40' in text
+    assert "direction=\"output\"" not in text
+    assert "# TYPE demo_ratio gauge\ndemo_ratio 0.5" in text
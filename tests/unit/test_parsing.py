@@ -0,0 +1,47 @@
+"""
+Unit tests for extracting and validating JSON from model responses.
+"""
+
+import json
+import pytest
+from website.parsing import ( # pylint: disable=import-error
+    extract_json_object, parse_model_json, validate_similar_recipes,
+)
+
+RECIPE = {"title": "Soup {Hearty}", "description": "Say \"yum\"", "ingredients": ["1 leek"],
+          "instructions": ["Simmer } gently"]}
+BODY = json.dumps(RECIPE, indent=2)
+
+@pytest.mark.parametrize("text", [
+    BODY,
+    f"```json\n{BODY}\n```",
+    f"```\n{BODY}\n```",
+    f"Here is your recipe:\n```json\n{BODY}\n```\nEnjoy!",
+    f"Sure! {BODY} Let me know if you want changes.",
+    f"Some {{curly}} prose first. {BODY}",
+])
+def test_extracts_first_object(text):
+    """
+    Test that fences, prose and braces inside strings do not prevent extraction.
+    """
+    assert extract_json_object(text) == RECIPE
+
+def test_rejects_responses_without_an_object():
+    """
+    Test that text with no complete JSON object raises ValueError.
+    """
+    for text in ["error data", "", '{"title": "Unfinished']:
+        with pytest.raises(ValueError):
+            extract_json_object(text)
+
+def test_validates_shapes():
+    """
+    Test that recipes and similar recipes missing required fields are rejected.
+    """
+    assert parse_model_json(BODY, 'recipe') == RECIPE
+    with pytest.raises(ValueError, match="instructions"):
+        parse_model_json('{"title": "T", "description": "D", "ingredients": []}', 'recipe')
+    with pytest.raises(ValueError, match="recipes"):
+        validate_similar_recipes({"ideas": []})
+    with pytest.raises(ValueError, match="title"):
+        validate_similar_recipes({"recipes": [{"description": "No title"}]})
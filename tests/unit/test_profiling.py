@@ -0,0 +1,50 @@
+"""
+Unit tests for request profiling and slow-request traces.
+"""
+
+import sys
+import time
+from website import create_app # pylint: disable=import-error
+from website.profiling import ( # pylint: disable=import-error
+    ProfileSettings, RequestProfiler, StackSampler, collapsed_stack,
+)
+
+def test_sampler_records_collapsed_stacks():
+    """
+    Test that the sampler counts the caller's stack, outermost frame first.
+    """
+    sampler = StackSampler(interval=0.001)
+    key = sampler.add()
+    deadline = time.perf_counter() + 0.05
+    while time.perf_counter() < deadline:
+        pass
+    counts = sampler.remove(key)
+    assert sum(counts.values()) > 0
+    stack = next(iter(counts))
+    assert stack.split(";")[-1].startswith("test_sampler_records_collapsed_stacks (")
+    line = test_sampler_records_collapsed_stacks.__code__.co_firstlineno
+    assert collapsed_stack(sys._getframe()).endswith( # pylint: disable=protected-access
+        f"test_sampler_records_collapsed_stacks (test_profiling.py:{line})")
+
+def test_traces_split_json_and_upstream_time(tmp_path):
+    """
+    Test that only slow or profiled requests are kept, with their time split by kind.
+    """
+    profiler = RequestProfiler(str(tmp_path), ProfileSettings(slow_threshold=0.5, max_traces=2))
+    stages = {"upstream": 0.6, "parse": 0.01, "serialize": 0.02, "cache_lookup": 0.001}
+    assert not profiler.keeps(0.1, profiled=False)
+    assert profiler.keeps(0.1, profiled=True) and profiler.keeps(0.7, profiled=False)
+    profiler.record({"duration_seconds": 0.7}, stages, profiled=False)
+    (trace,) = profiler.traces()
+    assert trace["upstream_seconds"] == 0.6
+    assert trace["json_seconds"] == 0.03
+    assert round(trace["other_seconds"], 3) == 0.07
+
+def test_profiling_is_off_by_default():
+    """
+    Test that without configuration no hooks run and the admin surface is hidden.
+    """
+    app = create_app()
+    assert not app.extensions['profiler'].enabled
+    assert not app.extensions['metrics'].trace_stages
+    assert app.test_client().get('/admin/slow-requests').status_code == 404
@@ -0,0 +1,45 @@
+"""
+Unit tests for the pre-generated recipe store and its MinHash/LSH index.
+"""
+
+import json
+from website.recipe_store import MinHashLSH, RecipeStore, jaccard # pylint: disable=import-error
+
+SIMILAR = {"recipes": [{"title": "Stored idea"}]}
+RECIPE = {"title": "Stored", "description": "d", "ingredients": [], "instructions": []}
+
+def test_lsh_finds_similar_sets_and_skips_unrelated():
+    """
+    Test that near-identical sets collide and disjoint sets do not.
+    """
+    lsh = MinHashLSH()
+    lsh.add(0, ("basil", "garlic", "olive oil", "pasta", "tomato"))
+    lsh.add(1, ("beef", "potato", "carrot"))
+    assert lsh.candidates(("basil", "garlic", "olive oil", "pasta", "parmesan", "tomato")) == {0}
+    assert not lsh.candidates(("salmon", "dill"))
+    assert len(lsh.signature(("salt",))) == 64
+
+def test_store_lookup_rules():
+    """
+    Test that similar recipes match close sets while full recipes need an exact set.
+    """
+    store = RecipeStore([{"ingredients": ["Tomato", "Basil", "Garlic", "Pasta"],
+                          "recipe": RECIPE, "similar": SIMILAR}], min_similarity=0.6)
+    assert store.lookup("recipe", ["pasta", "garlic", "basil", "tomato"]) == RECIPE
+    assert store.lookup("similar", ["Tomato", "Basil", "Garlic", "Pasta", "Salt"]) == SIMILAR
+    assert store.lookup("recipe", ["Tomato", "Basil", "Garlic", "Pasta", "Salt"]) is None
+    assert store.lookup("similar", ["Tomato", "Salmon"]) is None
+    assert store.stats() == {"hits": 2, "misses": 2, "size": 1}
+    assert jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+
+def test_store_file_merges_lines(tmp_path):
+    """
+    Test that later lines for the same set add to or replace earlier results.
+    """
+    path = tmp_path / "store.jsonl"
+    path.write_text(json.dumps({"ingredients": ["Rice"], "recipe": RECIPE}) + "\n"
+                    + json.dumps({"ingredients": ["rice "], "similar": SIMILAR}) + "\n")
+    store = RecipeStore.from_file(str(path))
+    assert len(store) == 1
+    assert store.contains(["RICE"], "recipe") and store.contains(["RICE"], "similar")
+    assert len(RecipeStore.from_file(str(tmp_path / "missing.jsonl"))) == 0
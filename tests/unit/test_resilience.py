@@ -0,0 +1,197 @@
+"""
+Unit tests for the timeout, retry, circuit breaker and hedging layer.
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from website.llm import FakeBackend, Generation, LLMBackend # pylint: disable=import-error
+from website.resilience import ( # pylint: disable=import-error
+    CircuitBreaker, CircuitOpenError, ResilientBackend, RetryPolicy, is_transient,
+)
+
+class ScriptedBackend(LLMBackend):
+    """Backend that raises or returns the next scripted outcome on each call."""
+
+    name = "scripted"
+
+    def __init__(self, outcomes, delay=0.0):
+        super().__init__()
+        self.outcomes = list(outcomes)
+        self.delay = delay
+        self.timeouts = []
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, generation_config, timeout=None):
+        with self._lock:
+            self.timeouts.append(timeout)
+            outcome = self.outcomes.pop(0)
+        if isinstance(outcome, tuple):
+            delay, outcome = outcome
+            time.sleep(delay)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return Generation(text=outcome, prompt_tokens=None, output_tokens=None)
+
+    def generate_stream(self, prompt, generation_config, timeout=None):
+        return iter([self.generate(prompt, generation_config, timeout).text])
+
+def _resilient(backend, breaker=None, **policy):
+    return ResilientBackend(backend, RetryPolicy(**policy), breaker=breaker,
+                            sleep=lambda delay: None)
+
+def test_transient_errors_are_classified():
+    """
+    Test that timeouts and connection failures are transient and other errors are not.
+    """
+    from google.api_core import exceptions # pylint: disable=import-outside-toplevel
+    assert is_transient(TimeoutError())
+    assert is_transient(ConnectionResetError())
+    assert is_transient(exceptions.ServiceUnavailable("down"))
+    assert not is_transient(exceptions.InvalidArgument("bad key"))
+    assert not is_transient(ValueError())
+
+def test_retries_transient_errors_then_succeeds():
+    """
+    Test that transient errors are retried and the attempt timeout is passed down.
+    """
+    backend = ScriptedBackend([TimeoutError(), ConnectionError(), "ok"])
+    resilient = _resilient(backend, timeout=5, retries=2)
+    assert resilient.generate("prompt", {}).text == "ok"
+    assert backend.timeouts == [5, 5, 5]
+    assert resilient.stats()["retried"] == 2
+
+def test_does_not_retry_permanent_errors():
+    """
+    Test that a non-transient error fails at once without tripping the breaker.
+    """
+    backend = ScriptedBackend([ValueError("bad request"), "ok"])
+    resilient = _resilient(backend, retries=2, breaker=CircuitBreaker(failure_threshold=1))
+    with pytest.raises(ValueError):
+        resilient.generate("prompt", {})
+    assert resilient.breaker.state == CircuitBreaker.CLOSED
+
+def test_gives_up_after_retry_budget():
+    """
+    Test that the last transient error is raised once the retries are used up.
+    """
+    backend = ScriptedBackend([TimeoutError("Request timed out")] * 3)
+    resilient = _resilient(backend, retries=2)
+    with pytest.raises(TimeoutError, match="Request timed out"):
+        resilient.generate("prompt", {})
+    assert not backend.outcomes
+
+def test_deadline_caps_attempt_timeouts():
+    """
+    Test that attempts share the overall deadline.
+    """
+    backend = ScriptedBackend(["ok"])
+    resilient = _resilient(backend, timeout=30, deadline=2)
+    resilient.generate("prompt", {})
+    assert 0 < backend.timeouts[0] <= 2
+
+def test_fake_backend_honours_timeout():
+    """
+    Test that a slow fake generation is cut off at the attempt timeout.
+    """
+    resilient = _resilient(FakeBackend(latency=1.0), timeout=0.05, retries=0)
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        resilient.generate("prompt", {})
+    assert time.perf_counter() - start < 0.5
+
+def test_circuit_opens_then_half_opens():
+    """
+    Test that the breaker rejects calls while open and closes after a successful probe.
+    """
+    clock = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: clock[0])
+    backend = ScriptedBackend([TimeoutError(), TimeoutError(), "ok"])
+    resilient = _resilient(backend, retries=0, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            resilient.generate("prompt", {})
+
+    with pytest.raises(CircuitOpenError) as error:
+        resilient.generate("prompt", {})
+    assert error.value.retry_after == 10
+    assert backend.outcomes == ["ok"]
+
+    clock[0] = 11
+    assert resilient.generate("prompt", {}).text == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_failed_probe_reopens_circuit():
+    """
+    Test that a failure in the half-open state opens the circuit again.
+    """
+    clock = [0.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: clock[0])
+    breaker.record_failure()
+    clock[0] = 11
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+def test_hedged_request_answers_when_slow_first_attempt_fails():
+    """
+    Test that a backup is sent after the hedge delay and answers when the first request fails.
+    """
+    backend = ScriptedBackend([(0.3, ConnectionError("reset")), "backup"])
+    resilient = _resilient(backend, hedge_delay=0.05, retries=0)
+    assert resilient.generate("prompt", {}).text == "backup"
+    assert resilient.stats()["hedged"] == 1
+    assert resilient.stats()["hedge_wins"] == 1
+
+def test_hedge_not_sent_when_first_attempt_answers_in_time():
+    """
+    Test that a request answering within the hedge delay is returned without a backup.
+    """
+    backend = ScriptedBackend(["fast", "unused"])
+    resilient = _resilient(backend, hedge_delay=0.2)
+    assert resilient.generate("prompt", {}).text == "fast"
+    time.sleep(0.3)
+    assert backend.outcomes == ["unused"]
+    assert resilient.stats()["hedged"] == 0
+
+def test_hedged_requests_do_not_queue_behind_the_hedge_pool():
+    """
+    Test that concurrent hedged calls run side by side and only slow ones are hedged.
+    """
+    backend = ScriptedBackend([(0.2, "ok")] * 40)
+    resilient = _resilient(backend, hedge_delay=1.0, hedge_workers=2)
+    threads = [threading.Thread(target=resilient.generate, args=("prompt", {}))
+               for _ in range(40)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.perf_counter() - start < 0.8
+    assert resilient.stats()["hedged"] == 0
+
+def test_stream_failure_counts_towards_breaker():
+    """
+    Test that a stream failing mid-way is recorded by the breaker.
+    """
+    def broken(prompt, generation_config, timeout=None): # pylint: disable=unused-argument
+        yield "{"
+        raise ConnectionError("reset")
+
+    backend = ScriptedBackend([])
+    backend.generate_stream = broken
+    resilient = _resilient(backend, breaker=CircuitBreaker(failure_threshold=1))
+    with pytest.raises(ConnectionError):
+        list(resilient.generate_stream("prompt", {}))
+    assert resilient.breaker.state == CircuitBreaker.OPEN
+
+def test_async_generate_retries():
+    """
+    Test that the async path retries transient errors too.
+    """
+    backend = ScriptedBackend([TimeoutError(), "ok"])
+    resilient = ResilientBackend(backend, RetryPolicy(retries=1, backoff=0))
+    assert asyncio.run(resilient.generate_async("prompt", {})).text == "ok"
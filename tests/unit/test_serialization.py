@@ -0,0 +1,26 @@
+"""
+Unit tests for the orjson JSON provider.
+"""
+
+import decimal
+from website import create_app # pylint: disable=import-error
+
+def test_orjson_provider_matches_default_output():
+    """
+    Test that responses are compact, key-sorted UTF-8 and round-trip through loads.
+    """
+    app = create_app()
+    value = {"title": "Crème Brûlée", "servings": 4, "amount": decimal.Decimal("1.5")}
+    with app.app_context():
+        body = app.json.response(value).get_data()
+        assert body == '{"amount":"1.5","servings":4,"title":"Crème Brûlée"}'.encode('utf-8')
+        assert app.json.loads(body)["title"] == "Crème Brûlée"
+        assert app.json.dumps(value, indent=2).startswith('{\n  "amount"')
+
+def test_orjson_provider_falls_back_for_big_integers():
+    """
+    Test that values orjson rejects are serialized by the standard encoder instead.
+    """
+    app = create_app()
+    with app.app_context():
+        assert app.json.dumps({"n": 2 ** 70}) == '{"n": 1180591620717411303424}'
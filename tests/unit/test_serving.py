@@ -0,0 +1,48 @@
+"""
+Unit tests for worker-model adaptation.
+"""
+
+from website import create_app, serving # pylint: disable=import-error
+
+def test_sync_worker_defaults(mocker):
+    """
+    Test that without gevent the generation pool stays small and gRPC is left alone.
+    """
+    init_gevent = mocker.patch('grpc.experimental.gevent.init_gevent')
+    assert serving.gevent_active() is False
+    assert serving.default_generation_threads() == serving.SYNC_GENERATION_THREADS
+    serving.init_worker()
+    init_gevent.assert_not_called()
+
+def test_gevent_worker_patches_grpc_once(mocker):
+    """
+    Test that under gevent gRPC is made cooperative exactly once per process.
+    """
+    mocker.patch('website.serving.gevent_active', return_value=True)
+    mocker.patch.dict('website.serving._state', {"grpc_patched": False})
+    init_gevent = mocker.patch('grpc.experimental.gevent.init_gevent')
+    serving.init_worker()
+    serving.init_worker()
+    init_gevent.assert_called_once()
+    assert serving.default_generation_threads() == serving.GEVENT_GENERATION_THREADS
+
+def test_config_from_environment(monkeypatch):
+    """
+    Test that FLASK_ prefixed environment variables override the defaults.
+    """
+    monkeypatch.setenv('FLASK_RECIPE_CACHE_TTL', '60')
+    assert create_app().config['RECIPE_CACHE_TTL'] == 60
+
+def test_post_fork_restarts_catalog_watcher(mocker):
+    """
+    Test that a forked worker restarts the catalog watcher the fork left behind.
+    """
+    app = create_app({'INGREDIENTS_RELOAD_INTERVAL': 60})
+    catalog = app.extensions['ingredient_catalog']
+    dead_thread = mocker.MagicMock()
+    dead_thread.is_alive.return_value = False
+    catalog._thread = dead_thread # pylint: disable=protected-access
+    serving.post_fork(app)
+    assert catalog._thread is not dead_thread # pylint: disable=protected-access
+    assert catalog._thread.is_alive() # pylint: disable=protected-access
+    catalog.stop()
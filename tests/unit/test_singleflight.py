@@ -0,0 +1,83 @@
+"""
+Unit tests for single-flight request coalescing.
+"""
+
+import threading
+import time
+import pytest
+from website.singleflight import SingleFlight # pylint: disable=import-error
+
+def _run_concurrently(flight, key, func, count):
+    results = []
+    errors = []
+
+    def call():
+        try:
+            results.append(flight.do(key, func))
+        except Exception as e: # pylint: disable=broad-except
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+def test_concurrent_callers_share_one_call():
+    """
+    Test that callers arriving while a key is in flight get the leader's result.
+    """
+    flight = SingleFlight()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"title": "Shared"}
+
+    results, errors = _run_concurrently(flight, "key", slow, 10)
+    assert not errors
+    assert results == [{"title": "Shared"}] * 10
+    assert len(calls) == 1
+    assert flight.stats() == {"leaders": 1, "coalesced": 9, "cross_worker_hits": 0,
+                              "in_flight": 0}
+
+def test_errors_propagate_and_are_not_remembered():
+    """
+    Test that followers see the leader's exception and the next call runs again.
+    """
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.1)
+        raise TimeoutError("Request timed out")
+
+    results, errors = _run_concurrently(flight, "key", failing, 3)
+    assert not results
+    assert len(errors) == 3
+    assert flight.do("key", lambda: "ok") == "ok"
+
+def test_cross_worker_lock_rechecks_shared_result(tmp_path):
+    """
+    Test that a leader holding the file lock is followed by a recheck, not a second call.
+    """
+    shared = {}
+    first = SingleFlight(lock_dir=str(tmp_path))
+    second = SingleFlight(lock_dir=str(tmp_path), poll_interval=0.01)
+    started = threading.Event()
+
+    def produce():
+        started.set()
+        time.sleep(0.2)
+        shared["key"] = "generated"
+        return "generated"
+
+    thread = threading.Thread(target=first.do, args=("key", produce, lambda: shared.get("key")))
+    thread.start()
+    started.wait()
+    result = second.do("key", lambda: pytest.fail("should reuse the shared result"),
+                       recheck=lambda: shared.get("key"))
+    thread.join()
+    assert result == "generated"
+    assert second.stats()["cross_worker_hits"] == 1
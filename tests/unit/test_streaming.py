@@ -0,0 +1,48 @@
+"""
+Unit tests for incremental parsing of streamed recipe responses.
+"""
+
+import json
+from website.streaming import RecipeStreamParser, recipe_events # pylint: disable=import-error
+
+RECIPE = {
+    "title": "Garlic Rice",
+    "description": "Fragrant rice",
+    "ingredients": ["1 cup rice", "2 cloves garlic"],
+    "instructions": ["Cook rice", "Add garlic"],
+    "cook_time": "20 minutes",
+    "servings": 12,
+    "difficulty": "Easy"
+}
+
+def test_parser_emits_fields_and_items_in_order():
+    """
+    Test that feeding one character at a time yields every field and item exactly once.
+    """
+    parser = RecipeStreamParser()
+    events = []
+    for char in "```json\n" + json.dumps(RECIPE, indent=2) + "\n```":
+        events.extend(parser.feed(char))
+
+    assert events[:2] == [("field", "title", "Garlic Rice"),
+                          ("field", "description", "Fragrant rice")]
+    assert ("item", "ingredients", "2 cloves garlic") in events
+    assert ("field", "servings", 12) in events
+    assert parser.result == RECIPE
+
+def test_parser_waits_for_complete_values():
+    """
+    Test that a string or number cut at a chunk boundary is not emitted early.
+    """
+    parser = RecipeStreamParser()
+    assert not parser.feed('{"title": "Garl')
+    assert parser.feed('ic Rice", "servings": 1') == [("field", "title", "Garlic Rice")]
+    assert parser.feed('2}') == [("field", "servings", 12)]
+    assert parser.result == {"title": "Garlic Rice", "servings": 12}
+
+def test_recipe_events_falls_back_to_full_parse():
+    """
+    Test that an unrecognised stream still ends with a done event from the fallback parser.
+    """
+    events = list(recipe_events(["not json"], lambda text: {"raw": text}))
+    assert events == [{"event": "done", "recipe": {"raw": "not json"}}]
@@ -2,17 +2,230 @@
 This module initializes the Flask application and registers blueprints.
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
+from .admission import AdmissionController, AdmissionLimits
+from .batch import batch_blueprint, generate_batch_command
+from .cache import RecipeCache
+from .canonical import Canonicalizer, load_aliases
+from .compression import init_compression
+from .ingredients import IngredientCatalog
+from .jobs import JobLimits, JobQueue, job_runner, jobs_blueprint
+from .llm import create_backend
+from .metrics import init_metrics
+from .profiling import init_profiling, profiling_blueprint
+from .recipe_store import RecipeStore, precompute_command
+from .resilience import CircuitBreaker, ResilientBackend, RetryPolicy
+from .serialization import init_json
+from .serving import default_generation_threads, init_worker
+from .singleflight import SingleFlight
 from .views import main_blueprint
 
-def create_app():
+def create_app(test_config=None):
     """
     Create and configure the Flask application.
     """
     app = Flask(__name__)
 
+    # Load environment variables
+    load_dotenv()
+
+    # Default configuration, overridable by the caller
+    app.config.from_mapping(
+        INGREDIENTS_PATH=os.path.join(app.static_folder, 'data', 'ingredients.json'),
+        # Seconds between catalog change checks; 0 disables hot reloading
+        INGREDIENTS_RELOAD_INTERVAL=5.0,
+        # Alternative ingredient names (JSON object of alias -> catalog name), and the most
+        # distinct ingredients a request may send to the model; None disables the cap
+        INGREDIENT_ALIASES_PATH=os.path.join(app.static_folder, 'data',
+                                             'ingredient_aliases.json'),
+        MAX_INGREDIENTS=20,
+        # Seconds browsers and proxies may reuse an ingredient suggestion response
+        SUGGESTION_CACHE_MAX_AGE=300,
+        # Generated recipe cache; set RECIPE_CACHE_DB to a file path to share it across workers
+        RECIPE_CACHE_SIZE=512,
+        RECIPE_CACHE_TTL=3600,
+        RECIPE_CACHE_DB=None,
+        # Seconds past expiry a cached recipe may still be served while the model is unavailable
+        RECIPE_CACHE_STALE_TTL=86400,
+        # JSON Lines file of pre-generated recipes written by "flask precompute-recipes",
+        # and the Jaccard similarity a stored ingredient set needs to answer a similar-recipes
+        # request; None disables the store
+        RECIPE_STORE_PATH=None,
+        RECIPE_STORE_MIN_SIMILARITY=0.6,
+        # Directory for per-key lock files that coalesce identical generations across
+        # workers; only useful together with RECIPE_CACHE_DB
+        SINGLE_FLIGHT_LOCK_DIR=None,
+        # Threads per worker for upstream calls made concurrently with the request thread;
+        # None picks a size for the worker class (greenlets are far cheaper than threads)
+        GENERATION_THREADS=None,
+        # LLM provider: "gemini", "openai", or "fake" for offline load tests and benchmarks
+        LLM_BACKEND='gemini',
+        LLM_MODEL=None,
+        # Use the model's JSON mode with a response schema instead of describing JSON in prose
+        STRUCTURED_OUTPUT=True,
+        GEMINI_API_KEY=os.environ.get('GEMINI_API_KEY'),
+        OPENAI_API_KEY=os.environ.get('OPENAI_API_KEY'),
+        # Fake backend pacing: seconds before the first token, then tokens per second (0 = instant)
+        FAKE_LLM_LATENCY=0.5,
+        FAKE_LLM_TOKENS_PER_SECOND=0,
+        # Fraction of fake backend calls that fail with a transient error
+        FAKE_LLM_ERROR_RATE=0.0,
+        # Upstream latency bounds in seconds: per attempt, and per request including retries
+        LLM_TIMEOUT=20.0,
+        LLM_DEADLINE=45.0,
+        # Retries for transient upstream errors, with jittered exponential backoff from this base
+        LLM_RETRIES=2,
+        LLM_RETRY_BACKOFF=0.25,
+        # Consecutive failed requests that open the circuit, and seconds before it is probed again
+        CIRCUIT_BREAKER_THRESHOLD=5,
+        CIRCUIT_BREAKER_RESET=30.0,
+        # Seconds a generation may be in flight before a backup request is sent; None disables
+        LLM_HEDGE_DELAY=None,
+        # Admission control for requests that reach the model: requests per second and burst
+        # size for all clients together and for each client address; None disables a limit
+        ADMISSION_RATE=None,
+        ADMISSION_BURST=None,
+        ADMISSION_CLIENT_RATE=None,
+        ADMISSION_CLIENT_BURST=None,
+        # Proxies in front of the app whose X-Forwarded-For and X-Forwarded-Proto headers are
+        # trusted, so per-client limits see the caller's address rather than the proxy's;
+        # 0 trusts none, which is right only when clients connect directly
+        TRUSTED_PROXY_HOPS=0,
+        # Concurrent upstream calls per worker, and how many more may wait, for how many seconds
+        UPSTREAM_CONCURRENCY=64,
+        UPSTREAM_QUEUE_SIZE=256,
+        UPSTREAM_QUEUE_TIMEOUT=10.0,
+        # Batch generation: concurrent items per batch, and the most items one request may hold
+        BATCH_CONCURRENCY=8,
+        BATCH_MAX_ITEMS=1000,
+        # Background generation jobs: SQLite queue file shared by the workers on a host
+        # (None keeps it in the instance folder), threads per worker running jobs, and most
+        # jobs that may wait
+        JOB_DB=None,
+        JOB_WORKERS=4,
+        JOB_QUEUE_SIZE=1000,
+        # Seconds before a job whose worker died is run again, before a finished job is
+        # deleted, and that a poll may be held waiting for a job to finish
+        JOB_STALE_AFTER=300.0,
+        JOB_RESULT_TTL=3600.0,
+        JOB_MAX_WAIT=30.0,
+        # Responses of at least this many bytes are gzip (or brotli) compressed for clients
+        # that accept it, at these levels; None disables compression, e.g. behind a proxy
+        # that compresses
+        COMPRESS_MIN_SIZE=1024,
+        COMPRESS_LEVEL=6,
+        COMPRESS_BROTLI_QUALITY=4,
+        # On-demand profiling, off unless one of these is set: the token admins send in
+        # X-Admin-Token to read traces and profiles and to profile a request with
+        # "X-Profile: 1"; the fraction of all requests profiled; and the duration in seconds
+        # above which a request's stage trace is kept
+        PROFILE_ADMIN_TOKEN=None,
+        PROFILE_SAMPLE_RATE=0.0,
+        SLOW_REQUEST_SECONDS=None,
+        # Seconds between stack samples of a profiled request, where collapsed stacks are
+        # written (None keeps them in the instance folder), and how many traces are kept
+        PROFILE_INTERVAL=0.005,
+        PROFILE_DIR=None,
+        SLOW_REQUEST_TRACES=100,
+    )
+    # FLASK_<KEY> environment variables override the defaults, e.g. FLASK_RECIPE_CACHE_TTL=600
+    app.config.from_prefixed_env()
+    if test_config:
+        app.config.update(test_config)
+
+    # Take the client address and scheme from the headers set by trusted proxies
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+
+    # Serialize JSON responses with orjson when it is installed
+    init_json(app)
+
+    # Build the ingredient suggestion index once and watch the file for changes
+    catalog = IngredientCatalog(app.config['INGREDIENTS_PATH'],
+                                poll_interval=app.config['INGREDIENTS_RELOAD_INTERVAL'])
+    catalog.start()
+    app.extensions['ingredient_catalog'] = catalog
+
+    # Map request ingredients to catalog names before prompts and cache keys are built
+    app.extensions['canonicalizer'] = Canonicalizer(
+        catalog, aliases=load_aliases(app.config['INGREDIENT_ALIASES_PATH']),
+        max_items=app.config['MAX_INGREDIENTS'])
+
+    # Cache generated recipes keyed on the normalized ingredient set
+    app.extensions['recipe_cache'] = RecipeCache(max_entries=app.config['RECIPE_CACHE_SIZE'],
+                                                 ttl=app.config['RECIPE_CACHE_TTL'],
+                                                 db_path=app.config['RECIPE_CACHE_DB'],
+                                                 stale_ttl=app.config['RECIPE_CACHE_STALE_TTL'])
+
+    # Pre-generated results for common ingredient sets
+    store_path = app.config['RECIPE_STORE_PATH']
+    min_similarity = app.config['RECIPE_STORE_MIN_SIMILARITY']
+    app.extensions['recipe_store'] = (RecipeStore.from_file(store_path, min_similarity)
+                                      if store_path else RecipeStore(min_similarity=min_similarity))
+    app.cli.add_command(precompute_command)
+
+    # Coalesce concurrent identical generation requests
+    app.extensions['single_flight'] = SingleFlight(lock_dir=app.config['SINGLE_FLIGHT_LOCK_DIR'])
+
+    # Rate limits and the bounded queue in front of upstream calls
+    app.extensions['admission'] = AdmissionController(AdmissionLimits(
+        rate=app.config['ADMISSION_RATE'],
+        burst=app.config['ADMISSION_BURST'],
+        client_rate=app.config['ADMISSION_CLIENT_RATE'],
+        client_burst=app.config['ADMISSION_CLIENT_BURST'],
+        max_concurrent=app.config['UPSTREAM_CONCURRENCY'],
+        queue_size=app.config['UPSTREAM_QUEUE_SIZE'],
+        max_wait=app.config['UPSTREAM_QUEUE_TIMEOUT']))
+
+    # Make upstream I/O cooperative when served by gevent workers
+    init_worker()
+
+    # Backend that generates recipes, behind timeouts, retries and a circuit breaker
+    app.extensions['llm'] = ResilientBackend(
+        create_backend(app.config),
+        RetryPolicy(timeout=app.config['LLM_TIMEOUT'],
+                    deadline=app.config['LLM_DEADLINE'],
+                    retries=app.config['LLM_RETRIES'],
+                    backoff=app.config['LLM_RETRY_BACKOFF'],
+                    hedge_delay=app.config['LLM_HEDGE_DELAY'],
+                    hedge_workers=app.config['UPSTREAM_CONCURRENCY']),
+        breaker=CircuitBreaker(failure_threshold=app.config['CIRCUIT_BREAKER_THRESHOLD'],
+                               reset_timeout=app.config['CIRCUIT_BREAKER_RESET']))
+
+    # Thread pool for fanning out concurrent Gemini calls
+    app.extensions['generation_executor'] = ThreadPoolExecutor(
+        max_workers=app.config['GENERATION_THREADS'] or default_generation_threads(),
+        thread_name_prefix='generation')
+
+    # Persistent queue of generation jobs, run off the request threads
+    app.extensions['job_queue'] = JobQueue(
+        job_runner(app),
+        db_path=app.config['JOB_DB'] or os.path.join(app.instance_path, 'jobs.sqlite3'),
+        limits=JobLimits(workers=app.config['JOB_WORKERS'],
+                         max_pending=app.config['JOB_QUEUE_SIZE'],
+                         stale_after=app.config['JOB_STALE_AFTER'],
+                         result_ttl=app.config['JOB_RESULT_TTL']))
+
+    # Request timing hooks and the /metrics registry
+    init_metrics(app)
+
+    # Opt-in request profiling and slow-request traces
+    init_profiling(app)
+
+    # Compress large text responses
+    init_compression(app)
+
     # Register Blueprints
     app.register_blueprint(main_blueprint)
+    app.register_blueprint(batch_blueprint)
+    app.register_blueprint(jobs_blueprint)
+    app.register_blueprint(profiling_blueprint)
+    app.cli.add_command(generate_batch_command)
 
     return app
 
@@ -0,0 +1,179 @@
+"""
+This module decides which generation requests may call the LLM provider and when.
+
+Requests that miss the cache first pass a global and a per-client token bucket,
+then wait in a bounded queue for one of a fixed number of upstream slots.
+Anything over the limits is rejected at once with a retry hint, so a burst
+degrades into quick 429s instead of exhausting the provider quota for everyone.
+"""
+
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from cachetools import LRUCache
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request is over a rate limit or the upstream queue is saturated.
+    """
+
+    def __init__(self, reason, retry_after):
+        super().__init__("Too many recipe requests, please retry shortly")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Refill rate tokens per second up to capacity; each request takes one.
+    """
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def wait_time(self):
+        """
+        Return 0 if a token is available, else the seconds until one is; take nothing.
+
+        Not thread-safe; callers hold the controller's lock.
+        """
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        """
+        Take a token and return 0, or return the seconds until one is available.
+
+        Not thread-safe; callers hold the controller's lock.
+        """
+        wait_for = self.wait_time()
+        if not wait_for:
+            self.tokens -= 1
+        return wait_for
+
+
+# Limits of an AdmissionController; a rate or max_concurrent of None disables that limit
+AdmissionLimits = namedtuple('AdmissionLimits', ['rate', 'burst', 'client_rate', 'client_burst',
+                                                 'max_concurrent', 'queue_size', 'max_wait',
+                                                 'max_clients'],
+                             defaults=[None, None, None, None, None, 0, 0.0, 10000])
+
+
+class AdmissionController: # pylint: disable=too-many-instance-attributes
+    """
+    Rate limits and upstream concurrency for generation requests, set by limits.
+
+    rate/burst configure the bucket shared by all clients and
+    client_rate/client_burst the bucket per client (the most recently seen
+    max_clients are tracked); a rate of None disables that bucket. At most
+    max_concurrent upstream calls run at once; up to queue_size more wait for
+    a slot for at most max_wait seconds.
+    """
+
+    def __init__(self, limits=AdmissionLimits(), clock=time.monotonic):
+        self.limits = limits
+        self.clock = clock
+        rate = limits.rate
+        self._global = TokenBucket(rate, limits.burst or rate, clock) if rate else None
+        self._clients = LRUCache(maxsize=limits.max_clients)
+        self._slots = (threading.BoundedSemaphore(limits.max_concurrent)
+                       if limits.max_concurrent else None)
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = {"global_rate": 0, "client_rate": 0, "queue_full": 0,
+                         "queue_timeout": 0}
+        self.in_flight = 0
+        self.waiting = 0
+        self.wait_seconds = 0.0
+
+    def _reject(self, reason, retry_after):
+        self.rejected[reason] += 1
+        return AdmissionRejected(reason, retry_after)
+
+    def check_rate(self, client=None):
+        """
+        Take a token from the global bucket and client's bucket, or raise AdmissionRejected.
+
+        A client over its own limit is rejected before the shared bucket is
+        touched, so it cannot use up tokens other clients would be admitted with.
+        """
+        with self._lock:
+            bucket = None
+            rate = self.limits.client_rate
+            if client is not None and rate:
+                bucket = self._clients.get(client)
+                if bucket is None:
+                    bucket = self._clients[client] = TokenBucket(
+                        rate, self.limits.client_burst or rate, self.clock)
+                wait_for = bucket.wait_time()
+                if wait_for:
+                    raise self._reject("client_rate", wait_for)
+            if self._global is not None:
+                wait_for = self._global.take()
+                if wait_for:
+                    raise self._reject("global_rate", wait_for)
+            if bucket is not None:
+                bucket.take()
+
+    def acquire(self):
+        """
+        Wait for an upstream slot, or raise AdmissionRejected if the queue is full or slow.
+        """
+        # The slot is given back by release(), when the caller is done with it
+        # pylint: disable=consider-using-with
+        if self._slots is not None and not self._slots.acquire(blocking=False):
+            with self._lock:
+                if self.waiting >= self.limits.queue_size:
+                    raise self._reject("queue_full", 1.0)
+                self.waiting += 1
+            start = time.monotonic()
+            acquired = self._slots.acquire(timeout=self.limits.max_wait)
+            with self._lock:
+                self.waiting -= 1
+                self.wait_seconds += time.monotonic() - start
+                if not acquired:
+                    raise self._reject("queue_timeout", 1.0)
+        with self._lock:
+            self.admitted += 1
+            self.in_flight += 1
+
+    def release(self):
+        """
+        Return an upstream slot taken by acquire().
+        """
+        with self._lock:
+            self.in_flight -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    @contextmanager
+    def slot(self):
+        """
+        Hold an upstream slot for the duration of the block.
+        """
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        """
+        Return admission counters, rejections by reason and current queue depth.
+        """
+        with self._lock:
+            return {
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "wait_seconds": self.wait_seconds,
+            }
@@ -0,0 +1,247 @@
+"""
+This module generates recipes for many ingredient lists at once.
+
+Input is JSON Lines, one ingredient list per line, either a bare list or an
+object with "ingredients" and an optional "id". Items are generated with
+bounded concurrency and each result is emitted as soon as it is ready, so
+output order follows completion, not input. The same loop backs the batch
+endpoint and the "flask generate-batch" command; the command appends to its
+output file and skips ids already there, so a crashed run resumes.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import click
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+from flask.cli import with_appcontext
+
+from .generation import canonical_ingredients, client_id, generate_json
+
+batch_blueprint = Blueprint('batch', __name__)
+
+
+def parse_batch_line(line, line_number):
+    """
+    Return {"id", "ingredients"} for one input line, or None for a blank line.
+    """
+    line = line.strip()
+    if not line:
+        return None
+    data = json.loads(line)
+    if isinstance(data, list):
+        data = {"ingredients": data}
+    if not isinstance(data, dict) or not isinstance(data.get("ingredients"), list):
+        raise ValueError(f"Line {line_number}: expected a list or an object with 'ingredients'")
+    return {"id": str(data.get("id", line_number)), "ingredients": data["ingredients"]}
+
+
+class BatchStats:
+    """
+    Progress and throughput of one batch run.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.completed = 0
+        self.failed = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, result, generations):
+        """
+        Count one finished item and the tokens its generations reported.
+        """
+        with self._lock:
+            if "error" in result:
+                self.failed += 1
+            else:
+                self.completed += 1
+            for generation in generations:
+                self.prompt_tokens += generation.prompt_tokens or 0
+                self.output_tokens += generation.output_tokens or 0
+
+    def summary(self):
+        """
+        Return counts, elapsed time, recipes per minute and output tokens per second.
+        """
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {
+                "completed": self.completed,
+                "failed": self.failed,
+                "elapsed_seconds": round(elapsed, 3),
+                "recipes_per_minute": round(self.completed / elapsed * 60, 1) if elapsed else 0.0,
+                "tokens_per_second": round(self.output_tokens / elapsed, 1) if elapsed else 0.0,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+            }
+
+
+def run_batch(items, submit, concurrency, stats, client=None):
+    """
+    Generate a recipe for each item, yielding result dicts as they complete.
+
+    submit(func, *args) schedules work and returns a future; at most
+    concurrency items are in flight, so items is consumed lazily and a large
+    input never sits in memory. Each item that misses the cache is charged to
+    client's rate limit, and one over it fails. A failed item yields {"id", "error"}.
+    """
+    def generate(item):
+        usage = []
+        try:
+            ingredients = canonical_ingredients(item["ingredients"])
+            if not ingredients:
+                raise ValueError("No ingredients provided")
+            result = {"id": item["id"], "ingredients": ingredients,
+                      "recipe": generate_json('recipe', ingredients, usage=usage,
+                                              client=client)}
+        except Exception as e: # pylint: disable=broad-except
+            result = {"id": item["id"], "error": str(e)}
+        stats.record(result, usage)
+        return result
+
+    pending = set()
+    items = iter(items)
+    exhausted = False
+    while pending or not exhausted:
+        while not exhausted and len(pending) < concurrency:
+            item = next(items, None)
+            if item is None:
+                exhausted = True
+            else:
+                pending.add(submit(generate, item))
+        if pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def _submitter(app, executor):
+    def submit(func, *args):
+        def run():
+            with app.app_context():
+                return func(*args)
+        return executor.submit(run)
+    return submit
+
+
+@batch_blueprint.route('/api/generate-recipe/batch', methods=['POST'])
+def generate_batch():
+    """
+    Generate recipes for a JSON Lines body and stream results back as JSON Lines.
+
+    The last line is a {"event": "summary"} object with the run's throughput.
+    Items are not checkpointed server-side; a client resumes by resubmitting
+    the ids missing from what it received.
+    """
+    try:
+        items = [item for number, line in
+                 enumerate(request.get_data(as_text=True).splitlines(), start=1)
+                 if (item := parse_batch_line(line, number)) is not None]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if not items:
+        return jsonify({"error": "No ingredients provided"}), 400
+    if len(items) > current_app.config['BATCH_MAX_ITEMS']:
+        return jsonify({"error": f"At most {current_app.config['BATCH_MAX_ITEMS']} items "
+                                 f"per batch"}), 400
+
+    app = current_app._get_current_object() # pylint: disable=protected-access
+    submit = _submitter(app, app.extensions['generation_executor'])
+    stats = BatchStats()
+    # Items run outside this request, so they are charged to its client explicitly
+    client = client_id()
+
+    def lines():
+        for result in run_batch(items, submit, app.config['BATCH_CONCURRENCY'], stats, client):
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"event": "summary", **stats.summary()}) + "\n"
+
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _completed_ids(path):
+    """
+    Return the ids with a recipe in an existing output file.
+    """
+    done = set()
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if "recipe" in result:
+                    done.add(result["id"])
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _ends_mid_line(path):
+    """
+    Return True if a non-empty file does not end with a newline.
+    """
+    with open(path, 'rb') as f:
+        if f.seek(0, os.SEEK_END) == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b"\n"
+
+
+@click.command('generate-batch')
+@click.argument('input_path', type=click.Path(exists=True, dir_okay=False))
+@click.argument('output_path', type=click.Path(dir_okay=False))
+@click.option('--concurrency', type=int, default=None,
+              help='Concurrent generations (default: BATCH_CONCURRENCY).')
+@with_appcontext
+def generate_batch_command(input_path, output_path, concurrency):
+    """
+    Generate recipes for the JSON Lines INPUT_PATH, appending results to OUTPUT_PATH.
+
+    Ids already completed in OUTPUT_PATH are skipped, so rerunning after a
+    crash or with failures picks up where the last run stopped.
+    """
+    app = current_app._get_current_object() # pylint: disable=protected-access
+    concurrency = concurrency or app.config['BATCH_CONCURRENCY']
+    done = _completed_ids(output_path)
+    stats = BatchStats()
+
+    def pending_items():
+        with open(input_path, encoding='utf-8') as f:
+            for number, line in enumerate(f, start=1):
+                item = parse_batch_line(line, number)
+                if item is not None and item["id"] not in done:
+                    yield item
+
+    with open(output_path, 'a', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as executor:
+        if _ends_mid_line(output_path):
+            out.write("\n")
+        for result in run_batch(pending_items(), _submitter(app, executor), concurrency, stats):
+            # Each finished item is durable before the next is reported
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            if "error" in result:
+                click.echo(f"{result['id']}: {result['error']}", err=True)
+            progress = stats.summary()
+            if (progress["completed"] + progress["failed"]) % 10 == 0:
+                click.echo(f"{progress['completed']} done, {progress['failed']} failed, "
+                           f"{progress['recipes_per_minute']} recipes/min", err=True)
+
+    summary = stats.summary()
+    click.echo(f"Generated {summary['completed']} recipes ({summary['failed']} failed, "
+               f"{len(done)} already done) in {summary['elapsed_seconds']}s: "
+               f"{summary['recipes_per_minute']} recipes/min, "
+               f"{summary['tokens_per_second']} output tokens/s")
+    if summary['failed']:
+        sys.exit(1)
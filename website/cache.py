@@ -0,0 +1,156 @@
+"""
+This module provides the response cache for generated recipes.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from cachetools import LRUCache
+
+from .storage import connect
+
+
+def normalize_ingredients(ingredients):
+    """
+    Return the ingredient list as a sorted tuple of distinct, lowercased names.
+    """
+    names = {" ".join(str(ingredient).lower().split()) for ingredient in ingredients}
+    names.discard("")
+    return tuple(sorted(names))
+
+
+def cache_key(kind, ingredients, generation_config):
+    """
+    Build a stable cache key from the endpoint kind, ingredient set and generation settings.
+    """
+    payload = json.dumps(
+        [kind, normalize_ingredients(ingredients), generation_config],
+        sort_keys=True, separators=(',', ':'),
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class RecipeCache: # pylint: disable=too-many-instance-attributes
+    """
+    Two-tier TTL cache for generated recipes.
+
+    The first tier is a per-process LRU bounded by max_entries. The optional
+    second tier is a SQLite file shared by every worker on the host, so entries
+    survive restarts and a recipe generated by one worker is a hit in the others.
+    Expired entries are kept for a further stale_ttl seconds; get() ignores them
+    but get_stale() returns them, for use when the model is unavailable.
+    Rows too old even for that are deleted at startup and every purge_every
+    writes of each process.
+    """
+
+    purge_every = 1000
+
+    def __init__(self, max_entries=512, ttl=3600, db_path=None, stale_ttl=86400):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.db_path = db_path
+        # key -> (expires_at, value)
+        self._memory = LRUCache(maxsize=max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._writes = 0
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            with connect(self.db_path) as db:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS recipe_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+            self.purge_expired()
+
+    def get(self, key):
+        """
+        Return the cached value for key, or None on a miss.
+        """
+        value = self._memory_get(key, time.time())
+        if value is None and self.db_path:
+            entry = self._disk_get(key, time.time())
+            if entry is not None:
+                value = entry[1]
+                with self._lock:
+                    self._memory[key] = entry
+                    self.disk_hits += 1
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def get_stale(self, key):
+        """
+        Return the value for key even if it has expired, or None if there is none.
+        """
+        oldest = time.time() - self.stale_ttl
+        value = self._memory_get(key, oldest)
+        if value is None and self.db_path:
+            entry = self._disk_get(key, oldest)
+            value = entry[1] if entry else None
+        return value
+
+    def _memory_get(self, key, expires_after):
+        with self._lock:
+            entry = self._memory.get(key)
+        if entry is None or entry[0] <= expires_after:
+            return None
+        return entry[1]
+
+    def set(self, key, value):
+        """
+        Store value under key in every tier.
+        """
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+        if self.db_path:
+            with connect(self.db_path) as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO recipe_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value), expires_at),
+                )
+            with self._lock:
+                self._writes += 1
+                purge = self._writes % self.purge_every == 0
+            if purge:
+                self.purge_expired()
+
+    def _disk_get(self, key, expires_after):
+        with connect(self.db_path) as db:
+            row = db.execute(
+                "SELECT expires_at, value FROM recipe_cache WHERE key = ? AND expires_at > ?",
+                (key, expires_after),
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def purge_expired(self):
+        """
+        Delete rows from the disk tier that are too old to serve even as stale.
+        """
+        if self.db_path:
+            with connect(self.db_path) as db:
+                db.execute("DELETE FROM recipe_cache WHERE expires_at <= ?",
+                           (time.time() - self.stale_ttl,))
+
+    def stats(self):
+        """
+        Return hit/miss counters and the in-memory size.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "size": len(self._memory),
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,142 @@
+"""
+This module maps free-typed ingredient lists to canonical catalog names.
+
+"Tomatoes", "tomato " and "roma tomato" all become "Tomato" before a prompt
+or cache key is built, so differently typed requests for the same ingredients
+share one cached generation and prompts stay short. Each name is matched, in
+order, by its singularized key against the catalog, against an alias table,
+with leading descriptors such as "fresh" removed, and finally by a small edit
+distance to a suggested catalog name. Typos are only corrected in names of
+at least six letters and when exactly one catalog name is that close, as
+short words are often other real ingredients ("sake" is not "Sage"). Names
+that match nothing are kept as typed (lowercased); junk entries and
+duplicates are dropped, and the list is capped.
+"""
+
+import json
+import logging
+import threading
+from cachetools import LRUCache
+
+from .ingredients import WORD, edit_distance, ingredient_key, typo_tolerance
+
+logger = logging.getLogger(__name__)
+
+# Entries longer than this are not ingredient names and only pad the prompt
+MAX_NAME_LENGTH = 60
+
+# Words that describe how an ingredient is bought or prepared, not which one it is
+DESCRIPTORS = frozenset({
+    "chopped", "cooked", "diced", "dried", "fresh", "freshly", "frozen", "grated", "large",
+    "leftover", "medium", "minced", "organic", "raw", "ripe", "sliced", "small", "whole",
+})
+
+# Suggestions compared with a name that matched neither the catalog nor an alias
+FUZZY_CANDIDATES = 5
+
+# Shortest name, in characters of its key, whose typos are corrected
+FUZZY_MIN_KEY_LENGTH = 6
+
+# Resolved names remembered per catalog version; fuzzy matches cost a suggest() each
+RESOLVED_CACHE_SIZE = 4096
+
+
+def load_aliases(path):
+    """
+    Read a JSON object of alias -> catalog name, keyed by ingredient_key(); {} if missing.
+    """
+    if not path:
+        return {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            aliases = json.load(f)
+    except FileNotFoundError:
+        logger.warning("Ingredient alias file %s not found", path)
+        return {}
+    return {ingredient_key(alias): name for alias, name in aliases.items()}
+
+
+def _is_typo_of(candidate, key):
+    """
+    Return True if key could be candidate mistyped: the same number of words, each with
+    the same first letter, within the suggestion index's typo tolerance.
+    """
+    candidate_words, words = candidate.split(), key.split()
+    return (len(candidate_words) == len(words)
+            and all(a[0] == b[0] for a, b in zip(candidate_words, words))
+            and edit_distance(candidate, key) <= typo_tolerance(key))
+
+
+class Canonicalizer:
+    """
+    Turns request ingredient lists into short, duplicate-free lists of canonical names.
+
+    The catalog is read on every call, so a hot-reloaded catalog takes effect
+    at once; resolved names are remembered until it changes. max_items caps
+    the returned list; None leaves it unbounded.
+    """
+
+    def __init__(self, catalog, aliases=None, max_items=None):
+        self.catalog = catalog
+        self.aliases = aliases or {}
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._resolved_index = None
+        self._resolved = LRUCache(maxsize=RESOLVED_CACHE_SIZE)
+
+    def canonicalize(self, ingredients):
+        """
+        Return the canonical names of ingredients in request order, without duplicates.
+        """
+        index = self.catalog.index
+        names = []
+        seen = set()
+        for ingredient in ingredients:
+            if not isinstance(ingredient, str):
+                continue
+            text = " ".join(ingredient.split())
+            if len(text) > MAX_NAME_LENGTH or not WORD.search(text):
+                continue
+            name = self._resolve(text, index)
+            key = ingredient_key(name)
+            if key in seen:
+                continue
+            seen.add(key)
+            names.append(name)
+            if len(names) == self.max_items:
+                break
+        return names
+
+    def _resolve(self, text, index):
+        with self._lock:
+            if index is not self._resolved_index:
+                self._resolved_index = index
+                self._resolved.clear()
+            name = self._resolved.get(text)
+        if name is None:
+            name = self.canonical_name(text, index)
+            with self._lock:
+                if index is self._resolved_index:
+                    self._resolved[text] = name
+        return name
+
+    def canonical_name(self, text, index):
+        """
+        Return the catalog name text refers to, or text lowercased if it matches none.
+        """
+        key = ingredient_key(text)
+        words = key.split()
+        while len(words) > 1 and words[0] in DESCRIPTORS:
+            words.pop(0)
+        for candidate in dict.fromkeys((key, " ".join(words))):
+            if index is not None and candidate in index.canonical_names:
+                return index.canonical_names[candidate]
+            if candidate in self.aliases:
+                return self.aliases[candidate]
+        if index is not None and len(key) >= FUZZY_MIN_KEY_LENGTH:
+            close = {suggestion for suggestion in index.suggest(text, FUZZY_CANDIDATES)
+                     if _is_typo_of(ingredient_key(suggestion), key)}
+            # With several names that close, guessing would change the request
+            if len(close) == 1:
+                return close.pop()
+        return text.lower()
@@ -0,0 +1,111 @@
+"""
+This module compresses response bodies in the encoding a client accepts.
+
+Bodies that change only when their source changes (the ingredient catalog) are
+compressed once, at the highest levels, when they are built, so a request
+only picks bytes. Other responses above a size threshold, such as generated
+recipes, are compressed as they leave the app at a fast level. brotli is used
+when the optional brotli package is installed.
+"""
+
+import gzip
+import hashlib
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip alone is offered without it
+    brotli = None
+
+
+class PrecompressedBody: # pylint: disable=too-few-public-methods
+    """
+    A response body with its content hash and every encoding a client may ask for.
+    """
+
+    def __init__(self, body):
+        self.version = hashlib.sha256(body).hexdigest()[:16]
+        self.encodings = {"identity": body,
+                          "gzip": gzip.compress(body, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(body, quality=11)
+
+    def response(self, mimetype, cache_control):
+        """
+        Return a conditional response in the best encoding the request accepts.
+
+        Each encoding has its own strong ETag, so a cache validating one
+        representation never receives another's bytes.
+        """
+        encoding = request.accept_encodings.best_match(
+            [name for name in ("br", "gzip") if name in self.encodings], default="identity")
+        response = Response(self.encodings[encoding], mimetype=mimetype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = cache_control
+        response.set_etag(f"{self.version}-{encoding}")
+        return response.make_conditional(request)
+
+
+# Text types worth compressing; images and other binary formats are already compact
+COMPRESSIBLE_MIMETYPES = frozenset({
+    "application/json", "application/javascript", "text/css", "text/html", "text/plain",
+})
+
+
+def _compressible(response):
+    """
+    Return True if response is a complete, unencoded text body that may be compressed.
+
+    Partial or bodiless responses, streamed or file responses (which would have
+    to be buffered), responses that already have a Content-Encoding, and
+    non-text types are not.
+    """
+    has_full_body = response.status_code >= 200 and response.status_code not in (204, 206, 304)
+    buffered = not (response.direct_passthrough or response.is_streamed)
+    return (has_full_body and buffered and "Content-Encoding" not in response.headers
+            and response.mimetype in COMPRESSIBLE_MIMETYPES)
+
+
+def compress_response(response, min_size, level=6, brotli_quality=4):
+    """
+    Compress response in place with the best encoding the request accepts.
+
+    Responses smaller than min_size bytes, and those _compressible() rejects,
+    are left alone. A compressed response's ETag is made weak, as its bytes
+    differ per encoding.
+    """
+    if not _compressible(response):
+        return response
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = request.accept_encodings.best_match(
+        ["br", "gzip"] if brotli is not None else ["gzip"], default="identity")
+    if encoding == "identity":
+        return response
+    if encoding == "br":
+        response.set_data(brotli.compress(body, quality=brotli_quality))
+    else:
+        response.set_data(gzip.compress(body, compresslevel=level, mtime=0))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """
+    Compress app's responses above COMPRESS_MIN_SIZE bytes; None disables it.
+    """
+    min_size = app.config['COMPRESS_MIN_SIZE']
+    if min_size is None:
+        return
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, min_size, level=app.config['COMPRESS_LEVEL'],
+                                 brotli_quality=app.config['COMPRESS_BROTLI_QUALITY'])
@@ -0,0 +1,103 @@
+"""
+This module generates recipe JSON through the cache, store, admission and model layers.
+"""
+
+from flask import current_app, has_request_context, request
+from .cache import cache_key
+from .parsing import parse_model_json
+from .prompts import prompts_for
+from .resilience import CircuitOpenError
+
+def client_id():
+    """
+    Identify the caller for per-client rate limits; None outside a request.
+    """
+    return request.remote_addr if has_request_context() else None
+
+def canonical_ingredients(ingredients):
+    """
+    Return ingredients as canonical catalog names, deduplicated and capped.
+    """
+    return current_app.extensions['canonicalizer'].canonicalize(ingredients)
+
+def request_ingredients(data):
+    """
+    Return the canonical ingredients of a JSON request body.
+
+    Raises ValueError unless the body is an object whose "ingredients", if
+    present, is a list of strings.
+    """
+    ingredients = data.get('ingredients', []) if isinstance(data, dict) else None
+    if not isinstance(ingredients, list) or not all(isinstance(name, str) for name in ingredients):
+        raise ValueError("ingredients must be a list of strings")
+    return canonical_ingredients(ingredients)
+
+def generate_json(kind, ingredients, usage=None, client=None, rate_checked=False):
+    """
+    Return the JSON the model generates for a kind of prompt, serving repeats from the cache.
+
+    Generations made on behalf of this call are appended to usage, if given,
+    so callers can account for the tokens they spent. A cache miss is charged
+    to client's rate limit, by default the caller of the current request,
+    unless rate_checked says the caller already was (a queued job).
+    """
+    build_prompt, generation_config = prompts_for(current_app.config['STRUCTURED_OUTPUT'])[kind]
+
+    # Serve repeated ingredient sets from the cache
+    metrics = current_app.extensions['metrics']
+    cache = current_app.extensions['recipe_cache']
+    with metrics.stage('cache_lookup'):
+        key = cache_key(kind, ingredients, generation_config)
+        cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    # Answer common ingredient sets from the pre-generated store
+    with metrics.stage('store_lookup'):
+        stored = current_app.extensions['recipe_store'].lookup(kind, ingredients)
+    if stored is not None:
+        return stored
+
+    admission = current_app.extensions['admission']
+    if not rate_checked:
+        admission.check_rate(client_id() if client is None else client)
+
+    def produce():
+        with metrics.stage('prompt_build'):
+            prompt = build_prompt(ingredients)
+
+        # Call the configured LLM backend once an upstream slot is free
+        with admission.slot(), metrics.stage('upstream'):
+            generation = current_app.extensions['llm'].generate(prompt, generation_config)
+        metrics.record_generation(kind, generation)
+        if usage is not None:
+            usage.append(generation)
+
+        # Extract the JSON object from any fences or surrounding prose and validate it
+        with metrics.stage('parse'):
+            result = parse_model_json(generation.text, kind)
+        cache.set(key, result)
+        return result
+
+    # Concurrent requests for the same key share one upstream call
+    try:
+        return current_app.extensions['single_flight'].do(key, produce,
+                                                          recheck=lambda: cache.get(key))
+    except CircuitOpenError:
+        # While the model is unavailable an expired answer beats none
+        stale = cache.get_stale(key)
+        if stale is None:
+            raise
+        return stale
+
+def submit_in_app_context(func, *args):
+    """
+    Run func on the app's generation thread pool inside an application context.
+    """
+    app = current_app._get_current_object() # pylint: disable=protected-access
+
+    def run():
+        with app.app_context():
+            return func(*args)
+
+    return app.extensions['generation_executor'].submit(run)
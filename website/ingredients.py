@@ -0,0 +1,504 @@
+"""
+This module provides the in-memory ingredient index used for autocomplete suggestions.
+"""
+
+import bisect
+import functools
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+from array import array
+
+from .compression import PrecompressedBody
+
+logger = logging.getLogger(__name__)
+
+# Shortest query the suggestion endpoint answers
+MIN_QUERY_LENGTH = 2
+
+# Results kept per 2- and 3-letter key for the shortest queries
+SHORT_QUERY_RESULTS = 32
+
+# Suggestions per response; responses for every query of up to 3 characters are precomputed
+SUGGESTION_LIMIT = 10
+
+# Sorts after any character a query can contain, to bound prefix ranges
+_LAST_CHAR = "\U0010ffff"
+
+# Words of a lowercased name; only alphabetic words of FUZZY_MIN_LENGTH or more are
+# matched with typos, and the deletion index covers their first FUZZY_PREFIX_LENGTH letters
+WORD = re.compile(r"[^\W\d_]+")
+FUZZY_MIN_LENGTH = 4
+FUZZY_PREFIX_LENGTH = 7
+
+
+def _add_short_keys(keys, name, offset, position):
+    """
+    Record position under the 2- and 3-letter keys starting at offset in name.
+    """
+    for size in (2, 3):
+        if offset + size <= len(name):
+            entries = keys.setdefault(name[offset:offset + size], [])
+            if len(entries) < SHORT_QUERY_RESULTS and (not entries or entries[-1] != position):
+                entries.append(position)
+
+
+def typo_tolerance(word):
+    """
+    Return the edit distance tolerated for a query word of this length.
+    """
+    if len(word) < FUZZY_MIN_LENGTH:
+        return 0
+    return 1 if len(word) < 8 else 2
+
+
+def _deletes(word, distance):
+    """
+    Return word and every string obtained by deleting up to distance characters from it.
+    """
+    variants = {word}
+    frontier = {word}
+    for _ in range(distance):
+        frontier = {variant[:i] + variant[i + 1:] for variant in frontier
+                    for i in range(len(variant))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a, b):
+    """
+    Return the optimal string alignment distance: insertions, deletions,
+    substitutions and transpositions of adjacent characters each cost one.
+    """
+    if a == b:
+        return 0
+    # Rows i - 2 and i - 1; transpositions only read the older one from i = 2 on
+    previous = list(range(len(b) + 1))
+    before_previous = previous
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                current[j] = min(current[j], before_previous[j - 2] + 1)
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+def prefix_distance(query, word):
+    """
+    Return the edit distance from query to word or to word's prefix of the same length,
+    so a misspelled word still matches while it is being typed.
+    """
+    distance = edit_distance(query, word)
+    if len(word) > len(query):
+        distance = min(distance, edit_distance(query, word[:len(query)]))
+    return distance
+
+
+def _singular(word):
+    """
+    Return a light singular form of an English word, so plural and singular names match.
+
+    Both sides of a comparison go through the same rules, so the result only
+    has to be consistent, not a dictionary form ("molasses" -> "molass").
+    """
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("oes", "ches", "shes", "sses", "xes", "zes")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def ingredient_key(name):
+    """
+    Return the matching key of an ingredient name: its lowercase words, singularized.
+
+    Case, punctuation, digits and plurals are ignored, so "Tomatoes", "tomato"
+    and "sun-dried tomato" key as "tomato" and "sun dried tomato".
+    """
+    return " ".join(_singular(word) for word in WORD.findall(name.lower()))
+
+
+def _compact_json(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def _grams(text, size):
+    """
+    Return the set of distinct character n-grams of the given size in text.
+    """
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _posting_lists(names):
+    """
+    Return the positions (ascending) of the names containing each bigram and trigram.
+    """
+    postings = {}
+    for position, name in enumerate(names):
+        for gram in _grams(name, 2) | _grams(name, 3):
+            postings.setdefault(gram, []).append(position)
+    return {gram: array('I', positions) for gram, positions in postings.items()}
+
+
+class IngredientIndex: # pylint: disable=too-many-instance-attributes
+    """
+    Read-only ingredient catalog with prefix, word-start, substring and typo indexes.
+
+    Names are lowercased once at build time. Substring lookups walk the posting
+    list of the rarest bigram/trigram in the query instead of scanning the
+    whole catalog. Prefix and word-start lookups bisect sorted names and
+    sorted word starts, with the first matches of every 2- and 3-letter key
+    kept ready because short queries match the most names. Typos are found
+    with a SymSpell-style index mapping deletions of each word's first letters
+    back to the word, so candidates come from a few dict lookups rather than
+    an edit distance against every name.
+    """
+
+    def __init__(self, ingredients):
+        self.ingredients = list(ingredients)
+        self._lowered = [name.lower() for name in self.ingredients]
+
+        # Sorted lowercase names with their catalog positions for prefix lookups
+        ordered = sorted(range(len(self._lowered)), key=self._lowered.__getitem__)
+        self._sorted_names = [self._lowered[position] for position in ordered]
+        self._sorted_positions = array('I', ordered)
+
+        # Posting lists of catalog positions (ascending) keyed by bigram and trigram
+        self._postings = _posting_lists(self._lowered)
+
+        (self._word_starts, self._short_prefixes, self._short_starts,
+         self._word_positions) = self._word_indexes()
+        self._sorted_words = sorted(self._word_positions)
+
+        # Deletion variants of each word's first letters -> words
+        self._fuzzy = {}
+        for word in self._word_positions:
+            if len(word) >= FUZZY_MIN_LENGTH:
+                for variant in _deletes(word[:FUZZY_PREFIX_LENGTH], 2):
+                    self._fuzzy.setdefault(variant, []).append(word)
+
+        # Response bodies for 2- and 3-character queries. Every match of a query that
+        # short contains it, so only the indexed n-grams can have any suggestions
+        self._short_bodies = {gram: _compact_json(self.suggest(gram))
+                              for gram in self._postings if gram == " ".join(gram.split())}
+
+    def _word_indexes(self):
+        """
+        Return every word after the first as position << 8 | offset, sorted by the text
+        from there on; the first SHORT_QUERY_RESULTS names per 2- and 3-letter prefix and
+        per word start; and the names containing each word.
+        """
+        starts, short_prefixes, short_starts, word_positions = [], {}, {}, {}
+        for position, name in enumerate(self._lowered):
+            _add_short_keys(short_prefixes, name, 0, position)
+            for match in WORD.finditer(name):
+                offset = match.start()
+                if 0 < offset < 256:
+                    starts.append(position << 8 | offset)
+                    _add_short_keys(short_starts, name, offset, position)
+                entries = word_positions.setdefault(match.group(), [])
+                if not entries or entries[-1] != position:
+                    entries.append(position)
+        starts.sort(key=self._word_start_text)
+        return (array('Q', starts),
+                {key: array('I', positions) for key, positions in short_prefixes.items()},
+                {key: array('I', positions) for key, positions in short_starts.items()},
+                {word: array('I', positions) for word, positions in word_positions.items()})
+
+    def _word_start_text(self, entry):
+        return self._lowered[entry >> 8][entry & 0xFF:]
+
+    @classmethod
+    def from_file(cls, path):
+        """
+        Build an index from a JSON file containing a list of ingredient names.
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.ingredients)
+
+    @functools.cached_property
+    def payload(self):
+        """
+        The catalog as compact JSON, precompressed and versioned by its content hash.
+
+        Built on first use so indexes made for lookups alone never pay for it;
+        IngredientCatalog builds it before publishing a new index.
+        """
+        body = json.dumps(self.ingredients, ensure_ascii=False, separators=(',', ':'))
+        return PrecompressedBody(body.encode('utf-8'))
+
+    @functools.cached_property
+    def canonical_names(self):
+        """
+        Map of ingredient_key() to catalog name; the first name wins when keys collide.
+
+        Built on first use; IngredientCatalog builds it before publishing a new index.
+        """
+        names = {}
+        for name in self.ingredients:
+            names.setdefault(ingredient_key(name), name)
+        return names
+
+    def search(self, query, limit=10):
+        """
+        Return up to limit ingredients containing query, in catalog order.
+        """
+        query = query.lower()
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+        results = []
+        for position in self._substring_positions(query):
+            results.append(self.ingredients[position])
+            if len(results) == limit:
+                break
+        return results
+
+    def suggest(self, query, limit=10):
+        """
+        Return up to limit ingredients ranked by how well they match query.
+
+        Names starting with the query come first, then names with a later word
+        starting with it, then names containing it anywhere, then names whose
+        words are within a small edit distance of the query's longest word
+        (closest first). Ties keep catalog order.
+        """
+        query = " ".join(query.lower().split())
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+        results = []
+        seen = set()
+        for tier in (self._prefix_positions, self._word_start_positions,
+                     self._substring_positions, self._fuzzy_positions):
+            for position in tier(query, limit):
+                if position not in seen:
+                    seen.add(position)
+                    results.append(self.ingredients[position])
+                    if len(results) == limit:
+                        return results
+        return results
+
+    def suggestion_body(self, query, limit=SUGGESTION_LIMIT):
+        """
+        Return suggest(query, limit) as a compact JSON body, precomputed for short queries.
+        """
+        query = " ".join(query.lower().split())
+        if len(query) <= 3 and limit == SUGGESTION_LIMIT:
+            return self._short_bodies.get(query, b"[]")
+        return _compact_json(self.suggest(query, limit))
+
+    def _prefix_positions(self, query, limit):
+        if len(query) <= 3 and limit <= SHORT_QUERY_RESULTS:
+            return self._short_prefixes.get(query, ())
+        start = bisect.bisect_left(self._sorted_names, query)
+        end = bisect.bisect_left(self._sorted_names, query + _LAST_CHAR, start)
+        return (self._posting_walk(end - start, query, limit,
+                                   lambda position: self._lowered[position].startswith(query))
+                or heapq.nsmallest(limit, self._sorted_positions[start:end]))
+
+    def _word_start_positions(self, query, limit):
+        if len(query) <= 3 and limit <= SHORT_QUERY_RESULTS:
+            return self._short_starts.get(query, ())
+        start = bisect.bisect_left(self._word_starts, query, key=self._word_start_text)
+        end = bisect.bisect_left(self._word_starts, query + _LAST_CHAR, start,
+                                 key=self._word_start_text)
+        return (self._posting_walk(end - start, query, limit,
+                                   lambda position: self._has_word_start(position, query))
+                or heapq.nsmallest(limit, {entry >> 8 for entry in self._word_starts[start:end]}))
+
+    def _has_word_start(self, position, query):
+        name = self._lowered[position]
+        start = name.find(query, 1)
+        while start != -1:
+            if not name[start - 1].isalpha():
+                return True
+            start = name.find(query, start + 1)
+        return False
+
+    def _posting_walk(self, count, query, limit, matches):
+        """
+        Return the positions in catalog order of the count names that match, or None
+        if taking the first limit of the matching range directly is cheaper.
+
+        A large range is cheaper to find by walking the query's rarest n-gram
+        posting list (already in catalog order) and keeping the names that
+        match, when matches are dense enough that the walk stops early; the
+        range itself is then never materialized.
+        """
+        if count <= limit:
+            return None
+        postings = self._rarest_postings(query)
+        if postings is None or limit * len(postings) >= count ** 2:
+            return None
+        return (position for position in postings if matches(position))
+
+    def _rarest_postings(self, query):
+        size = 3 if len(query) >= 3 else 2
+        rarest = None
+        for gram in _grams(query, size):
+            postings = self._postings.get(gram)
+            if postings is None:
+                return None
+            if rarest is None or len(postings) < len(rarest):
+                rarest = postings
+        return rarest
+
+    def _substring_positions(self, query, limit=None): # pylint: disable=unused-argument
+        for position in self._rarest_postings(query) or ():
+            if query in self._lowered[position]:
+                yield position
+
+    def _typo_matches(self, word):
+        """
+        Return {catalog word: distance} for words within the tolerated distance of word.
+        """
+        max_typos = typo_tolerance(word)
+        if not max_typos:
+            return {}
+        candidates = set()
+        for variant in _deletes(word[:FUZZY_PREFIX_LENGTH], max_typos):
+            candidates.update(self._fuzzy.get(variant, ()))
+        matches = {}
+        for candidate in candidates:
+            distance = prefix_distance(word, candidate)
+            if distance <= max_typos:
+                matches[candidate] = distance
+        return matches
+
+    def _positions_like(self, query_word):
+        """
+        Return the set of names with a word starting with query_word or close to it.
+        """
+        words = list(self._typo_matches(query_word))
+        start = bisect.bisect_left(self._sorted_words, query_word)
+        end = bisect.bisect_left(self._sorted_words, query_word + _LAST_CHAR, start)
+        words += self._sorted_words[start:end]
+        positions = set()
+        for word in words:
+            positions.update(self._word_positions[word])
+        return positions
+
+    def _fuzzy_positions(self, query, limit): # pylint: disable=unused-argument
+        words = WORD.findall(query)
+        if not words:
+            return
+        primary = max(words, key=len)
+        by_distance = {}
+        for word, distance in self._typo_matches(primary).items():
+            by_distance.setdefault(distance, []).append(self._word_positions[word])
+        if not by_distance:
+            return
+        others = list(words)
+        others.remove(primary)
+        allowed = [self._positions_like(word) for word in others]
+        for distance in sorted(by_distance):
+            for position in heapq.merge(*by_distance[distance]):
+                if all(position in positions for positions in allowed):
+                    yield position
+
+    def starts_with(self, prefix, limit=10):
+        """
+        Return up to limit ingredients starting with prefix, in alphabetical order.
+        """
+        prefix = prefix.lower()
+        start = bisect.bisect_left(self._sorted_names, prefix)
+        results = []
+        for offset in range(start, min(start + limit, len(self._sorted_names))):
+            if not self._sorted_names[offset].startswith(prefix):
+                break
+            results.append(self.ingredients[self._sorted_positions[offset]])
+        return results
+
+
+class IngredientCatalog:
+    """
+    Owns the live IngredientIndex for a catalog file and hot-reloads it on change.
+
+    A background thread polls the file's (inode, size, mtime) signature. When it
+    changes, a new index is built on that thread and published with a single
+    attribute assignment, so requests either see the old index or the new one,
+    never a partially built one, and never pay for the rebuild.
+    """
+
+    def __init__(self, path, poll_interval=0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.index = None
+        self._signature = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.reload()
+
+    def _stat_signature(self):
+        """
+        Return a tuple identifying the current file contents, or None if it is missing.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def reload(self):
+        """
+        Rebuild and swap in the index if the file changed. Return True if swapped.
+        """
+        with self._lock:
+            signature = self._stat_signature()
+            if signature == self._signature:
+                return False
+            if signature is None:
+                # Keep serving the last good index if the file disappears
+                self._signature = None
+                return False
+            try:
+                index = IngredientIndex.from_file(self.path)
+                index.payload  # pylint: disable=pointless-statement
+                index.canonical_names  # pylint: disable=pointless-statement
+            except (OSError, ValueError) as e:
+                # A half-written or invalid file: keep the current index and retry later
+                logger.warning("Could not reload ingredient catalog %s: %s", self.path, e)
+                return False
+            self.index = index
+            self._signature = signature
+            return True
+
+    def start(self):
+        """
+        Start the background watcher thread if polling is enabled.
+        """
+        if self.poll_interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name='ingredient-catalog-watcher',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the background watcher thread.
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload()
+            except Exception: # pylint: disable=broad-except
+                logger.exception("Ingredient catalog watcher failed")
@@ -0,0 +1,343 @@
+"""
+This module runs recipe generations as background jobs.
+
+POST /api/jobs stores a job in a SQLite queue and answers at once with its
+id; a small pool of threads per worker process claims jobs and generates
+them, and clients poll (or long-poll) GET /api/jobs/<id> for the result. No
+HTTP connection is held open for the length of a model call, so proxies with
+short idle timeouts are fine and web workers stay free for other traffic.
+The queue file is shared by every worker on the host, so any worker can
+answer a poll, and jobs survive a restart.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+
+from flask import Blueprint, current_app, jsonify, request, url_for
+
+from .admission import AdmissionRejected
+from .generation import client_id, generate_json, request_ingredients
+from .storage import connect
+
+jobs_blueprint = Blueprint('jobs', __name__)
+
+# Job kinds clients may submit, as in prompts.prompts_for()
+JOB_KINDS = ('recipe', 'similar')
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+class JobQueueFull(Exception):
+    """
+    Raised when the queue already holds its maximum number of waiting jobs.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__("Too many queued recipe jobs, please retry shortly")
+        self.retry_after = retry_after
+
+
+# Sizing and timing of a JobQueue, in seconds where not a count
+JobLimits = namedtuple('JobLimits', ['workers', 'max_pending', 'stale_after', 'result_ttl',
+                                     'poll_interval'],
+                       defaults=[4, 1000, 300.0, 3600.0, 1.0])
+
+
+class JobQueue: # pylint: disable=too-many-instance-attributes
+    """
+    Persistent FIFO of generation jobs with a bounded pool of worker threads.
+
+    run(job) is called on a worker thread with a dict holding the job's id,
+    kind, ingredients and wait_seconds, and returns the JSON-serializable
+    result. With the settings of limits, a JobLimits: workers threads run per
+    process, at most max_pending jobs may wait, and a job left running longer
+    than stale_after seconds (its worker died) is claimed again. Finished jobs
+    are deleted result_ttl seconds after they finish, and other processes'
+    changes are seen within poll_interval seconds. Threads start with the
+    first submit or poll in each process, so a preloading server never runs
+    them in its master.
+    """
+
+    def __init__(self, run, db_path, limits=JobLimits()):
+        self.run = run
+        self.db_path = db_path
+        self.limits = limits
+        self._pid = None
+        self._threads = []
+        self._lock = threading.Lock()
+        # Notified when a job is submitted or finished in this process
+        self._changed = threading.Condition()
+        self._schema_ready = False
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    @contextmanager
+    def _connect(self):
+        if not self._schema_ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        with connect(self.db_path) as db:
+            if not self._schema_ready:
+                self._create_schema(db)
+            yield db
+
+    def _create_schema(self, db):
+        db.execute("PRAGMA journal_mode=WAL")
+        with db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, ingredients TEXT NOT NULL, "
+                "status TEXT NOT NULL, result TEXT, error TEXT, created_at REAL NOT NULL, "
+                "started_at REAL, finished_at REAL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at)")
+        self._schema_ready = True
+
+    def start(self):
+        """
+        Start this process's worker threads if they are not running.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._threads = [threading.Thread(target=self._work, name=f'job-worker-{n}',
+                                              daemon=True)
+                             for n in range(self.limits.workers)]
+            for thread in self._threads:
+                thread.start()
+
+    def submit(self, kind, ingredients):
+        """
+        Queue a job and return its id, or raise JobQueueFull.
+        """
+        self.start()
+        job_id = uuid.uuid4().hex
+        with self._connect() as db:
+            (pending,) = db.execute("SELECT COUNT(*) FROM jobs WHERE status = ?",
+                                    (QUEUED,)).fetchone()
+            if pending >= self.limits.max_pending:
+                with self._lock:
+                    self.rejected += 1
+                raise JobQueueFull(retry_after=self.limits.poll_interval * 5)
+            db.execute("INSERT INTO jobs (id, kind, ingredients, status, created_at) "
+                       "VALUES (?, ?, ?, ?, ?)",
+                       (job_id, kind, json.dumps(ingredients), QUEUED, time.time()))
+        with self._changed:
+            self._changed.notify()
+        return job_id
+
+    def get(self, job_id, wait=0.0):
+        """
+        Return the job as a dict, or None if it is unknown.
+
+        With wait set, block up to wait seconds for a queued or running job to finish.
+        """
+        self.start()
+        deadline = time.monotonic() + wait
+        while True:
+            job = self._fetch(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in (DONE, FAILED) or remaining <= 0:
+                return job
+            # Jobs finished by another process are only seen on the next poll
+            with self._changed:
+                self._changed.wait(min(remaining, self.limits.poll_interval))
+
+    def _fetch(self, job_id):
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT id, kind, status, result, error, created_at, started_at, finished_at "
+                "FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job_id, kind, status, result, error, created_at, started_at, finished_at = row
+        job = {"id": job_id, "kind": kind, "status": status}
+        if started_at is not None:
+            job["wait_seconds"] = round(started_at - created_at, 3)
+        if finished_at is not None:
+            job["run_seconds"] = round(finished_at - started_at, 3)
+        if status == DONE:
+            job["result"] = json.loads(result)
+        elif status == FAILED:
+            job["error"] = error
+        return job
+
+    def _claim(self):
+        """
+        Mark the oldest runnable job as running and return it, or None.
+        """
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ("
+                "SELECT id FROM jobs WHERE status = ? OR (status = ? AND started_at < ?) "
+                "ORDER BY created_at LIMIT 1) RETURNING id, kind, ingredients, created_at",
+                (RUNNING, now, QUEUED, RUNNING, now - self.limits.stale_after)).fetchone()
+        if row is None:
+            return None
+        job_id, kind, ingredients, created_at = row
+        return {"id": job_id, "kind": kind, "ingredients": json.loads(ingredients),
+                "wait_seconds": now - created_at}
+
+    def _finish(self, job_id, result=None, error=None):
+        with self._connect() as db:
+            db.execute("UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                       "WHERE id = ?",
+                       (FAILED if error is not None else DONE,
+                        None if error is not None else json.dumps(result), error,
+                        time.time(), job_id))
+        with self._changed:
+            self._changed.notify_all()
+
+    def purge_finished(self):
+        """
+        Delete jobs that finished more than result_ttl seconds ago.
+        """
+        with self._connect() as db:
+            db.execute("DELETE FROM jobs WHERE status IN (?, ?) AND finished_at <= ?",
+                       (DONE, FAILED, time.time() - self.limits.result_ttl))
+
+    def _work(self):
+        last_purge = 0.0
+        while True:
+            if time.monotonic() - last_purge > 60:
+                self.purge_finished()
+                last_purge = time.monotonic()
+            job = self._claim()
+            if job is None:
+                # Submissions from other processes are picked up on the next poll
+                with self._changed:
+                    self._changed.wait(self.limits.poll_interval)
+                continue
+            start = time.monotonic()
+            try:
+                result = self.run(job)
+            except Exception as e: # pylint: disable=broad-except
+                self._finish(job["id"], error=str(e))
+                failed = True
+            else:
+                self._finish(job["id"], result=result)
+                failed = False
+            with self._lock:
+                self.failed += failed
+                self.completed += not failed
+                self.wait_seconds += job["wait_seconds"]
+                self.run_seconds += time.monotonic() - start
+
+    def stats(self):
+        """
+        Return queue depth across processes and this process's job counters.
+        """
+        counts = {}
+        # Scrapes before the first job must not create the queue file
+        if os.path.exists(self.db_path):
+            with self._connect() as db:
+                counts = dict(db.execute("SELECT status, COUNT(*) FROM jobs "
+                                         "WHERE status IN (?, ?) GROUP BY status",
+                                         (QUEUED, RUNNING)).fetchall())
+        with self._lock:
+            return {
+                "queued": counts.get(QUEUED, 0),
+                "running": counts.get(RUNNING, 0),
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "wait_seconds": self.wait_seconds,
+                "run_seconds": self.run_seconds,
+            }
+
+
+def job_runner(app):
+    """
+    Return a JobQueue run callable that generates a job's result inside app's context.
+    """
+    def run(job):
+        with app.app_context():
+            metrics = current_app.extensions['metrics']
+            metrics.stage_duration.observe(job["wait_seconds"], ('job_wait',))
+            with metrics.stage('job_run'):
+                return generate_json(job["kind"], job["ingredients"], rate_checked=True)
+    return run
+
+
+@jobs_blueprint.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a generation and return 202 with the job id and the URL to poll.
+
+    A caller over its rate limit, or a full queue, gets 429 with Retry-After.
+    """
+    data = request.get_json()
+    try:
+        ingredients = request_ingredients(data)
+        kind = data.get('kind', 'recipe')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not ingredients:
+        return jsonify({"error": "No ingredients provided"}), 400
+    if kind not in JOB_KINDS:
+        return jsonify({"error": f"kind must be one of {', '.join(JOB_KINDS)}"}), 400
+
+    # Rate limits apply when a job is accepted, as a queued job cannot be turned away later
+    try:
+        current_app.extensions['admission'].check_rate(client_id())
+        job_id = current_app.extensions['job_queue'].submit(kind, ingredients)
+    except (AdmissionRejected, JobQueueFull) as e:
+        response = jsonify({"error": str(e)})
+        response.status_code = 429
+        response.headers["Retry-After"] = str(max(1, round(e.retry_after)))
+        return response
+
+    url = url_for('jobs.get_job', job_id=job_id)
+    response = jsonify({"id": job_id, "status": QUEUED, "url": url})
+    response.status_code = 202
+    response.headers["Location"] = url
+    return response
+
+
+def _wait_for_job(job_id):
+    """
+    Return the job for a poll request, holding it up to ?wait= seconds (at most JOB_MAX_WAIT).
+    """
+    wait = min(request.args.get('wait', 0.0, type=float), current_app.config['JOB_MAX_WAIT'])
+    return current_app.extensions['job_queue'].get(job_id, wait=max(wait, 0.0))
+
+
+@jobs_blueprint.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    Return a job's status, and its result or error once finished.
+
+    ?wait=N long-polls: the response is held up to N seconds until the job finishes.
+    """
+    job = _wait_for_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+
+@jobs_blueprint.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """
+    Return just the generated JSON of a finished job.
+
+    A job still queued or running gets 202 with its status, and a failed job
+    500 with its error; ?wait=N long-polls as for the status endpoint.
+    """
+    job = _wait_for_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    if job["status"] == DONE:
+        return jsonify(job["result"])
+    if job["status"] == FAILED:
+        return jsonify({"error": job["error"]}), 500
+    return jsonify(job), 202
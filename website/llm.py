@@ -0,0 +1,419 @@
+"""
+This module defines the LLM backends used to generate recipes.
+
+Every backend takes a prompt and a generation config dict (temperature, top_p,
+max_output_tokens and an optional response_schema, as in prompts.py) and offers
+blocking, streaming and async variants. create_backend() picks one from the app config.
+
+Provider SDKs are imported and their clients created on first use, in the
+process that uses them: importing this module (and so create_app()) stays
+cheap, and a forking server's workers never inherit a parent's client.
+"""
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import weakref
+from collections import namedtuple
+
+# Text of a completed generation plus token usage when the provider reports it
+Generation = namedtuple('Generation', ['text', 'prompt_tokens', 'output_tokens'])
+
+# Rough characters per token, used by the fake backend to pace its output
+CHARS_PER_TOKEN = 4
+
+
+# Every backend, so provider clients can be dropped in a newly forked process
+_backends = weakref.WeakSet()
+
+
+def _token_count(value):
+    return value if isinstance(value, int) else None
+
+
+def _genai():
+    import google.generativeai as genai # pylint: disable=import-outside-toplevel
+    return genai
+
+
+def reset_clients():
+    """
+    Drop every backend's provider clients; each is created again on its next use.
+
+    Runs in the child after every fork, since connections, gRPC channels and
+    locks copied from the parent must not be shared with it.
+    """
+    for backend in list(_backends):
+        backend.reset()
+
+
+os.register_at_fork(after_in_child=reset_clients)
+
+
+class LLMBackend:
+    """
+    Interface for text generation providers.
+
+    generate_stream() must send the request before returning so that setup
+    errors (bad key, quota) surface to the caller rather than mid-stream.
+    timeout, in seconds, is enforced by the provider's client so an abandoned
+    call does not keep a thread busy. The async variants default to running
+    the blocking ones in a thread.
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+        _backends.add(self)
+
+    def _client(self, name, factory):
+        """
+        Return the client called name for this process, calling factory() to create it.
+        """
+        client = self._clients.get(name)
+        if client is None:
+            with self._clients_lock:
+                client = self._clients.get(name)
+                if client is None:
+                    client = self._clients[name] = factory()
+        return client
+
+    def reset(self):
+        """
+        Forget provider clients so the next call creates them in the current process.
+        """
+        self._clients = {}
+        self._clients_lock = threading.Lock()
+
+    def warm_up(self):
+        """
+        Import the provider SDK and create its clients now rather than on the first call.
+        """
+
+    def generate(self, prompt, generation_config, timeout=None):
+        """
+        Return a Generation for prompt.
+        """
+        raise NotImplementedError
+
+    def generate_stream(self, prompt, generation_config, timeout=None):
+        """
+        Return an iterator of text chunks for prompt.
+        """
+        raise NotImplementedError
+
+    async def generate_async(self, prompt, generation_config, timeout=None):
+        """
+        Awaitable variant of generate().
+        """
+        return await asyncio.to_thread(self.generate, prompt, generation_config, timeout)
+
+    async def generate_stream_async(self, prompt, generation_config, timeout=None):
+        """
+        Async iterator variant of generate_stream().
+        """
+        chunks = await asyncio.to_thread(self.generate_stream, prompt, generation_config, timeout)
+        sentinel = object()
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, sentinel)
+            if chunk is sentinel:
+                return
+            yield chunk
+
+
+class GeminiBackend(LLMBackend):
+    """
+    Google Gemini through the google-generativeai SDK.
+    """
+
+    name = "gemini"
+    default_model = "models/gemini-1.5-pro"
+
+    def __init__(self, model_name=None, api_key=None):
+        super().__init__()
+        self.model_name = model_name or self.default_model
+        self.api_key = api_key
+
+    def _create_model(self):
+        genai = _genai()
+        genai.configure(api_key=self.api_key)
+        return genai.GenerativeModel(self.model_name)
+
+    @property
+    def model(self):
+        """
+        The GenerativeModel for this process.
+        """
+        return self._client("model", self._create_model)
+
+    def warm_up(self):
+        self._client("model", self._create_model)
+
+    @staticmethod
+    def _config(generation_config):
+        options = dict(generation_config)
+        schema = options.pop("response_schema", None)
+        if schema is not None:
+            options.update(response_mime_type="application/json", response_schema=schema)
+        return _genai().types.GenerationConfig(**options)
+
+    @staticmethod
+    def _generation(response):
+        usage = getattr(response, 'usage_metadata', None)
+        return Generation(
+            text=response.text,
+            prompt_tokens=_token_count(getattr(usage, 'prompt_token_count', None)),
+            output_tokens=_token_count(getattr(usage, 'candidates_token_count', None)),
+        )
+
+    @staticmethod
+    def _options(timeout):
+        return {"request_options": {"timeout": timeout}} if timeout else {}
+
+    def generate(self, prompt, generation_config, timeout=None):
+        response = self.model.generate_content(
+            prompt, generation_config=self._config(generation_config), **self._options(timeout))
+        return self._generation(response)
+
+    def generate_stream(self, prompt, generation_config, timeout=None):
+        response = self.model.generate_content(
+            prompt, generation_config=self._config(generation_config), stream=True,
+            **self._options(timeout))
+        return (chunk.text for chunk in response)
+
+    async def generate_async(self, prompt, generation_config, timeout=None):
+        response = await self.model.generate_content_async(
+            prompt, generation_config=self._config(generation_config), **self._options(timeout))
+        return self._generation(response)
+
+    async def generate_stream_async(self, prompt, generation_config, timeout=None):
+        response = await self.model.generate_content_async(
+            prompt, generation_config=self._config(generation_config), stream=True,
+            **self._options(timeout))
+        async for chunk in response:
+            yield chunk.text
+
+
+class OpenAIBackend(LLMBackend):
+    """
+    OpenAI chat completions through the openai SDK.
+    """
+
+    name = "openai"
+    default_model = "gpt-4o-mini"
+
+    def __init__(self, model_name=None, api_key=None):
+        super().__init__()
+        self.model_name = model_name or self.default_model
+        self.api_key = api_key
+
+    def _create_client(self, asynchronous=False):
+        import openai # pylint: disable=import-outside-toplevel
+        return (openai.AsyncOpenAI if asynchronous else openai.OpenAI)(api_key=self.api_key)
+
+    @property
+    def client(self):
+        """
+        The blocking OpenAI client for this process.
+        """
+        return self._client("client", self._create_client)
+
+    @property
+    def async_client(self):
+        """
+        The asyncio OpenAI client for this process.
+        """
+        return self._client("async_client", lambda: self._create_client(asynchronous=True))
+
+    def warm_up(self):
+        self._client("client", self._create_client)
+        self._client("async_client", lambda: self._create_client(asynchronous=True))
+
+    def _request(self, prompt, generation_config, timeout=None, **kwargs):
+        request = {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": generation_config.get("temperature"),
+            "top_p": generation_config.get("top_p"),
+            "max_tokens": generation_config.get("max_output_tokens"),
+            **kwargs,
+        }
+        if timeout:
+            request["timeout"] = timeout
+        schema = generation_config.get("response_schema")
+        if schema is not None:
+            request["response_format"] = {
+                "type": "json_schema",
+                "json_schema": {"name": "response", "schema": schema},
+            }
+        return request
+
+    @staticmethod
+    def _generation(completion):
+        usage = completion.usage
+        return Generation(
+            text=completion.choices[0].message.content or "",
+            prompt_tokens=_token_count(getattr(usage, 'prompt_tokens', None)),
+            output_tokens=_token_count(getattr(usage, 'completion_tokens', None)),
+        )
+
+    def generate(self, prompt, generation_config, timeout=None):
+        completion = self.client.chat.completions.create(
+            **self._request(prompt, generation_config, timeout))
+        return self._generation(completion)
+
+    def generate_stream(self, prompt, generation_config, timeout=None):
+        stream = self.client.chat.completions.create(
+            **self._request(prompt, generation_config, timeout, stream=True))
+        return (chunk.choices[0].delta.content for chunk in stream
+                if chunk.choices and chunk.choices[0].delta.content)
+
+    async def generate_async(self, prompt, generation_config, timeout=None):
+        completion = await self.async_client.chat.completions.create(
+            **self._request(prompt, generation_config, timeout))
+        return self._generation(completion)
+
+    async def generate_stream_async(self, prompt, generation_config, timeout=None):
+        stream = await self.async_client.chat.completions.create(
+            **self._request(prompt, generation_config, timeout, stream=True))
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class FakeBackend(LLMBackend):
+    """
+    Deterministic offline backend for tests, load tests and benchmarks.
+
+    Waits latency seconds before the first token, then emits a canned recipe
+    (or similar-recipes list) at tokens_per_second; 0 means no pacing. A
+    fraction error_rate of calls fails with ConnectionError, drawn from a
+    generator with a fixed seed so runs are repeatable.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.5, tokens_per_second=0, chunk_tokens=8, error_rate=0.0):
+        super().__init__()
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.chunk_tokens = chunk_tokens
+        self.error_rate = error_rate
+        self._random = random.Random(0)
+        self._random_lock = threading.Lock()
+
+    @staticmethod
+    def response_for(prompt):
+        """
+        Return the canned JSON text the fake model answers prompt with.
+        """
+        if "recipe ideas" in prompt:
+            return json.dumps({"recipes": [
+                {
+                    "title": f"Fake Recipe Idea {n}",
+                    "description": "A canned idea from the fake model.",
+                    "cook_time": "20 minutes",
+                    "difficulty": "Easy",
+                    "matching_ingredients": ["rice"],
+                }
+                for n in range(1, 4)
+            ]})
+        return json.dumps({
+            "title": "Fake Stir Fry",
+            "description": "A canned recipe from the fake model.",
+            "ingredients": ["1 cup rice", "2 cups vegetables", "1 tbsp soy sauce"],
+            "instructions": ["Cook the rice.", "Stir fry the vegetables.", "Combine and season."],
+            "cook_time": "20 minutes",
+            "servings": 2,
+            "difficulty": "Easy",
+        })
+
+    def _chunks(self, text):
+        size = self.chunk_tokens * CHARS_PER_TOKEN
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _chunk_delay(self):
+        return self.chunk_tokens / self.tokens_per_second if self.tokens_per_second else 0
+
+    def _generation(self, prompt, text):
+        return Generation(text=text, prompt_tokens=len(prompt) // CHARS_PER_TOKEN,
+                          output_tokens=len(text) // CHARS_PER_TOKEN)
+
+    def _check_failure(self):
+        with self._random_lock:
+            failed = self.error_rate and self._random.random() < self.error_rate
+        if failed:
+            raise ConnectionError("Fake model connection failed")
+
+    def _duration(self, text):
+        return self.latency + self._chunk_delay() * len(self._chunks(text))
+
+    def generate(self, prompt, generation_config, timeout=None):
+        self._check_failure()
+        text = self.response_for(prompt)
+        duration = self._duration(text)
+        if timeout and duration > timeout:
+            time.sleep(timeout)
+            raise TimeoutError("Fake model timed out")
+        time.sleep(duration)
+        return self._generation(prompt, text)
+
+    def generate_stream(self, prompt, generation_config, timeout=None):
+        self._check_failure()
+        chunks = self._chunks(self.response_for(prompt))
+        delay = self._chunk_delay()
+
+        def stream():
+            if timeout and self.latency > timeout:
+                time.sleep(timeout)
+                raise TimeoutError("Fake model timed out")
+            time.sleep(self.latency)
+            for chunk in chunks:
+                if delay:
+                    time.sleep(delay)
+                yield chunk
+
+        return stream()
+
+    async def generate_async(self, prompt, generation_config, timeout=None):
+        self._check_failure()
+        text = self.response_for(prompt)
+        duration = self._duration(text)
+        if timeout and duration > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError("Fake model timed out")
+        await asyncio.sleep(duration)
+        return self._generation(prompt, text)
+
+    async def generate_stream_async(self, prompt, generation_config, timeout=None):
+        self._check_failure()
+        if timeout and self.latency > timeout:
+            await asyncio.sleep(timeout)
+            raise TimeoutError("Fake model timed out")
+        await asyncio.sleep(self.latency)
+        delay = self._chunk_delay()
+        for chunk in self._chunks(self.response_for(prompt)):
+            if delay:
+                await asyncio.sleep(delay)
+            yield chunk
+
+
+def create_backend(config):
+    """
+    Build the backend named by config['LLM_BACKEND'].
+    """
+    name = config['LLM_BACKEND']
+    if name == GeminiBackend.name:
+        return GeminiBackend(config['LLM_MODEL'], api_key=config['GEMINI_API_KEY'])
+    if name == OpenAIBackend.name:
+        return OpenAIBackend(config['LLM_MODEL'], api_key=config['OPENAI_API_KEY'])
+    if name == FakeBackend.name:
+        return FakeBackend(latency=config['FAKE_LLM_LATENCY'],
+                           tokens_per_second=config['FAKE_LLM_TOKENS_PER_SECOND'],
+                           error_rate=config['FAKE_LLM_ERROR_RATE'])
+    raise ValueError(f"Unknown LLM backend: {name}")
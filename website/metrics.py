@@ -0,0 +1,319 @@
+"""
+This module records request metrics and renders them in the Prometheus text format.
+
+Metrics are kept per process, so under gunicorn each scrape of /metrics reports
+the worker that served it; the label sets are small and fixed so that
+recording stays a dict lookup and a few additions per request.
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from flask import g, has_app_context, request
+
+# Latency histogram bucket bounds in seconds, from cache hits to slow generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r'\"')
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric: # pylint: disable=too-few-public-methods
+    """
+    A named metric with a fixed tuple of label names; label values are passed as a tuple.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        """
+        Yield (name, labels, value) for every recorded label set.
+        """
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, _format_labels(self.labelnames, labels), value
+
+
+class Counter(Metric):
+    """
+    A value that only goes up.
+    """
+
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        """
+        Add amount to the counter for labels.
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    """
+    A value that can go up and down.
+    """
+
+    kind = "gauge"
+
+    def set(self, value, labels=()):
+        """
+        Set the gauge for labels to value.
+        """
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Cumulative bucketed observations with a running sum and count.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        """
+        Record one observation for labels.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = [(labels, (list(state[0]), state[1], state[2]))
+                     for labels, state in self._values.items()]
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                yield (f"{self.name}_bucket",
+                       _format_labels(self.labelnames + ("le",), labels + (_format_value(bound),)),
+                       cumulative)
+            yield f"{self.name}_sum", _format_labels(self.labelnames, labels), total
+            yield f"{self.name}_count", _format_labels(self.labelnames, labels), count
+
+
+class MetricsRegistry: # pylint: disable=too-many-instance-attributes
+    """
+    The metrics of one process plus collectors that report other components' stats.
+
+    A collector is a callable returning (name, kind, help, value) tuples; it
+    runs at scrape time, so components keep their own counters and pay
+    nothing extra per request.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        # Set by profiling to also add each stage's time to g.stage_times of the request
+        self.trace_stages = False
+
+        self.requests = self.counter(
+            "http_requests_total", "HTTP responses by endpoint, method and status.",
+            ("endpoint", "method", "status"))
+        self.request_duration = self.histogram(
+            "http_request_duration_seconds",
+            "Time from request start until the response is fully sent.", ("endpoint",))
+        self.in_flight = self.gauge("http_requests_in_flight", "Requests being served.")
+        self.stage_duration = self.histogram(
+            "request_stage_duration_seconds", "Time spent in each stage of request handling.",
+            ("stage",))
+        self.tokens = self.counter(
+            "llm_tokens_total", "Tokens reported by the model provider.", ("kind", "direction"))
+        self.errors = self.counter(
+            "generation_errors_total", "Failed generation requests by error class.",
+            ("error",))
+
+    def counter(self, name, help_text, labelnames=()):
+        """
+        Create and register a Counter.
+        """
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        """
+        Create and register a Gauge.
+        """
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        """
+        Create and register a Histogram.
+        """
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """
+        Register a callable reporting extra metrics at scrape time.
+        """
+        self._collectors.append(collector)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time the enclosed block as a request stage.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_duration.observe(elapsed, (name,))
+            if self.trace_stages and has_app_context():
+                stages = g.get('stage_times')
+                if stages is not None:
+                    stages[name] = stages.get(name, 0.0) + elapsed
+
+    def record_generation(self, kind, generation):
+        """
+        Count the prompt and output tokens of a Generation, when the provider reported them.
+        """
+        if generation.prompt_tokens is not None:
+            self.tokens.inc((kind, "prompt"), generation.prompt_tokens)
+        if generation.output_tokens is not None:
+            self.tokens.inc((kind, "output"), generation.output_tokens)
+
+    def render(self):
+        """
+        Return every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_format_value(value)}")
+        for collector in self._collectors:
+            for name, kind, help_text, value in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _component_stats(app):
+    """
+    Report cache, coalescing, admission, job and resilience counters kept by the components.
+    """
+    cache = app.extensions['recipe_cache'].stats()
+    flights = app.extensions['single_flight'].stats()
+    admission = app.extensions['admission'].stats()
+    yield ("recipe_cache_hits_total", "counter", "Recipe cache hits.", cache["hits"])
+    yield ("recipe_cache_misses_total", "counter", "Recipe cache misses.", cache["misses"])
+    yield ("recipe_cache_disk_hits_total", "counter", "Hits served by the shared disk tier.",
+           cache["disk_hits"])
+    yield ("recipe_cache_hit_ratio", "gauge", "Share of cache lookups that hit.",
+           cache["hit_ratio"])
+    yield ("recipe_cache_entries", "gauge", "Entries in the in-memory tier.", cache["size"])
+    store = app.extensions['recipe_store'].stats()
+    yield ("recipe_store_hits_total", "counter", "Requests answered by the pre-generated store.",
+           store["hits"])
+    yield ("recipe_store_misses_total", "counter", "Store lookups that found no close match.",
+           store["misses"])
+    yield ("recipe_store_entries", "gauge", "Ingredient sets in the pre-generated store.",
+           store["size"])
+    yield ("single_flight_coalesced_total", "counter",
+           "Requests that shared another request's generation.", flights["coalesced"])
+    yield ("single_flight_in_flight", "gauge", "Distinct generations in progress.",
+           flights["in_flight"])
+    yield ("admission_admitted_total", "counter", "Requests given an upstream slot.",
+           admission["admitted"])
+    for reason, count in admission["rejected"].items():
+        yield (f"admission_rejected_{reason}_total", "counter",
+               f"Requests rejected by admission control ({reason}).", count)
+    yield ("upstream_in_flight", "gauge", "Upstream model calls in progress.",
+           admission["in_flight"])
+    yield ("upstream_queue_depth", "gauge", "Requests waiting for an upstream slot.",
+           admission["waiting"])
+    yield ("upstream_queue_wait_seconds_total", "counter",
+           "Time requests spent waiting for an upstream slot.", admission["wait_seconds"])
+    jobs = app.extensions['job_queue'].stats()
+    yield ("job_queue_depth", "gauge", "Generation jobs waiting to run, across workers.",
+           jobs["queued"])
+    yield ("job_running", "gauge", "Generation jobs running, across workers.", jobs["running"])
+    yield ("job_completed_total", "counter", "Generation jobs completed.", jobs["completed"])
+    yield ("job_failed_total", "counter", "Generation jobs that failed.", jobs["failed"])
+    yield ("job_rejected_total", "counter", "Submissions rejected by a full job queue.",
+           jobs["rejected"])
+    yield ("job_wait_seconds_total", "counter", "Time jobs spent queued before running.",
+           jobs["wait_seconds"])
+    yield ("job_run_seconds_total", "counter", "Time spent running jobs.", jobs["run_seconds"])
+    llm = app.extensions['llm']
+    if hasattr(llm, "stats"):
+        resilience = llm.stats()
+        yield ("llm_retries_total", "counter", "Retried upstream attempts.",
+               resilience["retried"])
+        yield ("llm_hedged_total", "counter", "Hedged upstream requests.", resilience["hedged"])
+        yield ("llm_circuit_open", "gauge", "1 while the circuit breaker rejects calls.",
+               int(resilience["circuit_state"] != "closed"))
+        yield ("llm_circuit_rejected_total", "counter", "Calls rejected by the circuit breaker.",
+               resilience["circuit_rejected"])
+
+
+def init_metrics(app):
+    """
+    Attach a MetricsRegistry to app and register the per-request timing hooks.
+    """
+    registry = MetricsRegistry()
+    app.extensions['metrics'] = registry
+    registry.add_collector(lambda: _component_stats(app))
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        registry.in_flight.inc()
+
+    @app.after_request
+    def count_response(response):
+        registry.requests.inc((request.endpoint or "unmatched", request.method,
+                               str(response.status_code)))
+        return response
+
+    @app.teardown_request
+    def stop_timer(_error=None):
+        # Runs once the response is fully sent, including streamed bodies
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            registry.in_flight.inc(amount=-1)
+            registry.request_duration.observe(time.perf_counter() - start,
+                                              (request.endpoint or "unmatched",))
+
+    return registry
@@ -0,0 +1,100 @@
+"""
+This module extracts and validates the JSON objects returned by the LLM.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+# Decoder whose raw_decode() parses one value and reports where it ended
+_DECODER = json.JSONDecoder()
+# Give up after this many "{" that do not start a valid object
+_MAX_CANDIDATES = 8
+
+
+def loads(text):
+    """
+    Parse JSON text with orjson when it is installed, else the standard library.
+    """
+    if orjson is not None:
+        return orjson.loads(text) # pylint: disable=no-member
+    return json.loads(text)
+
+
+def extract_json_object(text):
+    """
+    Return the first JSON object in text, ignoring fences and surrounding prose.
+
+    The common case, a bare or fenced object, is parsed directly (with orjson
+    when available). Otherwise the C scanner behind json.JSONDecoder.raw_decode
+    parses the balanced object starting at each candidate "{" and ignores any
+    text after it, so a stray brace in leading prose only costs one retry.
+    """
+    stripped = text.strip()
+    if stripped.startswith('```'):
+        stripped = stripped.split('\n', 1)[1] if '\n' in stripped else stripped[3:]
+        stripped = stripped.rsplit('```', 1)[0].strip()
+    if stripped.startswith('{') and stripped.endswith('}'):
+        try:
+            return loads(stripped)
+        except ValueError:
+            pass
+
+    start = text.find('{')
+    for _ in range(_MAX_CANDIDATES):
+        if start == -1:
+            break
+        try:
+            return _DECODER.raw_decode(text, start)[0]
+        except ValueError:
+            start = text.find('{', start + 1)
+    raise ValueError("No JSON object found in model response")
+
+
+def _require(data, field, kind, label):
+    if not isinstance(data.get(field), kind):
+        raise ValueError(f"{label} is missing a valid '{field}'")
+
+
+def validate_recipe(data):
+    """
+    Check the fields the frontend needs to render a recipe.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Recipe must be a JSON object")
+    for field in ("title", "description"):
+        _require(data, field, str, "Recipe")
+    for field in ("ingredients", "instructions"):
+        _require(data, field, list, "Recipe")
+    return data
+
+
+def validate_similar_recipes(data):
+    """
+    Check the shape of a similar-recipes response.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Similar recipes must be a JSON object")
+    _require(data, "recipes", list, "Similar recipes")
+    for recipe in data["recipes"]:
+        if not isinstance(recipe, dict):
+            raise ValueError("Each similar recipe must be a JSON object")
+        _require(recipe, "title", str, "Similar recipe")
+    return data
+
+
+# Validator for each kind of generation request
+VALIDATORS = {
+    "recipe": validate_recipe,
+    "similar": validate_similar_recipes,
+}
+
+
+def parse_model_json(text, kind):
+    """
+    Extract the JSON object from a model response and validate it for kind.
+    """
+    return VALIDATORS[kind](extract_json_object(text))
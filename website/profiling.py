@@ -0,0 +1,323 @@
+"""
+This module profiles requests on demand and keeps traces of recent slow ones.
+
+Nothing here runs unless create_app() is configured for it: with no admin
+token, no sample rate and no slow-request threshold, no hooks are installed
+and the only per-request cost left is one attribute check per timed stage.
+
+Profiled requests, a PROFILE_SAMPLE_RATE fraction of all requests or those
+an admin marks with "X-Profile: 1", are sampled by a statistical profiler: a
+background OS thread records the request's Python stack every few
+milliseconds, which costs the request itself nothing and also shows the time
+spent waiting on the model. Stacks are appended per endpoint to
+PROFILE_DIR/<endpoint>.folded in the collapsed format read by flamegraph.pl,
+speedscope and similar tools. Requests slower than SLOW_REQUEST_SECONDS, and
+every profiled request, leave a trace splitting their time between JSON work
+(parsing the model's output and serializing the response), the upstream model
+call, and everything else; admins read them from /admin/slow-requests.
+"""
+
+import _thread
+import collections
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+from flask import Blueprint, abort, current_app, g, jsonify, request, send_from_directory
+
+from .serving import gevent_active
+
+profiling_blueprint = Blueprint('profiling', __name__)
+
+PROFILE_HEADER = "X-Profile"
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+# Stages, as timed by MetricsRegistry.stage(), that count as JSON work and upstream time
+JSON_STAGES = ("parse", "serialize")
+UPSTREAM_STAGES = ("upstream",)
+
+# Deepest stack recorded per sample
+MAX_STACK_DEPTH = 128
+
+_UNSAFE_FILENAME = re.compile(r"[^\w.-]")
+
+
+def _os_thread_primitives():
+    """
+    Return (start_new_thread, sleep, allocate_lock, get_ident) that use real OS threads.
+
+    Under gevent the patched versions would make the sampler a greenlet, which
+    cannot observe the others; the originals are taken from the monkey module.
+    """
+    if gevent_active():
+        from gevent import monkey # pylint: disable=import-outside-toplevel
+        return (monkey.get_original('_thread', 'start_new_thread'),
+                monkey.get_original('time', 'sleep'),
+                monkey.get_original('_thread', 'allocate_lock'),
+                monkey.get_original('_thread', 'get_ident'))
+    return _thread.start_new_thread, time.sleep, _thread.allocate_lock, _thread.get_ident
+
+
+def _frame_getter(get_ident):
+    """
+    Return a callable finding the calling thread's (or greenlet's) frame in a frames dict.
+    """
+    thread_id = get_ident()
+    if not gevent_active():
+        return lambda frames: frames.get(thread_id)
+    import greenlet # pylint: disable=import-outside-toplevel
+    task = greenlet.getcurrent()
+    # A suspended greenlet keeps its top frame in gr_frame; a running one is the thread's frame
+    return lambda frames: task.gr_frame or frames.get(thread_id)
+
+
+def collapsed_stack(frame):
+    """
+    Return frame's stack as "outermost;...;innermost" function labels.
+    """
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        labels.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:"
+                      f"{code.co_firstlineno})".replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """
+    Counts the stacks of registered threads or greenlets, sampled every interval seconds.
+
+    The sampling thread only runs while something is registered.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._start_thread, self._sleep, allocate_lock, self._get_ident = _os_thread_primitives()
+        # A real lock: it is shared with the sampling OS thread
+        self._lock = allocate_lock()
+        self._targets = {}
+        self._running = False
+
+    def add(self):
+        """
+        Start sampling the calling thread or greenlet; return the key to pass to remove().
+        """
+        key = object()
+        with self._lock:
+            self._targets[key] = (_frame_getter(self._get_ident), collections.Counter())
+            if not self._running:
+                self._running = True
+                self._start_thread(self._run, ())
+        return key
+
+    def remove(self, key):
+        """
+        Stop sampling for key and return its Counter of collapsed stacks.
+        """
+        with self._lock:
+            return self._targets.pop(key)[1]
+
+    def _run(self):
+        while True:
+            self._sleep(self.interval)
+            frames = sys._current_frames() # pylint: disable=protected-access
+            with self._lock:
+                if not self._targets:
+                    self._running = False
+                    return
+                for frame_of, counts in self._targets.values():
+                    frame = frame_of(frames)
+                    if frame is not None:
+                        counts[collapsed_stack(frame)] += 1
+            del frames
+
+
+# Settings of a RequestProfiler: the fraction of requests sampled, the token admins profile a
+# request with, the seconds above which a request's trace is kept (None keeps only profiled
+# ones), how many traces are kept, and the seconds between stack samples
+ProfileSettings = collections.namedtuple(
+    'ProfileSettings', ['sample_rate', 'admin_token', 'slow_threshold', 'max_traces', 'interval'],
+    defaults=[0.0, None, None, 100, 0.005])
+
+
+class RequestProfiler:
+    """
+    Decides which requests to profile, writes their stacks, and keeps slow-request traces.
+    """
+
+    def __init__(self, directory, settings=ProfileSettings()):
+        self.directory = directory
+        self.settings = settings
+        self._traces = collections.deque(maxlen=settings.max_traces)
+        self._lock = threading.Lock()
+        self._sampler = None
+
+    @property
+    def enabled(self):
+        """
+        True if any request may be profiled or traced.
+        """
+        settings = self.settings
+        return bool(settings.admin_token or settings.sample_rate > 0
+                    or settings.slow_threshold is not None)
+
+    @property
+    def sampler(self):
+        """
+        The StackSampler, created on first use so a preloading server forks without one.
+        """
+        if self._sampler is None:
+            self._sampler = StackSampler(self.settings.interval)
+        return self._sampler
+
+    def is_admin(self, req):
+        """
+        Return True if req carries the admin token.
+        """
+        token = req.headers.get(ADMIN_TOKEN_HEADER)
+        admin_token = self.settings.admin_token
+        return bool(admin_token and token
+                    and hmac.compare_digest(token.encode(), str(admin_token).encode()))
+
+    def should_profile(self, req):
+        """
+        Return True if req is to be profiled: sampled, or asked for by an admin.
+        """
+        if req.headers.get(PROFILE_HEADER) and self.is_admin(req):
+            return True
+        return self.settings.sample_rate > 0 and random.random() < self.settings.sample_rate
+
+    def save(self, endpoint, counts):
+        """
+        Append collapsed stacks to endpoint's .folded file.
+        """
+        if not counts:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, _UNSAFE_FILENAME.sub("_", endpoint) + ".folded")
+        # One write per request, so concurrent workers append whole blocks
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write("".join(f"{stack} {count}\n" for stack, count in counts.items()))
+
+    def keeps(self, duration, profiled):
+        """
+        Return True if a request that took duration seconds is to leave a trace.
+        """
+        threshold = self.settings.slow_threshold
+        return profiled or (threshold is not None and duration >= threshold)
+
+    def record(self, trace, stages, profiled):
+        """
+        Keep trace, with its stage times split into JSON, upstream and other work.
+        """
+        duration = trace["duration_seconds"]
+        json_seconds = sum(stages.get(stage, 0.0) for stage in JSON_STAGES)
+        upstream_seconds = sum(stages.get(stage, 0.0) for stage in UPSTREAM_STAGES)
+        trace.update(json_seconds=round(json_seconds, 6),
+                     upstream_seconds=round(upstream_seconds, 6),
+                     other_seconds=round(max(duration - json_seconds - upstream_seconds, 0.0), 6),
+                     stages={stage: round(seconds, 6) for stage, seconds in stages.items()},
+                     profiled=profiled)
+        with self._lock:
+            self._traces.append(trace)
+
+    def traces(self):
+        """
+        Return the kept traces, newest first.
+        """
+        with self._lock:
+            return list(reversed(self._traces))
+
+
+def init_profiling(app):
+    """
+    Attach a RequestProfiler to app and, if it is enabled, the hooks that drive it.
+    """
+    profiler = RequestProfiler(
+        app.config['PROFILE_DIR'] or os.path.join(app.instance_path, 'profiles'),
+        ProfileSettings(sample_rate=app.config['PROFILE_SAMPLE_RATE'],
+                        admin_token=app.config['PROFILE_ADMIN_TOKEN'],
+                        slow_threshold=app.config['SLOW_REQUEST_SECONDS'],
+                        max_traces=app.config['SLOW_REQUEST_TRACES'],
+                        interval=app.config['PROFILE_INTERVAL']))
+    app.extensions['profiler'] = profiler
+    if not profiler.enabled:
+        return profiler
+    app.extensions['metrics'].trace_stages = True
+
+    @app.before_request
+    def start_profile():
+        g.profile_start = time.perf_counter()
+        g.stage_times = {}
+        if profiler.should_profile(request):
+            g.profile_key = profiler.sampler.add()
+
+    @app.after_request
+    def note_status(response):
+        g.profile_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_profile(_error=None):
+        # Runs once the response is fully sent, so streamed bodies are covered
+        start = g.pop('profile_start', None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        endpoint = request.endpoint or "unmatched"
+        key = g.pop('profile_key', None)
+        if key is not None:
+            profiler.save(endpoint, profiler.sampler.remove(key))
+        if profiler.keeps(duration, key is not None):
+            profiler.record({"time": time.time(), "endpoint": endpoint, "method": request.method,
+                             "path": request.path, "status": g.get('profile_status', 500),
+                             "duration_seconds": round(duration, 6)},
+                            g.stage_times, profiled=key is not None)
+
+    return profiler
+
+
+def _require_admin():
+    profiler = current_app.extensions['profiler']
+    if not profiler.is_admin(request):
+        # Without a valid token the admin surface does not exist
+        abort(404)
+    return profiler
+
+
+@profiling_blueprint.route('/admin/slow-requests', methods=['GET'])
+def slow_requests():
+    """
+    Return the kept slow and profiled request traces, newest first.
+    """
+    return jsonify(_require_admin().traces())
+
+
+@profiling_blueprint.route('/admin/profiles', methods=['GET'])
+def list_profiles():
+    """
+    List this host's collapsed-stack files with their sizes.
+    """
+    profiler = _require_admin()
+    try:
+        names = sorted(name for name in os.listdir(profiler.directory)
+                       if name.endswith(".folded"))
+    except FileNotFoundError:
+        names = []
+    return jsonify([{"name": name,
+                     "bytes": os.path.getsize(os.path.join(profiler.directory, name))}
+                    for name in names])
+
+
+@profiling_blueprint.route('/admin/profiles/<name>', methods=['GET'])
+def get_profile(name):
+    """
+    Return one endpoint's collapsed stacks, ready for flamegraph.pl or speedscope.
+    """
+    profiler = _require_admin()
+    return send_from_directory(profiler.directory, name, mimetype='text/plain')
@@ -0,0 +1,149 @@
+"""
+This module builds the Gemini prompts and generation settings for recipe endpoints.
+"""
+
+# Generation settings per endpoint. Backends translate these keys, plus an
+# optional "response_schema", into their provider's request options.
+RECIPE_GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "max_output_tokens": 1000,
+}
+
+SIMILAR_RECIPES_GENERATION_CONFIG = {
+    "temperature": 0.8,
+    "top_p": 0.95,
+    "max_output_tokens": 800,
+}
+
+def recipe_prompt(ingredients):
+    """
+    Build the prompt asking for one detailed recipe.
+    """
+    return f"""
+        Create a detailed recipe using some or all of these ingredients: {', '.join(ingredients)}.
+
+        You must return your response in valid JSON format with the following structure:
+        {{
+            "title": "Recipe Name",
+            "description": "Brief description of the dish",
+            "ingredients": [
+                "1 cup ingredient 1",
+                "2 tbsp ingredient 2",
+                ...
+            ],
+            "instructions": [
+                "Step 1: Do this",
+                "Step 2: Do that",
+                ...
+            ],
+            "cook_time": "30 minutes",
+            "servings": 4,
+            "difficulty": "Easy/Medium/Hard"
+        }}
+
+        Do not include any text before or after the JSON. Only return valid JSON.
+        """
+
+def similar_recipes_prompt(ingredients):
+    """
+    Build the prompt asking for three short recipe ideas.
+    """
+    return f"""
+        Generate 3 different recipe ideas (just titles and brief descriptions)
+        using some or all of these ingredients: {', '.join(ingredients)}.
+
+        You must return your response in valid JSON format with the following structure:
+        {{
+            "recipes": [
+                {{
+                    "title": "Recipe 1 Name",
+                    "description": "Brief description",
+                    "cook_time": "20 minutes",
+                    "difficulty": "Easy/Medium/Hard",
+                    "matching_ingredients": ["ingredient1", "ingredient2"]
+                }},
+                ...
+            ]
+        }}
+
+        Do not include any text before or after the JSON. Only return valid JSON.
+        """
+
+# Response schemas for the model's native JSON mode (OpenAPI subset understood
+# by both Gemini and OpenAI). Gemini emits the properties in alphabetical order
+# whatever order they are listed in, so the streaming endpoint, which sends the
+# title first, keeps the prose prompt.
+RECIPE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "description": {"type": "string"},
+        "cook_time": {"type": "string"},
+        "servings": {"type": "integer"},
+        "difficulty": {"type": "string", "enum": ["Easy", "Medium", "Hard"]},
+        "ingredients": {"type": "array", "items": {"type": "string"}},
+        "instructions": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["title", "description", "cook_time", "servings", "difficulty",
+                 "ingredients", "instructions"],
+}
+
+SIMILAR_RECIPES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "recipes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "description": {"type": "string"},
+                    "cook_time": {"type": "string"},
+                    "difficulty": {"type": "string", "enum": ["Easy", "Medium", "Hard"]},
+                    "matching_ingredients": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["title", "description", "cook_time", "difficulty",
+                             "matching_ingredients"],
+            },
+        },
+    },
+    "required": ["recipes"],
+}
+
+def structured_recipe_prompt(ingredients):
+    """
+    Build the recipe prompt for JSON mode; the schema carries the output format.
+    """
+    return (f"Create a detailed recipe using some or all of these ingredients: "
+            f"{', '.join(ingredients)}. List each ingredient with its quantity and give "
+            f"one step per instruction.")
+
+def structured_similar_recipes_prompt(ingredients):
+    """
+    Build the similar-recipes prompt for JSON mode; the schema carries the output format.
+    """
+    return (f"Generate 3 different recipe ideas (just titles and brief descriptions) "
+            f"using some or all of these ingredients: {', '.join(ingredients)}. "
+            f"For each, list which of these ingredients it uses.")
+
+# Prompt builder and generation settings for each kind of generation request,
+# describing the JSON structure in prose for backends without a JSON mode
+PROMPTS = {
+    "recipe": (recipe_prompt, RECIPE_GENERATION_CONFIG),
+    "similar": (similar_recipes_prompt, SIMILAR_RECIPES_GENERATION_CONFIG),
+}
+
+# The same, using the model's JSON mode with a response schema
+STRUCTURED_PROMPTS = {
+    "recipe": (structured_recipe_prompt,
+               {**RECIPE_GENERATION_CONFIG, "response_schema": RECIPE_SCHEMA}),
+    "similar": (structured_similar_recipes_prompt,
+                {**SIMILAR_RECIPES_GENERATION_CONFIG, "response_schema": SIMILAR_RECIPES_SCHEMA}),
+}
+
+def prompts_for(structured):
+    """
+    Return the prompt table for JSON mode or for prose-described JSON.
+    """
+    return STRUCTURED_PROMPTS if structured else PROMPTS
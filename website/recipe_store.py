@@ -0,0 +1,277 @@
+"""
+This module serves pre-generated recipes for common ingredient sets.
+
+An offline job (the "flask precompute-recipes" command) generates recipes and
+similar-recipe ideas for frequent ingredient sets into a JSON Lines file. At
+startup the file is loaded into a MinHash/LSH index over the ingredient sets,
+so a request finds the stored set with the highest Jaccard similarity in a few
+microseconds and the model is only called when nothing is close enough.
+"""
+
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .cache import normalize_ingredients
+from .parsing import parse_model_json
+from .prompts import prompts_for
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime modulus for the MinHash permutations
+_PRIME = (1 << 61) - 1
+
+
+def jaccard(a, b):
+    """
+    Return |a & b| / |a | b| for two sets.
+    """
+    union = len(a | b)
+    return len(a & b) / union if union else 0.0
+
+
+class MinHashLSH:
+    """
+    Locality-sensitive index of sets under Jaccard similarity.
+
+    Each set is summarised by num_perm MinHash values split into bands of
+    rows; sets sharing every value of any band become candidates. With the
+    defaults (16 bands of 4 rows) pairs above about 0.5 similarity are found
+    with high probability while dissimilar pairs rarely collide.
+    """
+
+    def __init__(self, num_perm=64, bands=16, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+                       for _ in range(num_perm)]
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        # Ingredients recur across sets, so each one's permuted hashes are computed once
+        self._item_hashes = functools.lru_cache(maxsize=65536)(self._hash_item)
+
+    def _hash_item(self, item):
+        h = zlib.crc32(item.encode('utf-8'))
+        return tuple((a * h + b) % _PRIME for a, b in self._perms)
+
+    def signature(self, items):
+        """
+        Return the MinHash signature of a non-empty set of strings.
+        """
+        vectors = [self._item_hashes(item) for item in items]
+        return list(map(min, *vectors)) if len(vectors) > 1 else list(vectors[0])
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [tuple(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def add(self, item_id, items):
+        """
+        Index item_id under the set items.
+        """
+        for bucket, key in zip(self._buckets, self._band_keys(self.signature(items))):
+            bucket[key].append(item_id)
+
+    def candidates(self, items):
+        """
+        Return the ids of indexed sets likely to be similar to items.
+        """
+        found = set()
+        for bucket, key in zip(self._buckets, self._band_keys(self.signature(items))):
+            found.update(bucket.get(key, ()))
+        return found
+
+
+class RecipeStore:
+    """
+    Pre-generated results keyed by normalized ingredient set.
+
+    lookup() answers "similar" requests from the most similar stored set
+    scoring at least min_similarity, and "recipe" requests only from an
+    identical set, since a full recipe for different ingredients would be wrong.
+    """
+
+    def __init__(self, entries=(), min_similarity=0.6):
+        self.min_similarity = min_similarity
+        self._entries = {}
+        # (key, set of ingredients) per LSH item id
+        self._sets = []
+        self._lsh = MinHashLSH()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        for entry in entries:
+            self.add(entry["ingredients"], entry)
+
+    @classmethod
+    def from_file(cls, path, min_similarity=0.6):
+        """
+        Load a store written by the precompute job; a missing file gives an empty store.
+        """
+        entries = {}
+        try:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        # Later lines update earlier ones for the same set
+                        key = normalize_ingredients(entry["ingredients"])
+                        entries.setdefault(key, {}).update(entry)
+        except FileNotFoundError:
+            logger.warning("Recipe store %s not found; every request will use the model", path)
+        return cls(entries.values(), min_similarity)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, ingredients, entry):
+        """
+        Store entry (a dict holding "recipe" and/or "similar") for an ingredient set.
+        """
+        key = normalize_ingredients(ingredients)
+        if not key:
+            return
+        if key not in self._entries:
+            self._sets.append((key, frozenset(key)))
+            self._lsh.add(len(self._sets) - 1, key)
+            self._entries[key] = {}
+        self._entries[key].update(
+            {kind: entry[kind] for kind in ("recipe", "similar") if entry.get(kind)})
+
+    def contains(self, ingredients, kind):
+        """
+        Return True if a result of kind is stored for exactly this ingredient set.
+        """
+        return kind in self._entries.get(normalize_ingredients(ingredients), {})
+
+    def lookup(self, kind, ingredients):
+        """
+        Return the stored result of kind for the closest ingredient set, or None.
+        """
+        if not self._entries:
+            return None
+        key = normalize_ingredients(ingredients)
+        entry = self._entries.get(key, {})
+        result = entry.get(kind)
+        if result is None and kind == "similar" and key:
+            query = frozenset(key)
+            best, best_score = None, self.min_similarity
+            for item_id in self._lsh.candidates(key):
+                candidate_key, candidate = self._sets[item_id]
+                score = jaccard(query, candidate)
+                stored = self._entries[candidate_key].get(kind)
+                if stored is not None and score >= best_score:
+                    best, best_score = stored, score
+            result = best
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def stats(self):
+        """
+        Return hit/miss counters and the number of stored sets.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+def _read_ingredient_sets(path):
+    """
+    Read ingredient sets, one JSON list or comma-separated line each, most frequent first.
+    """
+    counts = Counter()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            items = json.loads(line) if line.startswith('[') else line.split(',')
+            key = normalize_ingredients(items)
+            if key:
+                counts[key] += 1
+    return [list(key) for key, _ in counts.most_common()]
+
+
+@click.command('precompute-recipes')
+@click.argument('sets_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--limit', type=int, default=None, help='Only the N most frequent sets.')
+@click.option('--concurrency', type=int, default=4, show_default=True,
+              help='Concurrent model calls.')
+@with_appcontext
+def precompute_command(sets_path, limit, concurrency):
+    """
+    Generate recipes for the ingredient sets in SETS_PATH into RECIPE_STORE_PATH.
+
+    Sets already in the store are skipped, so an interrupted run can be restarted.
+    """
+    path = current_app.config['RECIPE_STORE_PATH']
+    if not path:
+        raise click.UsageError("Set RECIPE_STORE_PATH to the store file to write")
+    existing = RecipeStore.from_file(path)
+    sets = [items for items in _canonical_sets(sets_path)[:limit]
+            if not (existing.contains(items, "recipe") and existing.contains(items, "similar"))]
+    llm = current_app.extensions['llm']
+    prompts = prompts_for(current_app.config['STRUCTURED_OUTPUT'])
+
+    def generate(items):
+        entry = {"ingredients": items}
+        for kind, (build_prompt, generation_config) in prompts.items():
+            if not existing.contains(items, kind):
+                generation = llm.generate(build_prompt(items), generation_config)
+                entry[kind] = parse_model_json(generation.text, kind)
+        return entry
+
+    done, failed = _append_entries(path, generate, sets, concurrency)
+    click.echo(f"Stored {done} ingredient sets ({failed} failed) in {path}")
+
+
+def _canonical_sets(sets_path):
+    """
+    Return the distinct canonical ingredient sets in sets_path, most frequent first.
+
+    These are the sets requests are looked up with; spellings of one set merge.
+    """
+    canonicalizer = current_app.extensions['canonicalizer']
+    canonical = {}
+    for items in _read_ingredient_sets(sets_path):
+        items = canonicalizer.canonicalize(items)
+        if items:
+            canonical.setdefault(normalize_ingredients(items), items)
+    return list(canonical.values())
+
+
+def _append_entries(path, generate, sets, concurrency):
+    """
+    Append generate(items) for each of sets to the store file at path as it completes.
+
+    Return (done, failed); failures are reported and skipped.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    done = failed = 0
+    with open(path, 'a', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(generate, items): items for items in sets}
+        for future in as_completed(futures):
+            try:
+                out.write(json.dumps(future.result()) + "\n")
+                out.flush()
+                done += 1
+            except Exception as e: # pylint: disable=broad-except
+                failed += 1
+                click.echo(f"{', '.join(futures[future])}: {e}", err=True)
+    return done, failed
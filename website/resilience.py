@@ -0,0 +1,345 @@
+"""
+This module bounds the latency and failure rate the app inherits from its LLM provider.
+
+ResilientBackend wraps any LLMBackend with per-attempt timeouts inside an
+overall deadline, bounded retries with jittered backoff for transient errors,
+a circuit breaker that fails fast while the provider is unhealthy, and
+optional hedged requests for the slow tail.
+"""
+
+import asyncio
+import random
+import sys
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .llm import LLMBackend
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling the provider while the circuit breaker is open.
+    """
+
+    def __init__(self, retry_after):
+        super().__init__("Recipe generation is temporarily unavailable")
+        self.retry_after = retry_after
+
+
+def _transient_errors():
+    """
+    Return the transient error classes of the standard library and every loaded provider SDK.
+
+    An SDK that has not been imported cannot have raised anything, so its
+    errors are only looked up once something else loaded it.
+    """
+    errors = [TimeoutError, ConnectionError]
+    google_errors = sys.modules.get('google.api_core.exceptions')
+    if google_errors is not None:
+        errors += [google_errors.DeadlineExceeded, google_errors.ServiceUnavailable,
+                   google_errors.ResourceExhausted, google_errors.InternalServerError,
+                   google_errors.TooManyRequests]
+    openai = sys.modules.get('openai')
+    if openai is not None and hasattr(openai, 'APITimeoutError'):
+        errors += [openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError,
+                   openai.InternalServerError]
+    return tuple(errors)
+
+
+def is_transient(error):
+    """
+    Return True if error signals a temporary provider problem rather than a bad request.
+    """
+    return isinstance(error, _transient_errors())
+
+
+class CircuitBreaker: # pylint: disable=too-many-instance-attributes
+    """
+    Consecutive-failure circuit breaker.
+
+    After failure_threshold failed calls in a row the circuit opens and calls
+    are rejected for reset_timeout seconds. Then one probe call is let through
+    (half-open): its success closes the circuit, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Raise CircuitOpenError unless a call may go upstream now.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            remaining = self.opened_at + self.reset_timeout - self.clock()
+            if self.state == self.OPEN and remaining <= 0:
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(retry_after=max(remaining, 1.0))
+
+    def record_success(self):
+        """
+        Note a successful call, closing the circuit.
+        """
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """
+        Note a failed call, opening the circuit at the threshold or after a failed probe.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+            self._probing = False
+
+    def release(self):
+        """
+        Note a call that ended without telling anything about provider health.
+        """
+        with self._lock:
+            self._probing = False
+
+
+# Latency and retry settings of a ResilientBackend; None leaves a bound or hedging off
+RetryPolicy = namedtuple('RetryPolicy', ['timeout', 'deadline', 'retries', 'backoff',
+                                         'max_backoff', 'hedge_delay', 'hedge_workers'],
+                         defaults=[None, None, 2, 0.25, 4.0, None, None])
+
+
+class ResilientBackend(LLMBackend): # pylint: disable=too-many-instance-attributes
+    """
+    LLM backend decorator that enforces the app's latency and failure policy.
+
+    Each attempt is limited to timeout seconds and the whole call, including
+    backoff, to deadline seconds. Transient errors are retried up to retries
+    times with full-jitter exponential backoff; other errors (bad request,
+    invalid key) fail at once. Only transient failures count towards the
+    circuit breaker. With hedge_delay set, a blocking generate() whose request
+    has been in flight that many seconds sends a second identical request from
+    a pool of hedge_workers threads; the first request stays on the caller's
+    thread, and if it fails the backup's answer is used instead of failing or
+    starting a retry from scratch. Streams are retried only until the request
+    is accepted; once chunks flow, a failure ends the stream. These settings
+    are the fields of policy, a RetryPolicy.
+    """
+
+    def __init__(self, backend, policy=RetryPolicy(), breaker=None, sleep=time.sleep):
+        # Wraps another backend's clients rather than creating its own
+        super().__init__()
+        self.backend = backend
+        self.name = backend.name
+        self.policy = policy
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self._random = random.Random()
+        self._hedge_executor = None
+        self._lock = threading.Lock()
+        self.retried = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def _expires_at(self):
+        return time.monotonic() + self.policy.deadline if self.policy.deadline else None
+
+    def _attempt_timeout(self, expires_at):
+        if expires_at is None:
+            return self.policy.timeout
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("Recipe generation deadline exceeded")
+        return min(self.policy.timeout, remaining) if self.policy.timeout else remaining
+
+    def _backoff_delay(self, attempt):
+        policy = self.policy
+        return self._random.uniform(0, min(policy.max_backoff, policy.backoff * 2 ** attempt))
+
+    def _retry_delay(self, error, attempt, expires_at):
+        """
+        Return how long to wait before retrying after error, or None to give up.
+        """
+        if not is_transient(error) or attempt >= self.policy.retries:
+            return None
+        delay = self._backoff_delay(attempt)
+        if expires_at is not None and time.monotonic() + delay >= expires_at:
+            return None
+        with self._lock:
+            self.retried += 1
+        return delay
+
+    def _call(self, func):
+        """
+        Run func(timeout) under the breaker with retries, returning its result.
+        """
+        self.breaker.before_call()
+        expires_at = self._expires_at()
+        attempt = 0
+        while True:
+            try:
+                result = func(self._attempt_timeout(expires_at))
+            except Exception as e: # pylint: disable=broad-except
+                delay = self._retry_delay(e, attempt, expires_at)
+                if delay is None:
+                    self._record(e)
+                    raise
+                self.sleep(delay)
+                attempt += 1
+            except BaseException:
+                self.breaker.release()
+                raise
+            else:
+                return result
+
+    def _record(self, error):
+        if is_transient(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release()
+
+    def _hedge_pool(self):
+        with self._lock:
+            if self._hedge_executor is None:
+                self._hedge_executor = ThreadPoolExecutor(
+                    max_workers=self.policy.hedge_workers, thread_name_prefix='hedge')
+            return self._hedge_executor
+
+    def _hedged(self, prompt, generation_config, timeout):
+        """
+        Make the request on this thread, with a backup sent once it is hedge_delay seconds old.
+
+        The backup's answer is returned if the first request fails after the backup was sent.
+        """
+        # The delay counts from when the request is sent, not from when a pool thread is free
+        sent_at = time.monotonic()
+        finished = threading.Event()
+        state = {"sent": False, "finished": False}
+
+        def backup():
+            if finished.wait(max(0.0, sent_at + self.policy.hedge_delay - time.monotonic())):
+                return None
+            with self._lock:
+                if state["finished"]:
+                    return None
+                state["sent"] = True
+                self.hedged += 1
+            return self.backend.generate(prompt, generation_config, timeout)
+
+        hedge = self._hedge_pool().submit(backup)
+        try:
+            result = self.backend.generate(prompt, generation_config, timeout)
+        except Exception: # pylint: disable=broad-except
+            if not self._finish_hedge(state, finished):
+                raise
+            try:
+                result = hedge.result()
+            except Exception: # pylint: disable=broad-except
+                pass
+            else:
+                with self._lock:
+                    self.hedge_wins += 1
+                return result
+            raise
+        self._finish_hedge(state, finished)
+        return result
+
+    def _finish_hedge(self, state, finished):
+        """
+        Stop a backup that has not been sent yet; return True if it already was.
+        """
+        with self._lock:
+            state["finished"] = True
+            sent = state["sent"]
+        finished.set()
+        return sent
+
+    def generate(self, prompt, generation_config, timeout=None):
+        if self.policy.hedge_delay:
+            result = self._call(lambda t: self._hedged(prompt, generation_config, timeout or t))
+        else:
+            result = self._call(
+                lambda t: self.backend.generate(prompt, generation_config, timeout or t))
+        self.breaker.record_success()
+        return result
+
+    def generate_stream(self, prompt, generation_config, timeout=None):
+        chunks = self._call(
+            lambda t: self.backend.generate_stream(prompt, generation_config, timeout or t))
+        return self._watch_stream(chunks)
+
+    def _watch_stream(self, chunks):
+        try:
+            yield from chunks
+        except Exception as e: # pylint: disable=broad-except
+            self._record(e)
+            raise
+        except BaseException:
+            # Client disconnected (GeneratorExit): not the provider's fault
+            self.breaker.release()
+            raise
+        self.breaker.record_success()
+
+    async def generate_async(self, prompt, generation_config, timeout=None):
+        self.breaker.before_call()
+        expires_at = self._expires_at()
+        attempt = 0
+        while True:
+            try:
+                attempt_timeout = timeout or self._attempt_timeout(expires_at)
+                result = await asyncio.wait_for(
+                    self.backend.generate_async(prompt, generation_config, attempt_timeout),
+                    attempt_timeout)
+            except Exception as e: # pylint: disable=broad-except
+                delay = self._retry_delay(e, attempt, expires_at)
+                if delay is None:
+                    self._record(e)
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+            except BaseException:
+                # Cancelled by the caller: free a half-open probe slot
+                self.breaker.release()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+
+    def reset(self):
+        self.backend.reset()
+
+    def warm_up(self):
+        self.backend.warm_up()
+
+    def stats(self):
+        """
+        Return retry, hedge and circuit breaker counters.
+        """
+        with self._lock:
+            return {
+                "retried": self.retried,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "circuit_state": self.breaker.state,
+                "circuit_rejected": self.breaker.rejected,
+            }
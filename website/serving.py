@@ -0,0 +1,61 @@
+"""
+This module adapts the application to the gunicorn worker class it is served with.
+
+Under the gevent worker every request runs in a greenlet and blocking socket
+calls yield to other requests, so a few processes can hold thousands of
+outstanding Gemini calls. gRPC does its I/O in C and must be told to cooperate
+with gevent before any channel is created.
+
+gunicorn.conf.py preloads the app in the master process and calls
+post_fork() in each worker to restart what a fork does not carry over.
+"""
+
+import threading
+
+# Concurrent upstream calls per process for each worker model
+SYNC_GENERATION_THREADS = 8
+GEVENT_GENERATION_THREADS = 1000
+
+_init_lock = threading.Lock()
+_state = {"grpc_patched": False}
+
+
+def gevent_active():
+    """
+    Return True if gevent has monkey-patched the standard library in this process.
+    """
+    try:
+        from gevent import monkey # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def default_generation_threads():
+    """
+    Return the generation pool size suited to the current worker model.
+    """
+    return GEVENT_GENERATION_THREADS if gevent_active() else SYNC_GENERATION_THREADS
+
+
+def init_worker():
+    """
+    Prepare process-wide state for the worker model. Safe to call more than once.
+    """
+    with _init_lock:
+        if _state["grpc_patched"] or not gevent_active():
+            return
+        import grpc.experimental.gevent # pylint: disable=import-outside-toplevel
+        grpc.experimental.gevent.init_gevent()
+        _state["grpc_patched"] = True
+
+
+def post_fork(app):
+    """
+    Restore per-process state in a worker forked from a master that preloaded app.
+
+    Threads do not survive fork, so the ingredient catalog watcher is started
+    again; LLM provider clients were already dropped by llm.reset_clients().
+    """
+    init_worker()
+    app.extensions['ingredient_catalog'].start()
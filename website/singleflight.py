@@ -0,0 +1,134 @@
+"""
+This module coalesces concurrent identical generation requests into one upstream call.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows has no flock; cross-worker mode is disabled
+    fcntl = None
+
+
+class _Call: # pylint: disable=too-few-public-methods
+    """
+    One in-flight computation that followers wait on.
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight: # pylint: disable=too-many-instance-attributes
+    """
+    Run at most one computation per key at a time and share its outcome.
+
+    Within a process, callers arriving while a key is in flight wait for the
+    leader and receive its result or exception. With lock_dir set, leaders in
+    different workers also serialize on a per-key lock file; after acquiring
+    it, a leader calls recheck() first, so a result another worker just stored
+    in a shared cache is returned instead of generated again.
+    """
+
+    def __init__(self, lock_dir=None, lock_timeout=60.0, poll_interval=0.05):
+        self.lock_dir = lock_dir if fcntl else None
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+        self.cross_worker_hits = 0
+        if self.lock_dir:
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+    def do(self, key, func, recheck=None):
+        """
+        Return func() for key, sharing one execution among concurrent callers.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+            else:
+                self.coalesced += 1
+                leader = False
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            with self._worker_lock(key):
+                result = recheck() if recheck and self.lock_dir else None
+                if result is not None:
+                    with self._lock:
+                        self.cross_worker_hits += 1
+                else:
+                    result = func()
+            call.result = result
+            return result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    @contextmanager
+    def _worker_lock(self, key):
+        """
+        Hold an exclusive lock on key's lock file, if cross-worker mode is enabled.
+
+        The lock is polled rather than taken with a blocking flock so that gevent
+        workers keep serving other requests while they wait. On timeout the caller
+        proceeds unlocked: a duplicate upstream call beats a failed request.
+        """
+        if not self.lock_dir:
+            yield
+            return
+        path = os.path.join(self.lock_dir, f"{key}.lock")
+        with open(path, 'a+', encoding='utf-8') as f:
+            deadline = time.monotonic() + self.lock_timeout
+            locked = False
+            while not locked:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        break
+                    time.sleep(self.poll_interval)
+            try:
+                yield
+            finally:
+                if locked:
+                    # Unlinking may let a late waiter lock an orphaned inode; its
+                    # recheck() then finds the stored result, so the race is benign
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def stats(self):
+        """
+        Return counters for leaders, coalesced followers and in-flight keys.
+        """
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "cross_worker_hits": self.cross_worker_hits,
+                "in_flight": len(self._calls),
+            }
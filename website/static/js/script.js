@@ -62,15 +62,70 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
+    // Ingredient catalog for local suggestions; null until loaded, or if loading fails
+    let catalog = null;
+    loadCatalog();
+
     // Functions
+    async function loadCatalog() {
+        // The versioned URL is cached by the browser, so this is a request only on first visit
+        const url = inputEl.dataset.catalogUrl;
+        if (!url) return;
+
+        try {
+            const response = await fetch(url);
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            const names = await response.json();
+            catalog = names.map(name => ({ name, lower: name.toLowerCase() }));
+        } catch (error) {
+            console.error('Error loading ingredient catalog:', error);
+        }
+    }
+
+    function isWordStart(name, query) {
+        let start = name.indexOf(query, 1);
+        while (start !== -1) {
+            if (!/\p{L}/u.test(name[start - 1])) return true;
+            start = name.indexOf(query, start + 1);
+        }
+        return false;
+    }
+
+    function localSuggestions(query, limit = 10) {
+        // Same ranking as the server: prefix matches, then word starts, then substrings
+        const tiers = [[], [], []];
+        for (const { name, lower } of catalog) {
+            const position = lower.indexOf(query);
+            if (position === -1) continue;
+            if (position === 0) {
+                tiers[0].push(name);
+                if (tiers[0].length === limit) break;
+            } else {
+                tiers[isWordStart(lower, query) ? 1 : 2].push(name);
+            }
+        }
+        return tiers.flat().slice(0, limit);
+    }
+
     async function handleInput() {
-        const input = this.value.trim().toLowerCase();
+        const input = this.value.trim().toLowerCase().replace(/\s+/g, ' ');
 
         if (input.length < 2) {
             suggestionsContainer.classList.add('d-none');
             return;
         }
 
+        // Only ask the server when nothing matches locally, since it also corrects typos
+        if (catalog) {
+            const ingredients = localSuggestions(input);
+            if (ingredients.length > 0) {
+                renderSuggestions(ingredients);
+                return;
+            }
+        }
+
         try {
             const response = await fetch(`/api/ingredients?query=${encodeURIComponent(input)}`);
             const ingredients = await response.json();
@@ -220,31 +275,21 @@ document.addEventListener('DOMContentLoaded', function() {
         const ingredientsArray = Array.from(selectedIngredients);
 
         try {
-            // Generate main recipe
-            const recipeResponse = await fetch('/api/generate-recipe', {
+            // Generate the recipe and similar recipes in one streamed request
+            const recipeResponse = await fetch('/api/generate-recipe/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
                 },
-                body: JSON.stringify({ ingredients: ingredientsArray }),
+                body: JSON.stringify({ ingredients: ingredientsArray, include_similar: true }),
             });
 
             if (!recipeResponse.ok) {
-                throw new Error(`API error: ${recipeResponse.status}`);
-            }
-
-            const recipeData = await recipeResponse.json();
-
-            // Check if there's an error in the response
-            if (recipeData.error) {
-                throw new Error(recipeData.error);
+                const errorData = await recipeResponse.json().catch(() => ({}));
+                throw new Error(errorData.error || `API error: ${recipeResponse.status}`);
             }
 
-            // Display recipe
-            renderRecipe(recipeData);
-
-            // Generate similar recipes
-            generateSimilarRecipes(ingredientsArray);
+            await readRecipeStream(recipeResponse);
 
         } catch (error) {
             console.error('Error generating recipe:', error);
@@ -259,7 +304,126 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Read newline-delimited JSON events, rendering fields as they complete,
+    // then the full recipe on "done" and the similar recipes once both are in.
+    async function readRecipeStream(response) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        const partial = { title: '', description: '', ingredients: [], instructions: [] };
+        let buffer = '';
+        let recipeDone = false;
+        let pendingSimilar = null;
+
+        function handleEvent(event) {
+            if (event.event === 'error') {
+                throw new Error(event.error);
+            }
+            if (event.event === 'done') {
+                renderRecipe(event.recipe);
+                recipeDone = true;
+                showSimilarRecipesLoading();
+                if (pendingSimilar) {
+                    handleSimilarEvent(pendingSimilar);
+                }
+            } else if (event.event === 'similar' || event.event === 'similar_error') {
+                if (recipeDone) {
+                    handleSimilarEvent(event);
+                } else {
+                    pendingSimilar = event;
+                }
+            } else if (event.event === 'item') {
+                partial[event.field] = partial[event.field] || [];
+                partial[event.field].push(event.value);
+                renderPartialRecipe(partial);
+            } else {
+                partial[event.field] = event.value;
+                renderPartialRecipe(partial);
+            }
+        }
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+
+            for (const line of lines) {
+                if (line.trim()) {
+                    handleEvent(JSON.parse(line));
+                }
+            }
+        }
+
+        if (!recipeDone) {
+            throw new Error('The recipe stream ended unexpectedly');
+        }
+    }
+
+    function handleSimilarEvent(event) {
+        if (event.event === 'similar_error') {
+            showSimilarRecipesError(new Error(event.error));
+        } else if (!event.value || !Array.isArray(event.value.recipes)) {
+            showSimilarRecipesError(new Error("Invalid recipe format received"));
+        } else {
+            renderSimilarRecipes(event.value.recipes);
+        }
+    }
+
+    function renderPartialRecipe(recipe) {
+        // Build the skeleton once, then fill it in as events arrive
+        if (!recipeContent.querySelector('.recipe-streaming')) {
+            recipeContent.innerHTML = `
+                <div class="recipe-streaming">
+                    <div class="recipe-hero" style="background-image: url(${window.location.origin}/static/img/recipe.avif)">
+                        <div class="recipe-hero-overlay">
+                            <h2 class="recipe-title"></h2>
+                        </div>
+                    </div>
+
+                    <div class="card-body">
+                        <p class="recipe-description"></p>
+
+                        <div class="row">
+                            <div class="col-md-5">
+                                <div class="recipe-section">
+                                    <h3><i class="fas fa-carrot me-2"></i>Ingredients</h3>
+                                    <ul class="recipe-ingredients"></ul>
+                                </div>
+                            </div>
+                            <div class="col-md-7">
+                                <div class="recipe-section">
+                                    <h3><i class="fas fa-list-ol me-2"></i>Instructions</h3>
+                                    <ol class="recipe-instructions"></ol>
+                                </div>
+                            </div>
+                        </div>
+                    </div>
+                </div>
+            `;
+            recipeLoading.classList.add('d-none');
+            recipeContent.classList.remove('d-none');
+        }
+
+        recipeContent.querySelector('.recipe-title').textContent = recipe.title;
+        recipeContent.querySelector('.recipe-description').textContent = recipe.description;
+        appendListItems(recipeContent.querySelector('.recipe-ingredients'), recipe.ingredients);
+        appendListItems(recipeContent.querySelector('.recipe-instructions'), recipe.instructions);
+    }
+
+    function appendListItems(list, items) {
+        for (let i = list.children.length; i < items.length; i++) {
+            const li = document.createElement('li');
+            li.textContent = items[i];
+            list.appendChild(li);
+        }
+    }
+
     function renderRecipe(recipe) {
+        // Only fade in when nothing was streamed into view yet
+        const animate = recipeContent.classList.contains('d-none');
+
         // Set hero image based on recipe content
         const heroBackground = getRecipeImage(recipe);
 
@@ -323,54 +487,29 @@ document.addEventListener('DOMContentLoaded', function() {
         recipeContent.classList.remove('d-none');
 
         // Add animation
-        recipeContent.style.opacity = '0';
-        setTimeout(() => {
-            recipeContent.style.opacity = '1';
-        }, 100);
+        if (animate) {
+            recipeContent.style.opacity = '0';
+            setTimeout(() => {
+                recipeContent.style.opacity = '1';
+            }, 100);
+        }
     }
 
-    async function generateSimilarRecipes(ingredients) {
+    function showSimilarRecipesLoading() {
         similarRecipes.classList.remove('d-none');
         similarRecipesContainer.innerHTML = '';
         similarRecipesLoading.classList.remove('d-none');
+    }
 
-        try {
-            const response = await fetch('/api/similar-recipes', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ ingredients: ingredients }),
-            });
-
-            if (!response.ok) {
-                throw new Error(`API error: ${response.status}`);
-            }
-
-            const data = await response.json();
-
-            // Check if there's an error or if recipes are missing
-            if (data.error) {
-                throw new Error(data.error);
-            }
-
-            if (!data.recipes || !Array.isArray(data.recipes)) {
-                throw new Error("Invalid recipe format received");
-            }
-
-            // Render similar recipes
-            renderSimilarRecipes(data.recipes);
-
-        } catch (error) {
-            console.error('Error generating similar recipes:', error);
-            similarRecipesLoading.classList.add('d-none');
-            similarRecipesContainer.innerHTML = `
-                <div class="alert alert-warning">
-                    <i class="fas fa-exclamation-triangle me-2"></i>
-                    Unable to load additional recipe suggestions: ${error.message || 'Please try again.'}
-                </div>
-            `;
-        }
+    function showSimilarRecipesError(error) {
+        console.error('Error generating similar recipes:', error);
+        similarRecipesLoading.classList.add('d-none');
+        similarRecipesContainer.innerHTML = `
+            <div class="alert alert-warning">
+                <i class="fas fa-exclamation-triangle me-2"></i>
+                Unable to load additional recipe suggestions: ${error.message || 'Please try again.'}
+            </div>
+        `;
     }
 
     function renderSimilarRecipes(recipes) {
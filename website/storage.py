@@ -0,0 +1,22 @@
+"""
+This module opens the SQLite files shared by the worker processes on a host.
+"""
+
+import sqlite3
+from contextlib import contextmanager
+
+
+@contextmanager
+def connect(path):
+    """
+    Open the database at path for one transaction, committed if the block succeeds.
+
+    Each call opens its own connection and closes it afterwards, so callers
+    are safe across threads and forked workers without sharing one.
+    """
+    db = sqlite3.connect(path, timeout=5)
+    try:
+        with db:
+            yield db
+    finally:
+        db.close()
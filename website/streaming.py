@@ -0,0 +1,155 @@
+"""
+This module turns a streamed Gemini recipe response into incremental events.
+"""
+
+import json
+
+_WHITESPACE = " \t\r\n"
+
+
+class RecipeStreamParser: # pylint: disable=too-few-public-methods,too-many-instance-attributes
+    """
+    Incremental parser for a JSON object arriving in arbitrary text chunks.
+
+    Each call to feed() returns the events completed by that chunk:
+    ("field", key, value) once a top-level scalar or object value is complete,
+    and ("item", key, value) for every element of a top-level array as soon as
+    that element is complete. Text before the first "{" (prose or a markdown
+    fence) is skipped. Once the closing brace arrives, result holds the object.
+    """
+
+    def __init__(self):
+        self.result = None
+        self.failed = False
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._state = "seek"
+        self._key = None
+        self._fields = {}
+
+    def feed(self, text):
+        """
+        Append a chunk of model output and return the newly completed events.
+        """
+        self._buffer += text
+        events = []
+        if self.failed or self.result is not None:
+            return events
+        try:
+            while self._step(events):
+                pass
+        except ValueError:
+            # Not the expected shape; callers fall back to parsing the full text
+            self.failed = True
+        return events
+
+    def _skip_whitespace(self):
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+            self._pos += 1
+        return self._buffer[self._pos] if self._pos < len(self._buffer) else None
+
+    def _decode(self):
+        """
+        Decode one complete JSON value at the current position, or return None to wait.
+        """
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return None
+        # Require a following delimiter so a number cut mid-chunk is not taken as complete
+        rest = self._buffer[end:].lstrip(_WHITESPACE)
+        if not rest:
+            return None
+        self._pos = end
+        return (value,)
+
+    def _step(self, events): # pylint: disable=too-many-return-statements,too-many-branches
+        """
+        Advance the state machine by one token. Return False when more input is needed.
+        """
+        if self._state == "seek":
+            start = self._buffer.find("{", self._pos)
+            if start == -1:
+                self._pos = len(self._buffer)
+                return False
+            self._pos = start + 1
+            self._state = "key"
+            return True
+
+        char = self._skip_whitespace()
+        if char is None:
+            return False
+
+        if self._state == "key":
+            if char == "}":
+                self._pos += 1
+                self.result = self._fields
+                return False
+            if char == ",":
+                self._pos += 1
+                return True
+            if char != '"':
+                raise ValueError(f"Unexpected {char!r} before key")
+            decoded = self._decode()
+            if decoded is None:
+                return False
+            self._key = decoded[0]
+            self._state = "colon"
+            return True
+
+        if self._state == "colon":
+            if char != ":":
+                raise ValueError(f"Expected ':' after key, got {char!r}")
+            self._pos += 1
+            self._state = "value"
+            return True
+
+        if self._state == "value":
+            if char == "[":
+                self._pos += 1
+                self._fields[self._key] = []
+                self._state = "items"
+                return True
+            decoded = self._decode()
+            if decoded is None:
+                return False
+            self._fields[self._key] = decoded[0]
+            events.append(("field", self._key, decoded[0]))
+            self._state = "key"
+            return True
+
+        # Inside a top-level array
+        if char == "]":
+            self._pos += 1
+            self._state = "key"
+            return True
+        if char == ",":
+            self._pos += 1
+            return True
+        decoded = self._decode()
+        if decoded is None:
+            return False
+        self._fields[self._key].append(decoded[0])
+        events.append(("item", self._key, decoded[0]))
+        return True
+
+
+def recipe_events(chunks, parse_full_text):
+    """
+    Yield event dicts for a stream of text chunks, ending with a "done" event.
+
+    parse_full_text is used on the concatenated text when the incremental parser
+    could not recognise the object, so a response the buffered endpoint would
+    accept is never rejected here.
+    """
+    parser = RecipeStreamParser()
+    received = []
+    for chunk in chunks:
+        received.append(chunk)
+        for kind, key, value in parser.feed(chunk):
+            yield {"event": kind, "field": key, "value": value}
+    recipe = parser.result
+    if recipe is None:
+        recipe = parse_full_text("".join(received))
+    yield {"event": "done", "recipe": recipe}
@@ -2,56 +2,115 @@
 This module defines the views for the website, including API endpoints and home route.
 """
 
-import os
+import hashlib
 import json
-from flask import Blueprint, render_template, request, jsonify
-import google.generativeai as genai
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from flask import (
+    Blueprint, Response, current_app, redirect, render_template, request, jsonify,
+    stream_with_context, url_for,
+)
+from .admission import AdmissionRejected
+from .cache import cache_key
+from .generation import client_id, generate_json, request_ingredients, submit_in_app_context
+from .parsing import parse_model_json, validate_recipe
+from .prompts import PROMPTS, prompts_for
+from .resilience import CircuitOpenError
+from .streaming import recipe_events
 
 # Create a blueprint for the main routes
 main_blueprint = Blueprint('main', __name__)
 
-# Configure Gemini API
-genai.configure(api_key=os.environ.get('GEMINI_API_KEY'))
-model = genai.GenerativeModel('models/gemini-1.5-pro')
+def _error_response(error):
+    """
+    Build the JSON error response for a failed generation.
+
+    Requests refused by admission control get 429 and those refused by the
+    open circuit breaker 503, both with a Retry-After hint; anything else is a 500.
+    """
+    current_app.extensions['metrics'].errors.inc((type(error).__name__,))
+    response = jsonify({"error": str(error)})
+    if isinstance(error, (AdmissionRejected, CircuitOpenError)):
+        response.status_code = 429 if isinstance(error, AdmissionRejected) else 503
+        response.headers["Retry-After"] = str(max(1, round(error.retry_after)))
+    else:
+        response.status_code = 500
+    return response
+
+def _jsonify_timed(result):
+    """
+    Serialize result into a JSON response, timed as the "serialize" stage.
+    """
+    with current_app.extensions['metrics'].stage('serialize'):
+        return jsonify(result)
 
 # Home Route
 @main_blueprint.route('/', methods=['GET'])
 def home():
     """
     Render the home page.
+
+    The page links the current catalog version so the browser can fetch it
+    once, cache it indefinitely and suggest ingredients locally.
     """
-    return render_template("index.html")
+    index = current_app.extensions['ingredient_catalog'].index
+    catalog_url = (url_for('main.get_ingredient_catalog', version=index.payload.version)
+                   if index is not None else None)
+    return render_template("index.html", catalog_url=catalog_url)
 
 # API endpoint for ingredient suggestions
 @main_blueprint.route('/api/ingredients', methods=['GET'])
 def get_ingredients():
     """
     Get a list of ingredients based on a search query.
+
+    Suggestions only change with the catalog, so the response carries an ETag
+    made from the catalog version and the normalized query and may be cached
+    publicly; a matching If-None-Match gets an empty 304.
     """
     try:
-        # Load ingredients from JSON file
-        with open('website/static/data/ingredients.json', 'r', encoding='utf-8') as f:
-            ingredients = json.load(f)
-
-        query = request.args.get('query', '').lower()
-
-        if query and len(query) >= 2:
-            # Filter ingredients that contain the query
-            filtered_ingredients = [
-                ingredient for ingredient in ingredients
-                if query in ingredient.lower()
-            ]
-            return jsonify(filtered_ingredients[:10])  # Limit to 10 suggestions
-        return jsonify([])
+        # Read the live index once; the catalog may swap in a new one at any time
+        index = current_app.extensions['ingredient_catalog'].index
+        if index is None:
+            raise FileNotFoundError
+
+        query = " ".join(request.args.get('query', '').lower().split())
+        digest = hashlib.blake2b(query.encode('utf-8'), digest_size=8).hexdigest()
+        response = Response(mimetype='application/json')
+        response.headers['Cache-Control'] = (
+            f"public, max-age={current_app.config['SUGGESTION_CACHE_MAX_AGE']}")
+        response.set_etag(f"{index.payload.version}-{digest}")
+        # Weak comparison, as compression weakens the ETag of large responses
+        if request.if_none_match.contains_weak(response.get_etag()[0]):
+            return response.make_conditional(request)
+
+        # Limit to 10 suggestions; queries of 2-3 characters are answered from precomputed bodies
+        response.set_data(index.suggestion_body(query) if len(query) >= 2 else b"[]")
+        return response
     except FileNotFoundError:
         return jsonify({"error": "Ingredients file not found"}), 404
     except Exception as e: # pylint: disable=broad-except
         return jsonify({"error": str(e)}), 500  # Return 500 error for exceptions
 
+# Whole catalog for client-side autocomplete
+@main_blueprint.route('/api/ingredients/catalog', methods=['GET'])
+@main_blueprint.route('/api/ingredients/catalog/<version>', methods=['GET'])
+def get_ingredient_catalog(version=None):
+    """
+    Return every ingredient name as a precompressed JSON list.
+
+    A versioned URL never changes content, so it may be cached for a year;
+    a stale version redirects to the current one. The unversioned URL must be
+    revalidated, which costs a 304 while the catalog is unchanged.
+    """
+    index = current_app.extensions['ingredient_catalog'].index
+    if index is None:
+        return jsonify({"error": "Ingredients file not found"}), 404
+    payload = index.payload
+    if version is None:
+        return payload.response('application/json', 'no-cache')
+    if version != payload.version:
+        return redirect(url_for('main.get_ingredient_catalog', version=payload.version))
+    return payload.response('application/json', 'public, max-age=31536000, immutable')
+
 # API endpoint for generating recipes
 @main_blueprint.route('/api/generate-recipe', methods=['POST'])
 def generate_recipe():
@@ -59,60 +118,119 @@ def generate_recipe():
     Generate a recipe using the provided ingredients.
     """
     data = request.get_json()
-    ingredients = data.get('ingredients', [])
+    try:
+        ingredients = request_ingredients(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     if not ingredients:
         return jsonify({"error": "No ingredients provided"}), 400
 
     try:
-        # Create a prompt for Gemini
-        prompt = f"""
-        Create a detailed recipe using some or all of these ingredients: {', '.join(ingredients)}.
-
-        You must return your response in valid JSON format with the following structure:
-        {{
-            "title": "Recipe Name",
-            "description": "Brief description of the dish",
-            "ingredients": [
-                "1 cup ingredient 1",
-                "2 tbsp ingredient 2",
-                ...
-            ],
-            "instructions": [
-                "Step 1: Do this",
-                "Step 2: Do that",
-                ...
-            ],
-            "cook_time": "30 minutes",
-            "servings": 4,
-            "difficulty": "Easy/Medium/Hard"
-        }}
-
-        Do not include any text before or after the JSON. Only return valid JSON.
-        """
-
-        # Call Gemini API
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.7,
-                top_p=0.95,
-                max_output_tokens=1000,
-            )
-        )
-
-        # Clean response text if markdown formatting is present
-        response_text = response.text
-        if response_text.startswith("```json"):
-            response_text = response_text.replace("```json", "").replace("```", "")
-        elif response_text.startswith("```"):
-            response_text = response_text.replace("```", "")
-
-        recipe_json = json.loads(response_text.strip())
-        return jsonify(recipe_json)
+        return _jsonify_timed(generate_json('recipe', ingredients))
+    except Exception as e: # pylint: disable=broad-except
+        return _error_response(e)
+
+def _recipe_chunks(ingredients, build_prompt, generation_config, key):
+    """
+    Return (chunks, cached) to stream the recipe for ingredients from.
+
+    A cached or stored recipe is replayed as a single chunk. Otherwise chunks is
+    the model's stream, cached is None, and an upstream admission slot is held
+    that the caller releases when the response is closed.
+    """
+    cache = current_app.extensions['recipe_cache']
+    cached = cache.get(key)
+    if cached is None:
+        cached = current_app.extensions['recipe_store'].lookup('recipe', ingredients)
+    if cached is None:
+        admission = current_app.extensions['admission']
+        admission.check_rate(client_id())
+        admission.acquire()
+        try:
+            return (current_app.extensions['llm'].generate_stream(build_prompt(ingredients),
+                                                                  generation_config), None)
+        except CircuitOpenError:
+            admission.release()
+            cached = cache.get_stale(key)
+            if cached is None:
+                raise
+        except Exception:
+            admission.release()
+            raise
+    # Replay the cached recipe through the same event path
+    return [json.dumps(cached)], cached
+
+# Streaming variant of the recipe endpoint
+@main_blueprint.route('/api/generate-recipe/stream', methods=['POST'])
+def generate_recipe_stream():
+    """
+    Generate a recipe and stream it as newline-delimited JSON events.
+
+    Title and description are sent as soon as Gemini produces them, followed by
+    each ingredient and instruction as it completes, and finally a "done" event
+    carrying the whole recipe (or an "error" event). With "include_similar" set,
+    similar recipes are generated concurrently and sent as a "similar" (or
+    "similar_error") event, so the browser needs a single request.
+    """
+    data = request.get_json()
+    try:
+        ingredients = request_ingredients(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not ingredients:
+        return jsonify({"error": "No ingredients provided"}), 400
 
+    similar_future = None
+    if data.get('include_similar'):
+        similar_future = submit_in_app_context(generate_json, 'similar', ingredients)
+
+    # Always the prose prompt, whose example puts the title first (see RECIPE_SCHEMA), but
+    # the buffered endpoint's cache key, so either one serves recipes the other generated
+    build_prompt, generation_config = PROMPTS['recipe']
+    cache = current_app.extensions['recipe_cache']
+    key = cache_key('recipe', ingredients,
+                    prompts_for(current_app.config['STRUCTURED_OUTPUT'])['recipe'][1])
+    try:
+        chunks, cached = _recipe_chunks(ingredients, build_prompt, generation_config, key)
     except Exception as e: # pylint: disable=broad-except
-        return jsonify({"error": str(e)}), 500
+        if similar_future is not None:
+            similar_future.cancel()
+        return _error_response(e)
+
+    def similar_event():
+        try:
+            return {"event": "similar", "value": similar_future.result()}
+        except Exception as e: # pylint: disable=broad-except
+            return {"event": "similar_error", "error": str(e)}
+
+    def events():
+        nonlocal similar_future
+        try:
+            for event in recipe_events(chunks, lambda text: parse_model_json(text, 'recipe')):
+                if event["event"] == "done" and cached is None:
+                    cache.set(key, validate_recipe(event["recipe"]))
+                yield json.dumps(event) + "\n"
+                # Forward similar recipes as soon as they are ready
+                if similar_future is not None and similar_future.done():
+                    yield json.dumps(similar_event()) + "\n"
+                    similar_future = None
+        except Exception as e: # pylint: disable=broad-except
+            if similar_future is not None:
+                similar_future.cancel()
+            current_app.extensions['metrics'].errors.inc((type(e).__name__,))
+            yield json.dumps({"event": "error", "error": str(e)}) + "\n"
+            return
+        if similar_future is not None:
+            yield json.dumps(similar_event()) + "\n"
+
+    response = Response(stream_with_context(events()), mimetype='application/x-ndjson',
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    if cached is None:
+        # The upstream slot taken by _recipe_chunks() is held until the response is closed
+        response.call_on_close(current_app.extensions['admission'].release)
+    return response
 
 # API endpoint for generating similar recipes
 @main_blueprint.route('/api/similar-recipes', methods=['POST'])
@@ -121,53 +239,59 @@ def similar_recipes():
     Generate similar recipes based on provided ingredients.
     """
     data = request.get_json()
-    ingredients = data.get('ingredients', [])
+    try:
+        ingredients = request_ingredients(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     if not ingredients:
         return jsonify({"error": "No ingredients provided"}), 400
 
     try:
-        # Create a prompt for Gemini
-        prompt = f"""
-        Generate 3 different recipe ideas (just titles and brief descriptions)
-        using some or all of these ingredients: {', '.join(ingredients)}.
-
-        You must return your response in valid JSON format with the following structure:
-        {{
-            "recipes": [
-                {{
-                    "title": "Recipe 1 Name",
-                    "description": "Brief description",
-                    "cook_time": "20 minutes",
-                    "difficulty": "Easy/Medium/Hard",
-                    "matching_ingredients": ["ingredient1", "ingredient2"]
-                }},
-                ...
-            ]
-        }}
-
-        Do not include any text before or after the JSON. Only return valid JSON.
-        """
-
-        # Call Gemini API
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.8,
-                top_p=0.95,
-                max_output_tokens=800,
-            )
-        )
-
-        # Clean response text if markdown formatting is present
-        response_text = response.text
-        if response_text.startswith("```json"):
-            response_text = response_text.replace("```json", "").replace("```", "")
-        elif response_text.startswith("```"):
-            response_text = response_text.replace("```", "")
-
-        recipes_json = json.loads(response_text.strip())
-        return jsonify(recipes_json)
+        return _jsonify_timed(generate_json('similar', ingredients))
+    except Exception as e: # pylint: disable=broad-except
+        return _error_response(e)
 
+# API endpoint generating a recipe and similar recipes in one request
+@main_blueprint.route('/api/recipe-bundle', methods=['POST'])
+def recipe_bundle():
+    """
+    Generate a recipe and similar recipes concurrently.
+
+    The similar-recipes prompt runs on the generation thread pool while the
+    main recipe is generated on the request thread, so latency is the slower
+    of the two calls rather than their sum. A failure of the similar recipes
+    is reported in "similar_error" without failing the main recipe.
+    """
+    data = request.get_json()
+    try:
+        ingredients = request_ingredients(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if not ingredients:
+        return jsonify({"error": "No ingredients provided"}), 400
+
+    similar_future = submit_in_app_context(generate_json, 'similar', ingredients)
+    try:
+        recipe = generate_json('recipe', ingredients)
     except Exception as e: # pylint: disable=broad-except
-        return jsonify({"error": str(e)}), 500
+        similar_future.cancel()
+        return _error_response(e)
+
+    result = {"recipe": recipe, "similar": None}
+    try:
+        result["similar"] = similar_future.result()
+    except Exception as e: # pylint: disable=broad-except
+        current_app.extensions['metrics'].errors.inc((type(e).__name__,))
+        result["similar_error"] = str(e)
+    return _jsonify_timed(result)
+
+# Prometheus scrape endpoint
+@main_blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Expose this worker's metrics in the Prometheus text format.
+    """
+    return Response(current_app.extensions['metrics'].render(),
+                    mimetype='text/plain; version=0.0.4')